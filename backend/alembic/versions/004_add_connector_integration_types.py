@@ -0,0 +1,25 @@
+"""Add Shopify and Nuvemshop integration types
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-02-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE integrationtype ADD VALUE IF NOT EXISTS 'SHOPIFY'")
+        op.execute("ALTER TYPE integrationtype ADD VALUE IF NOT EXISTS 'NUVEMSHOP'")
+
+def downgrade():
+    # PostgreSQL cannot drop enum values; integrations using them must be removed manually
+    pass
@@ -0,0 +1,42 @@
+"""Make (integration_id, external_id) unique on products
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-02-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Bulk product upserts use this index as their ON CONFLICT target.
+    # Built concurrently so large catalogs stay writable during the migration;
+    # rows without external_id (manual products) are not affected since NULLs are distinct.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_product_integration_external', 'products',
+            ['integration_id', 'external_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'idx_product_integration_external', table_name='products',
+            postgresql_concurrently=True, if_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_product_integration_external', 'products',
+            ['integration_id', 'external_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'uq_product_integration_external', table_name='products',
+            postgresql_concurrently=True, if_exists=True
+        )
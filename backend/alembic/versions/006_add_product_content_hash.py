@@ -0,0 +1,22 @@
+"""Add content hash to products
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-02-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Nullable so existing rows are simply rewritten on their next import
+    op.add_column('products', sa.Column('content_hash', sa.String(64), nullable=True))
+
+def downgrade():
+    op.drop_column('products', 'content_hash')
@@ -0,0 +1,22 @@
+"""Add incremental sync cursors to integrations
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-02-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Empty cursors make the first run of each sync type a full reconciliation
+    op.add_column('integrations', sa.Column('sync_cursors', sa.JSON(), nullable=True))
+
+def downgrade():
+    op.drop_column('integrations', 'sync_cursors')
@@ -0,0 +1,21 @@
+"""Add resume checkpoints to sync jobs
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-02-14 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('sync_jobs', sa.Column('checkpoint', sa.JSON(), nullable=True))
+
+def downgrade():
+    op.drop_column('sync_jobs', 'checkpoint')
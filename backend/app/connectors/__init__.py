@@ -0,0 +1,64 @@
+# Connectors
+# Native async connectors used by the Celery sync workers
+
+from typing import Any, Dict, Type
+
+from .base import BaseConnector, ConnectorError, NormalizedProduct, OrderPage, ProductPage
+from .cache import ConnectorCache, credentials_version, get_connector_cache
+from .bling import BlingConnector
+from .mercadolivre import MercadoLivreConnector
+from .shopify import ShopifyConnector
+from .nuvemshop import NuvemShopConnector
+
+CONNECTORS: Dict[str, Type[BaseConnector]] = {
+    "bling": BlingConnector,
+    "mercadolivre": MercadoLivreConnector,
+    "ml": MercadoLivreConnector,
+    "shopify": ShopifyConnector,
+    "nuvemshop": NuvemShopConnector,
+}
+
+def get_connector(integration_type: Any, config: Dict[str, Any]) -> BaseConnector:
+    """Get a configured connector instance for an integration type"""
+    # Accept IntegrationType enum members as well as plain strings
+    type_name = str(getattr(integration_type, "value", integration_type)).lower()
+
+    connector_class = CONNECTORS.get(type_name)
+    if connector_class is None:
+        raise ValueError(f"Unknown integration type: {integration_type}")
+
+    connector = connector_class()
+    connector.configure(config)
+    return connector
+
+def get_cached_connector(integration_type: Any, config: Dict[str, Any]) -> BaseConnector:
+    """Get the worker's configured connector for an integration, reusing it across jobs
+
+    Configs without an ``integration_id`` (ad-hoc checks, scripts) always get
+    a fresh connector.
+    """
+    integration_id = config.get('integration_id')
+    if not integration_id:
+        return get_connector(integration_type, config)
+
+    version = credentials_version(config.get('credentials'))
+    return get_connector_cache().get(str(integration_id), version,
+                                     lambda: get_connector(integration_type, config))
+
+__all__ = [
+    "BaseConnector",
+    "ConnectorError",
+    "NormalizedProduct",
+    "OrderPage",
+    "ProductPage",
+    "BlingConnector",
+    "MercadoLivreConnector",
+    "ShopifyConnector",
+    "NuvemShopConnector",
+    "CONNECTORS",
+    "ConnectorCache",
+    "credentials_version",
+    "get_connector_cache",
+    "get_connector",
+    "get_cached_connector",
+]
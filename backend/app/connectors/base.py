@@ -0,0 +1,336 @@
+"""Base Connector
+
+Python counterpart of ``src/connectors/base/BaseConnector.ts``. Connectors are
+async and issue every request through the pooled clients in
+``app.infra.http_client``, so a worker keeps its TLS connections warm across
+pages, jobs and accounts that share an API host.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.infra.http_client import get_http_client
+from app.infra.rate_limiter import get_rate_limiter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the fingerprinted fields change; resume checkpoints from other versions are discarded
+FINGERPRINT_VERSION = 1
+
+class ConnectorError(Exception):
+    """Exception raised when a marketplace/ERP API call fails"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, response_body: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_body = response_body
+
+@dataclass
+class NormalizedProduct:
+    """Product normalized to the columns of ``app.domain.models.Product``"""
+    external_id: str
+    sku: str
+    name: str
+    price: float
+    stock_quantity: int = 0
+    description: Optional[str] = None
+    weight: Optional[float] = None
+    images: List[str] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    external_data: Dict[str, Any] = field(default_factory=dict)
+    updated_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert product to dictionary"""
+        return asdict(self)
+
+    def fingerprint(self) -> str:
+        """Stable SHA-256 of the synced content (raw ``external_data`` excluded)
+
+        Two imports of an unchanged supplier product yield the same hash, so the
+        import pipeline can skip rewriting it.
+        """
+        content = {
+            'sku': self.sku,
+            'name': self.name,
+            'price': round(float(self.price or 0), 4),
+            'stock_quantity': int(self.stock_quantity or 0),
+            'description': self.description,
+            'weight': round(float(self.weight), 4) if self.weight is not None else None,
+            'images': list(self.images),
+            'attributes': self.attributes,
+        }
+        canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+@dataclass
+class ProductPage:
+    """One page of raw products and the cursor for the next one"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+# Orders are paged exactly like products
+OrderPage = ProductPage
+
+class BaseConnector(ABC):
+    """Base class implementing the shared connector contract"""
+
+    type: str = ""
+    default_page_size: int = 50
+    max_page_size: int = 100
+    # Whether fetch_products_page filters by ``updated_since`` on the server;
+    # when it can't, incremental inventory filters normalized products locally
+    supports_updated_since: bool = True
+    # Whether a page cursor stays valid long enough to resume an interrupted import from it
+    resumable_cursors: bool = True
+    # Whether fetch_orders_page reads orders from the API; order sync skips connectors without it
+    supports_orders: bool = False
+    # Outbound budget per account, shared by every worker (requests/s and burst)
+    rate_limit: float = 5.0
+    rate_limit_burst: int = 10
+
+    def __init__(self):
+        self.config: Optional[Dict[str, Any]] = None
+        self.credentials: Dict[str, Any] = {}
+        self.base_url: str = ""
+        # (monotonic time, result) of the last test_connection
+        self._connection_checked: Optional[tuple] = None
+
+    # Configuration
+    def configure(self, config: Dict[str, Any]):
+        """Configure connector with integration type and credentials"""
+        self.config = config
+        self.credentials = config.get('credentials') or {}
+        self.validate_config()
+        self.setup_api_client()
+
+    @abstractmethod
+    def setup_api_client(self):
+        """Resolve ``base_url`` and auth settings from the credentials"""
+
+    def validate_config(self):
+        """Validate connector configuration"""
+        if not self.config:
+            raise ValueError("Connector configuration is required")
+        if not self.credentials:
+            raise ValueError("Connector credentials are required")
+
+    def _auth_headers(self) -> Dict[str, str]:
+        """Per-request authentication headers"""
+        return {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client for this connector's API host"""
+        return get_http_client(self.base_url)
+
+    @property
+    def rate_limit_account(self) -> str:
+        """Key of the account whose API quota this connector consumes"""
+        account = (self.config or {}).get('integration_id')
+        if account:
+            return str(account)
+        # Ad-hoc connectors (test_connection, scripts) share the bucket of their token
+        token = self.credentials.get('access_token') or ''
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Issue a request against the connector API
+
+        Every call takes a token from the account's shared rate limit bucket
+        first, and 429 responses are retried after the bucket's back-off.
+        """
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        headers = {**self._auth_headers(), **kwargs.pop('headers', {})}
+        limiter = get_rate_limiter()
+        account = self.rate_limit_account
+        host = httpx.URL(url).host
+
+        for attempt in range(settings.OUTBOUND_RATE_LIMIT_MAX_RETRIES + 1):
+            await limiter.acquire(account, host, self.rate_limit, self.rate_limit_burst)
+            try:
+                response = await self.client.request(method, url, headers=headers, **kwargs)
+            except httpx.HTTPError as e:
+                raise ConnectorError(f"{self.type} request failed: {method} {path}: {e}") from e
+
+            await limiter.observe(account, host, self.rate_limit, response.status_code, response.headers)
+            if response.status_code != 429:
+                break
+            logger.warning(f"{self.type} rate limited on {method} {path} (attempt {attempt + 1})")
+
+        if response.status_code in (401, 403):
+            # Revoked or expired credentials: the next job must check them again
+            self._connection_checked = None
+
+        if response.status_code >= 400:
+            raise ConnectorError(
+                f"{self.type} API error: {method} {path} returned {response.status_code}",
+                status_code=response.status_code,
+                response_body=response.text[:1000]
+            )
+
+        return response
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET a path and decode the JSON body"""
+        response = await self._request('GET', path, params=params)
+        return response.json()
+
+    # Core contract
+    @abstractmethod
+    async def test_connection(self) -> bool:
+        """Check that the credentials can reach the API"""
+
+    async def check_connection(self) -> bool:
+        """``test_connection`` result, reused for ``CONNECTOR_TEST_TTL`` seconds
+
+        Cached connectors serve many jobs of the same integration; only the
+        first job within the TTL pays the remote round trip.
+        """
+        if self._connection_checked:
+            checked_at, result = self._connection_checked
+            if time.monotonic() - checked_at < settings.CONNECTOR_TEST_TTL:
+                return result
+
+        result = await self.test_connection()
+        self._connection_checked = (time.monotonic(), result)
+        return result
+
+    @abstractmethod
+    async def fetch_products_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                  updated_since: Optional[datetime] = None) -> ProductPage:
+        """Fetch one page of raw products starting at ``cursor``, modified after ``updated_since`` if given"""
+
+    @abstractmethod
+    def normalize_product(self, raw_product: Dict[str, Any]) -> List[NormalizedProduct]:
+        """Normalize a raw product into one entry per sellable SKU"""
+
+    @abstractmethod
+    async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and parse a webhook into ``{event, type, external_id}``"""
+
+    def cursor_for_offset(self, offset: int, limit: int) -> Optional[str]:
+        """Cursor that starts at ``offset``, if the API can seek to it directly"""
+        return None
+
+    async def fetch_orders_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                updated_since: Optional[datetime] = None) -> OrderPage:
+        """Fetch one page of raw orders modified after ``updated_since`` (empty unless ``supports_orders``)"""
+        return OrderPage([], None, 0)
+
+    async def iter_product_pages(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                                 updated_since: Optional[datetime] = None) -> AsyncIterator[ProductPage]:
+        """Iterate over product pages until the API runs out of results"""
+        page_size = min(limit or self.default_page_size, self.max_page_size)
+        if not self.supports_updated_since:
+            updated_since = None
+
+        while True:
+            page = await self.fetch_products_page(cursor, page_size, updated_since)
+            yield page
+
+            if not page.next_cursor or not page.items:
+                break
+            cursor = page.next_cursor
+
+    async def iter_order_pages(self, limit: Optional[int] = None,
+                               updated_since: Optional[datetime] = None) -> AsyncIterator[OrderPage]:
+        """Iterate over order pages modified after ``updated_since``"""
+        cursor = None
+
+        while True:
+            page = await self.fetch_orders_page(cursor, limit, updated_since)
+            yield page
+
+            if not page.next_cursor or not page.items:
+                break
+            cursor = page.next_cursor
+
+    async def iter_inventory(self, updated_since: Optional[datetime] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield ``{sku, quantity, price}`` entries one page at a time
+
+        With ``updated_since`` only products modified after it are returned,
+        filtered by the API when it supports it and locally otherwise.
+        """
+        async for page in self.iter_product_pages(self.max_page_size, updated_since=updated_since):
+            inventory = []
+            for raw_product in page.items:
+                for product in self.normalize_product(raw_product):
+                    if updated_since and not self.supports_updated_since \
+                            and not self._modified_since(product.updated_at, updated_since):
+                        continue
+                    inventory.append({
+                        'sku': product.sku,
+                        'quantity': product.stock_quantity,
+                        'price': product.price
+                    })
+            yield inventory
+
+    async def fetch_inventory(self, skus: Optional[List[str]] = None,
+                              updated_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch ``{sku, quantity, price}`` for the given SKUs, or for everything"""
+        wanted = set(skus) if skus else None
+        inventory = []
+
+        async for page in self.iter_inventory(updated_since):
+            inventory.extend(item for item in page if wanted is None or item['sku'] in wanted)
+
+        return inventory
+
+    # Helpers
+    @staticmethod
+    def _webhook_body(payload: Dict[str, Any]) -> bytes:
+        """Raw webhook body as received, falling back to the re-encoded data"""
+        raw_body = payload.get('raw_body')
+        if raw_body is None:
+            raw_body = json.dumps(payload.get('data'))
+        return raw_body.encode() if isinstance(raw_body, str) else raw_body
+
+    @staticmethod
+    def _verify_hmac(body: bytes, signature: str, secret: str, encoding: str = 'hex') -> bool:
+        """Constant-time check of an HMAC-SHA256 webhook signature"""
+        digest = hmac.new(secret.encode(), body, hashlib.sha256).digest()
+        expected = base64.b64encode(digest).decode() if encoding == 'base64' else digest.hex()
+        return hmac.compare_digest(expected, (signature or '').removeprefix('sha256='))
+
+    @staticmethod
+    def _utc(value: datetime) -> datetime:
+        """Treat naive datetimes as UTC"""
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @classmethod
+    def _modified_since(cls, updated_at: Any, since: datetime) -> bool:
+        """Whether an API timestamp is at or after ``since``; unknown timestamps count as modified"""
+        if not updated_at:
+            return True
+        try:
+            return cls._utc(datetime.fromisoformat(str(updated_at))) >= cls._utc(since)
+        except ValueError:
+            return True
+
+    @staticmethod
+    def _to_float(value: Any, default: float = 0.0) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
+    @staticmethod
+    def _to_int(value: Any, default: int = 0) -> int:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return default
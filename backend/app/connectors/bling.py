@@ -0,0 +1,172 @@
+"""Bling Connector
+
+Connector for the Bling ERP API v3 (OAuth bearer tokens).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector, ConnectorError, NormalizedProduct, OrderPage, ProductPage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bling date filters are interpreted in the account's local time
+BLING_TIMEZONE = ZoneInfo('America/Sao_Paulo')
+
+# Bling v2 callback names mapped to v3 webhook events
+LEGACY_EVENTS = {
+    'produto.alterado': 'product.updated',
+    'estoque.alterado': 'stock.updated',
+}
+
+class BlingConnector(BaseConnector):
+    """Bling ERP connector"""
+
+    type = "bling"
+    default_page_size = 100
+    max_page_size = 100
+    # API v3 allows 3 requests/s per account
+    rate_limit = 3.0
+    rate_limit_burst = 3
+    supports_orders = True
+
+    def setup_api_client(self):
+        """Configure Bling API base URL and token"""
+        if not self.credentials.get('access_token'):
+            raise ValueError("Bling credentials require an access_token")
+
+        self.base_url = self.credentials.get('base_url') or settings.BLING_API_V3_URL
+        self.access_token = self.credentials['access_token']
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {
+            'Authorization': f"Bearer {self.access_token}",
+            'Accept': 'application/json'
+        }
+
+    async def test_connection(self) -> bool:
+        """Test connection by listing a single product"""
+        try:
+            await self._get_json('/produtos', {'pagina': 1, 'limite': 1})
+            return True
+        except ConnectorError as e:
+            logger.error(f"Bling connection test failed: {e}")
+            return False
+
+    def cursor_for_offset(self, offset: int, limit: int) -> Optional[str]:
+        if offset % limit:
+            return None
+        return str(offset // limit + 1)
+
+    def _date_filter(self, updated_since: Optional[datetime]) -> Dict[str, str]:
+        """``dataAlteracaoInicial`` filter in Bling's local time"""
+        if not updated_since:
+            return {}
+        local = self._utc(updated_since).astimezone(BLING_TIMEZONE)
+        return {'dataAlteracaoInicial': local.strftime('%Y-%m-%d %H:%M:%S')}
+
+    async def _fetch_page(self, path: str, cursor: Optional[str], limit: Optional[int],
+                          updated_since: Optional[datetime]) -> ProductPage:
+        """Fetch a numbered page from a Bling listing endpoint"""
+        page = int(cursor or 1)
+        limit = min(limit or self.default_page_size, self.max_page_size)
+
+        data = await self._get_json(path, {'pagina': page, 'limite': limit, **self._date_filter(updated_since)})
+        items = data.get('data', []) or []
+
+        return ProductPage(
+            items=items,
+            next_cursor=str(page + 1) if len(items) >= limit else None
+        )
+
+    async def fetch_products_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                  updated_since: Optional[datetime] = None) -> ProductPage:
+        """Fetch a page of products (cursor is the page number)"""
+        return await self._fetch_page('/produtos', cursor, limit, updated_since)
+
+    async def fetch_orders_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                updated_since: Optional[datetime] = None) -> OrderPage:
+        """Fetch a page of sales orders (cursor is the page number)"""
+        return await self._fetch_page('/pedidos/vendas', cursor, limit, updated_since)
+
+    def normalize_product(self, raw_product: Dict[str, Any]) -> List[NormalizedProduct]:
+        """Normalize a Bling product (variations are separate products in v3)"""
+        external_id = str(raw_product['id'])
+        stock = raw_product.get('estoque') or {}
+        images = [raw_product['imagemURL']] if raw_product.get('imagemURL') else []
+
+        return [NormalizedProduct(
+            external_id=external_id,
+            sku=raw_product.get('codigo') or external_id,
+            name=raw_product.get('nome') or '',
+            price=self._to_float(raw_product.get('preco')),
+            stock_quantity=self._to_int(stock.get('saldoVirtualTotal')),
+            description=raw_product.get('descricaoCurta'),
+            weight=raw_product.get('pesoBruto'),
+            images=images,
+            attributes={
+                'situacao': raw_product.get('situacao'),
+                'tipo': raw_product.get('tipo'),
+                'formato': raw_product.get('formato'),
+                'id_produto_pai': raw_product.get('idProdutoPai'),
+            },
+            external_data=raw_product
+        )]
+
+    async def fetch_inventory(self, skus: Optional[List[str]] = None,
+                              updated_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch inventory, filtering by SKU codes on the server when given"""
+        if not skus:
+            return await super().fetch_inventory(updated_since=updated_since)
+
+        inventory = []
+        for start in range(0, len(skus), self.max_page_size):
+            chunk = skus[start:start + self.max_page_size]
+            data = await self._get_json('/produtos', {
+                'codigos[]': chunk,
+                'limite': self.max_page_size,
+                **self._date_filter(updated_since)
+            })
+
+            for raw_product in data.get('data', []) or []:
+                for product in self.normalize_product(raw_product):
+                    inventory.append({
+                        'sku': product.sku,
+                        'quantity': product.stock_quantity,
+                        'price': product.price
+                    })
+
+        return inventory
+
+    async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and parse a Bling webhook"""
+        secret = self.credentials.get('client_secret')
+        if secret and payload.get('headers'):
+            signature = payload['headers'].get('x-bling-signature-256', '')
+            if not self._verify_hmac(self._webhook_body(payload), signature, secret):
+                raise ConnectorError("Invalid Bling webhook signature", status_code=401)
+
+        event = payload.get('event', '')
+        event = LEGACY_EVENTS.get(event, event)
+        data = payload.get('data') or {}
+
+        if event.startswith('product.'):
+            event_type = 'product'
+        elif event.startswith('stock.'):
+            event_type = 'inventory'
+            data = data.get('produto', data)
+        elif event.startswith('order.'):
+            event_type = 'order'
+        else:
+            logger.warning(f"Unhandled Bling webhook event: {event}")
+            event_type = 'unknown'
+
+        return {
+            'event': event,
+            'type': event_type,
+            'external_id': str(data['id']) if data.get('id') is not None else None
+        }
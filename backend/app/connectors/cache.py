@@ -0,0 +1,69 @@
+"""Connector Cache
+
+Configured connectors kept per worker process, so consecutive jobs of the
+same integration reuse the instance (its resolved base URL, seller id and
+recent ``test_connection`` result) instead of building and re-checking a
+new one. Entries are keyed by integration id and a hash of the credentials:
+a token refresh or reconnect yields a new version, which replaces the old
+instance on the next lookup. Integrations are disconnected or deleted outside
+the workers, so their entries are never looked up again and age out as the
+least recently used integrations are evicted past ``CONNECTOR_CACHE_SIZE``.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from .base import BaseConnector
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def credentials_version(credentials: Dict[str, Any]) -> str:
+    """Stable hash of an integration's credentials"""
+    canonical = json.dumps(credentials or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+class ConnectorCache:
+    """LRU of configured connectors by integration id and credential version"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.CONNECTOR_CACHE_SIZE
+        # integration id -> (credential version, connector)
+        self._entries: "OrderedDict[str, Tuple[str, BaseConnector]]" = OrderedDict()
+        # Task threads of the async worker look connectors up concurrently
+        self._lock = threading.Lock()
+
+    def get(self, integration_id: str, version: str, create: Callable[[], BaseConnector]) -> BaseConnector:
+        """Return the cached connector, creating it when missing or its credentials changed"""
+        with self._lock:
+            entry = self._entries.get(integration_id)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(integration_id)
+                return entry[1]
+
+        connector = create()
+
+        with self._lock:
+            self._entries[integration_id] = (version, connector)
+            self._entries.move_to_end(integration_id)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"Evicted connector for integration {evicted}")
+        return connector
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_connector_cache: Optional[ConnectorCache] = None
+
+def get_connector_cache() -> ConnectorCache:
+    """Get the process-wide connector cache"""
+    global _connector_cache
+    if _connector_cache is None:
+        _connector_cache = ConnectorCache()
+    return _connector_cache
@@ -0,0 +1,227 @@
+"""Mercado Livre Connector
+
+Connector for the Mercado Livre API. Listings are paged with the ``scan``
+search (scroll ids, no 1000-offset cap) and hydrated with the ``/items``
+multiget, 20 ids per call, fetched concurrently over the pooled client.
+Categories come from the local category tree cache and only reach the API
+on a miss or to revalidate an expired entry.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector, ConnectorError, NormalizedProduct, OrderPage, ProductPage
+from app.infra.ml_categories import FetchResult, get_category_cache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MULTIGET_MAX_IDS = 20
+ORDERS_MAX_PAGE_SIZE = 50
+
+class MercadoLivreConnector(BaseConnector):
+    """Mercado Livre marketplace connector"""
+
+    type = "mercadolivre"
+    default_page_size = 100
+    max_page_size = 100
+    rate_limit = 10.0
+    rate_limit_burst = 20
+    # The scan search has no modification filter; last_updated is checked locally
+    supports_updated_since = False
+    # Scroll ids expire after a few minutes
+    resumable_cursors = False
+    supports_orders = True
+
+    def setup_api_client(self):
+        """Configure Mercado Livre API base URL and token"""
+        if not self.credentials.get('access_token'):
+            raise ValueError("Mercado Livre credentials require an access_token")
+
+        self.base_url = settings.MERCADOLIVRE_API_URL
+        self.access_token = self.credentials['access_token']
+        self.seller_id = self.credentials.get('user_id') or self.credentials.get('seller_id')
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {'Authorization': f"Bearer {self.access_token}"}
+
+    async def _get_seller_id(self) -> str:
+        """Resolve the seller id from the token when not stored in the credentials"""
+        if not self.seller_id:
+            me = await self._get_json('/users/me')
+            self.seller_id = str(me['id'])
+        return self.seller_id
+
+    async def test_connection(self) -> bool:
+        """Test connection by fetching the authenticated user"""
+        try:
+            me = await self._get_json('/users/me')
+            self.seller_id = self.seller_id or str(me['id'])
+            return True
+        except ConnectorError as e:
+            logger.error(f"Mercado Livre connection test failed: {e}")
+            return False
+
+    async def fetch_items(self, item_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch full items through the multiget endpoint"""
+        chunks = [item_ids[i:i + MULTIGET_MAX_IDS] for i in range(0, len(item_ids), MULTIGET_MAX_IDS)]
+        responses = await asyncio.gather(*[
+            self._get_json('/items', {'ids': ','.join(chunk)}) for chunk in chunks
+        ])
+
+        items = []
+        for response in responses:
+            for entry in response:
+                if entry.get('code') == 200 and entry.get('body'):
+                    items.append(entry['body'])
+                else:
+                    logger.warning(f"Mercado Livre multiget entry failed: {entry.get('code')}")
+        return items
+
+    async def fetch_products_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                  updated_since: Optional[datetime] = None) -> ProductPage:
+        """Fetch a page of listings (cursor is the scan scroll id)"""
+        seller_id = await self._get_seller_id()
+        params = {
+            'search_type': 'scan',
+            'limit': min(limit or self.default_page_size, self.max_page_size)
+        }
+        if cursor:
+            params['scroll_id'] = cursor
+
+        data = await self._get_json(f"/users/{seller_id}/items/search", params)
+        item_ids = data.get('results', []) or []
+        items = await self.fetch_items(item_ids) if item_ids else []
+
+        return ProductPage(
+            items=items,
+            next_cursor=data.get('scroll_id') if item_ids else None,
+            total=(data.get('paging') or {}).get('total')
+        )
+
+    async def fetch_orders_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                updated_since: Optional[datetime] = None) -> OrderPage:
+        """Fetch a page of seller orders (cursor is the search offset)"""
+        seller_id = await self._get_seller_id()
+        offset = int(cursor or 0)
+        limit = min(limit or ORDERS_MAX_PAGE_SIZE, ORDERS_MAX_PAGE_SIZE)
+        params = {'seller': seller_id, 'sort': 'date_asc', 'offset': offset, 'limit': limit}
+        if updated_since:
+            params['order.date_last_updated.from'] = self._utc(updated_since).strftime('%Y-%m-%dT%H:%M:%S.000-00:00')
+
+        data = await self._get_json('/orders/search', params)
+        items = data.get('results', []) or []
+        total = (data.get('paging') or {}).get('total')
+
+        return OrderPage(
+            items=items,
+            next_cursor=str(offset + len(items)) if items and (total is None or offset + len(items) < total) else None,
+            total=total
+        )
+
+    def normalize_product(self, raw_product: Dict[str, Any]) -> List[NormalizedProduct]:
+        """Normalize a Mercado Livre item into a single product"""
+        external_id = str(raw_product['id'])
+        attributes = {
+            attr['id']: attr.get('value_name')
+            for attr in raw_product.get('attributes', []) or []
+            if attr.get('id')
+        }
+        sku = raw_product.get('seller_custom_field') or attributes.get('SELLER_SKU') or external_id
+
+        return [NormalizedProduct(
+            external_id=external_id,
+            sku=sku,
+            name=raw_product.get('title') or '',
+            price=self._to_float(raw_product.get('price')),
+            stock_quantity=self._to_int(raw_product.get('available_quantity')),
+            images=[
+                picture.get('secure_url') or picture.get('url')
+                for picture in raw_product.get('pictures', []) or []
+                if picture.get('secure_url') or picture.get('url')
+            ],
+            attributes={
+                **attributes,
+                'category_id': raw_product.get('category_id'),
+                'status': raw_product.get('status'),
+            },
+            external_data=raw_product,
+            updated_at=raw_product.get('last_updated')
+        )]
+
+    async def fetch_inventory(self, skus: Optional[List[str]] = None,
+                              updated_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch inventory, looking listings up by seller SKU when given"""
+        if not skus:
+            return await super().fetch_inventory(updated_since=updated_since)
+
+        seller_id = await self._get_seller_id()
+        searches = await asyncio.gather(*[
+            self._get_json(f"/users/{seller_id}/items/search", {'seller_sku': sku})
+            for sku in skus
+        ])
+        item_ids = [item_id for search in searches for item_id in search.get('results', []) or []]
+
+        inventory = []
+        for raw_product in await self.fetch_items(item_ids) if item_ids else []:
+            for product in self.normalize_product(raw_product):
+                inventory.append({
+                    'sku': product.sku,
+                    'quantity': product.stock_quantity,
+                    'price': product.price
+                })
+        return inventory
+
+    async def _fetch_category(self, category_id: str, etag: Optional[str] = None) -> FetchResult:
+        """Download one category, conditionally when its ETag is known"""
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = await self._request('GET', f"/categories/{category_id}", headers=headers)
+        except ConnectorError as e:
+            if e.status_code == 404:
+                return 404, None, None
+            raise
+        if response.status_code == 304:
+            return 304, None, etag
+        return response.status_code, response.json(), response.headers.get('ETag')
+
+    async def get_category(self, category_id: str) -> Optional[Dict[str, Any]]:
+        """Category ``{id, name, path, path_str}`` from the local category tree cache"""
+        return await get_category_cache().aresolve(category_id, self._fetch_category)
+
+    async def prefetch_categories(self, site_id: str = 'MLB') -> int:
+        """Load a site's whole category tree into the local cache"""
+        response = await self._request('GET', f"/sites/{site_id}/categories/all")
+        body = response.content
+        # The dump is served as a gzip file rather than with a gzip Content-Encoding
+        if body[:2] == b'\x1f\x8b':
+            body = gzip.decompress(body)
+        return get_category_cache().prefetch(json.loads(body))
+
+    async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse a Mercado Livre notification (``{resource, topic, user_id}``)"""
+        data = payload.get('data') or payload
+        topic = data.get('topic') or payload.get('event', '')
+        # /items/MLB123, /orders/123, /user-products/MLBU123/stock
+        parts = (data.get('resource') or '').strip('/').split('/')
+
+        if topic in ('items', 'items_prices'):
+            event_type = 'product'
+        elif topic == 'stock-locations':
+            event_type = 'inventory'
+        elif topic in ('orders', 'orders_v2'):
+            event_type = 'order'
+        else:
+            logger.warning(f"Unhandled Mercado Livre notification topic: {topic}")
+            event_type = 'unknown'
+
+        return {
+            'event': topic,
+            'type': event_type,
+            'external_id': parts[1] if len(parts) > 1 else None
+        }
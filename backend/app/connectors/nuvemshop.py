@@ -0,0 +1,149 @@
+"""Nuvemshop Connector
+
+Connector for the Nuvemshop (Tiendanube) API.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector, ConnectorError, NormalizedProduct, OrderPage, ProductPage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _localized(value: Any, language: str = 'pt') -> str:
+    """Pick a language from Nuvemshop's localized ``{"pt": ..., "es": ...}`` fields"""
+    if isinstance(value, dict):
+        return value.get(language) or next(iter(value.values()), '') or ''
+    return value or ''
+
+class NuvemShopConnector(BaseConnector):
+    """Nuvemshop store connector"""
+
+    type = "nuvemshop"
+    default_page_size = 200
+    max_page_size = 200
+    rate_limit = 2.0
+    rate_limit_burst = 40
+    supports_orders = True
+
+    def setup_api_client(self):
+        """Configure Nuvemshop store URL and access token"""
+        store_id = self.credentials.get('store_id')
+        if not store_id or not self.credentials.get('access_token'):
+            raise ValueError("Nuvemshop credentials require store_id and access_token")
+
+        self.base_url = f"{settings.NUVEMSHOP_API_URL}/{store_id}"
+        self.access_token = self.credentials['access_token']
+        self.webhook_secret = self.credentials.get('webhook_secret') or ''
+        self.language = self.credentials.get('language', 'pt')
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {'Authentication': f"bearer {self.access_token}"}
+
+    async def test_connection(self) -> bool:
+        """Test connection by fetching store information"""
+        try:
+            data = await self._get_json('/store')
+            return bool(data.get('id'))
+        except ConnectorError as e:
+            logger.error(f"Nuvemshop connection test failed: {e}")
+            return False
+
+    def cursor_for_offset(self, offset: int, limit: int) -> Optional[str]:
+        if offset % limit:
+            return None
+        return str(offset // limit + 1)
+
+    async def _fetch_page(self, path: str, cursor: Optional[str], limit: Optional[int],
+                          updated_since: Optional[datetime]) -> ProductPage:
+        """Fetch a numbered page from a Nuvemshop listing endpoint"""
+        page = int(cursor or 1)
+        limit = min(limit or self.default_page_size, self.max_page_size)
+        params: Dict[str, Any] = {'page': page, 'per_page': limit}
+        if updated_since:
+            params['updated_at_min'] = self._utc(updated_since).isoformat()
+
+        try:
+            items = await self._get_json(path, params)
+        except ConnectorError as e:
+            # Nuvemshop answers 404 for pages past the last one
+            if e.status_code == 404 and page > 1:
+                return ProductPage(items=[])
+            raise
+
+        return ProductPage(
+            items=items or [],
+            next_cursor=str(page + 1) if len(items or []) >= limit else None
+        )
+
+    async def fetch_products_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                  updated_since: Optional[datetime] = None) -> ProductPage:
+        """Fetch a page of products (cursor is the page number)"""
+        return await self._fetch_page('/products', cursor, limit, updated_since)
+
+    async def fetch_orders_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                updated_since: Optional[datetime] = None) -> OrderPage:
+        """Fetch a page of orders (cursor is the page number)"""
+        return await self._fetch_page('/orders', cursor, limit, updated_since)
+
+    def normalize_product(self, raw_product: Dict[str, Any]) -> List[NormalizedProduct]:
+        """Normalize a Nuvemshop product into one entry per variant"""
+        product_id = str(raw_product['id'])
+        name = _localized(raw_product.get('name'), self.language)
+        images = [image['src'] for image in raw_product.get('images', []) or [] if image.get('src')]
+
+        products = []
+        for variant in raw_product.get('variants', []) or []:
+            variant_id = str(variant['id'])
+            values = [_localized(value, self.language) for value in variant.get('values', []) or []]
+
+            products.append(NormalizedProduct(
+                external_id=f"{product_id}:{variant_id}",
+                sku=variant.get('sku') or f"{product_id}-{variant_id}",
+                name=f"{name} - {' / '.join(values)}" if values else name,
+                price=self._to_float(variant.get('promotional_price') or variant.get('price')),
+                stock_quantity=self._to_int(variant.get('stock')),
+                description=_localized(raw_product.get('description'), self.language) or None,
+                weight=self._to_float(variant.get('weight')) if variant.get('weight') else None,
+                images=images,
+                attributes={
+                    'brand': raw_product.get('brand'),
+                    'tags': raw_product.get('tags'),
+                    'barcode': variant.get('barcode'),
+                    'values': values,
+                },
+                external_data={'product_id': product_id, 'variant': variant},
+                updated_at=variant.get('updated_at') or raw_product.get('updated_at')
+            ))
+
+        return products
+
+    async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and parse a Nuvemshop webhook"""
+        if self.webhook_secret and payload.get('headers'):
+            headers = payload['headers']
+            signature = headers.get('x-linkedstore-hmac-sha256') or headers.get('x-nuvemshop-hmac-sha256', '')
+            if not self._verify_hmac(self._webhook_body(payload), signature, self.webhook_secret):
+                raise ConnectorError("Invalid Nuvemshop webhook signature", status_code=401)
+
+        data = payload.get('data') or {}
+        event = payload.get('event') or data.get('event', '')
+
+        if event == 'product/stock_updated':
+            event_type = 'inventory'
+        elif event.startswith('product/'):
+            event_type = 'product'
+        elif event.startswith('order/'):
+            event_type = 'order'
+        else:
+            logger.warning(f"Unhandled Nuvemshop webhook event: {event}")
+            event_type = 'unknown'
+
+        return {
+            'event': event,
+            'type': event_type,
+            'external_id': str(data['id']) if data.get('id') is not None else None
+        }
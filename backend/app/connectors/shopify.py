@@ -0,0 +1,146 @@
+"""Shopify Connector
+
+Connector for the Shopify Admin REST API with cursor (``page_info``) pagination.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector, ConnectorError, NormalizedProduct, OrderPage, ProductPage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PRODUCT_FIELDS = 'id,title,body_html,vendor,product_type,tags,variants,images,updated_at'
+
+class ShopifyConnector(BaseConnector):
+    """Shopify store connector"""
+
+    type = "shopify"
+    default_page_size = 250
+    max_page_size = 250
+    # REST API leaky bucket: 40 requests, refilled at 2/s per store
+    rate_limit = 2.0
+    rate_limit_burst = 40
+    supports_orders = True
+
+    def setup_api_client(self):
+        """Configure Shopify shop URL and access token"""
+        shop_domain = self.credentials.get('shop_domain')
+        if not shop_domain or not self.credentials.get('access_token'):
+            raise ValueError("Shopify credentials require shop_domain and access_token")
+
+        if not shop_domain.endswith('.myshopify.com'):
+            shop_domain = f"{shop_domain}.myshopify.com"
+
+        self.base_url = f"https://{shop_domain}/admin/api/{settings.SHOPIFY_API_VERSION}"
+        self.access_token = self.credentials['access_token']
+        self.webhook_secret = self.credentials.get('webhook_secret') or ''
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {'X-Shopify-Access-Token': self.access_token}
+
+    async def test_connection(self) -> bool:
+        """Test connection by fetching shop information"""
+        try:
+            data = await self._get_json('/shop.json')
+            return bool(data.get('shop'))
+        except ConnectorError as e:
+            logger.error(f"Shopify connection test failed: {e}")
+            return False
+
+    async def _fetch_page(self, resource: str, cursor: Optional[str], limit: Optional[int],
+                          filters: Dict[str, Any]) -> ProductPage:
+        """Fetch a ``page_info`` page of a Shopify listing endpoint"""
+        params: Dict[str, Any] = {'limit': min(limit or self.default_page_size, self.max_page_size)}
+        if cursor:
+            # Shopify rejects filters/fields alongside page_info; the cursor carries them
+            params['page_info'] = cursor
+        else:
+            params.update(filters)
+
+        response = await self._request('GET', f"/{resource}.json", params=params)
+        next_link = response.links.get('next', {}).get('url')
+        next_cursor = parse_qs(urlsplit(next_link).query).get('page_info', [None])[0] if next_link else None
+
+        return ProductPage(items=response.json().get(resource, []) or [], next_cursor=next_cursor)
+
+    async def fetch_products_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                  updated_since: Optional[datetime] = None) -> ProductPage:
+        """Fetch a page of products (cursor is Shopify's ``page_info``)"""
+        filters: Dict[str, Any] = {'fields': PRODUCT_FIELDS}
+        if updated_since:
+            filters['updated_at_min'] = self._utc(updated_since).isoformat()
+        return await self._fetch_page('products', cursor, limit, filters)
+
+    async def fetch_orders_page(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                                updated_since: Optional[datetime] = None) -> OrderPage:
+        """Fetch a page of orders in any status (cursor is Shopify's ``page_info``)"""
+        filters: Dict[str, Any] = {'status': 'any'}
+        if updated_since:
+            filters['updated_at_min'] = self._utc(updated_since).isoformat()
+        return await self._fetch_page('orders', cursor, limit, filters)
+
+    def normalize_product(self, raw_product: Dict[str, Any]) -> List[NormalizedProduct]:
+        """Normalize a Shopify product into one entry per variant"""
+        product_id = str(raw_product['id'])
+        images = [image['src'] for image in raw_product.get('images', []) or [] if image.get('src')]
+        tags = raw_product.get('tags') or ''
+
+        products = []
+        for variant in raw_product.get('variants', []) or []:
+            variant_id = str(variant['id'])
+            title = raw_product.get('title') or ''
+            if variant.get('title') and variant['title'] != 'Default Title':
+                title = f"{title} - {variant['title']}"
+
+            products.append(NormalizedProduct(
+                external_id=f"{product_id}:{variant_id}",
+                sku=variant.get('sku') or f"{product_id}-{variant_id}",
+                name=title,
+                price=self._to_float(variant.get('price')),
+                stock_quantity=self._to_int(variant.get('inventory_quantity')),
+                description=raw_product.get('body_html'),
+                weight=variant.get('grams'),
+                images=images,
+                attributes={
+                    'vendor': raw_product.get('vendor'),
+                    'product_type': raw_product.get('product_type'),
+                    'tags': [tag.strip() for tag in tags.split(',') if tag.strip()],
+                    'barcode': variant.get('barcode'),
+                    'options': [variant.get(f"option{i}") for i in (1, 2, 3) if variant.get(f"option{i}")],
+                },
+                external_data={'product_id': product_id, 'variant': variant},
+                updated_at=variant.get('updated_at') or raw_product.get('updated_at')
+            ))
+
+        return products
+
+    async def handle_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and parse a Shopify webhook"""
+        if self.webhook_secret and payload.get('headers'):
+            signature = payload['headers'].get('x-shopify-hmac-sha256', '')
+            if not self._verify_hmac(self._webhook_body(payload), signature, self.webhook_secret, 'base64'):
+                raise ConnectorError("Invalid Shopify webhook signature", status_code=401)
+
+        event = payload.get('event', '')
+        data = payload.get('data') or {}
+
+        if event.startswith('products/'):
+            event_type, external_id = 'product', data.get('id')
+        elif event.startswith('inventory_levels/'):
+            event_type, external_id = 'inventory', data.get('inventory_item_id')
+        elif event.startswith('orders/'):
+            event_type, external_id = 'order', data.get('id')
+        else:
+            logger.warning(f"Unhandled Shopify webhook event: {event}")
+            event_type, external_id = 'unknown', data.get('id')
+
+        return {
+            'event': event,
+            'type': event_type,
+            'external_id': str(external_id) if external_id is not None else None
+        }
@@ -5,6 +5,7 @@ Celery configuration for background task processing.
 
 import os
 from celery import Celery
+from celery.schedules import crontab
 from kombu import Queue
 from app.core.config import settings
 
@@ -18,6 +19,61 @@ celery_app = Celery(
     ]
 )
 
+# Priority queues
+# The Redis transport emulates message priorities with one list per step and
+# serves lower numbers first, so URGENT is the smallest step.
+SYNC_PRIORITY_STEPS = {
+    "urgent": 0,
+    "high": 3,
+    "normal": 6,
+    "low": 9,
+}
+
+# URGENT/HIGH sync jobs skip the per-type queues, whose backlog can be
+# thousands of scheduled jobs, for queues with reserved workers (see worker.py)
+PRIORITY_QUEUES = {
+    SYNC_PRIORITY_STEPS["urgent"]: "urgent",
+    SYNC_PRIORITY_STEPS["high"]: "high_priority",
+}
+
+SYNC_TASKS = {
+    "app.services.sync_tasks.sync_products",
+    "app.services.sync_tasks.sync_products_chunk",
+    "app.services.sync_tasks.finalize_product_chunks",
+    "app.services.sync_tasks.sync_inventory",
+    "app.services.sync_tasks.sync_orders",
+}
+
+TASK_QUEUES = {
+    "app.services.sync_tasks.sync_products": "sync_products",
+    "app.services.sync_tasks.sync_products_chunk": "sync_products",
+    "app.services.sync_tasks.finalize_product_chunks": "sync_products",
+    "app.services.sync_tasks.sync_inventory": "sync_inventory",
+    "app.services.sync_tasks.sync_orders": "sync_orders",
+    "app.services.sync_tasks.sync_all_integrations": "sync_bulk",
+    "app.services.sync_tasks.dispatch_scheduled_syncs": "sync_bulk",
+    "app.services.sync_tasks.cleanup_old_sync_jobs": "maintenance",
+    "app.services.sync_tasks.pump_sync_queues": "default",
+}
+
+def sync_priority_step(priority: str) -> int:
+    """Celery message priority for a ``SyncPriority`` value"""
+    return SYNC_PRIORITY_STEPS.get(priority, SYNC_PRIORITY_STEPS["normal"])
+
+def route_task(name, args, kwargs, options, task=None, **kwds):
+    """Route sync tasks by message priority, everything else by task name
+
+    Explicit ``queue`` options still win, and retries keep the queue they
+    were delivered from.
+    """
+    if name in SYNC_TASKS:
+        queue = PRIORITY_QUEUES.get(options.get("priority"))
+        if queue:
+            return {"queue": queue}
+
+    queue = TASK_QUEUES.get(name)
+    return {"queue": queue} if queue else None
+
 # Celery configuration
 celery_app.conf.update(
     # Task settings
@@ -26,14 +82,14 @@ celery_app.conf.update(
     result_serializer=settings.CELERY_RESULT_SERIALIZER,
     timezone=settings.CELERY_TIMEZONE,
     enable_utc=settings.CELERY_ENABLE_UTC,
+    task_track_started=True,
     
     # Task routing
-    task_routes={
-        "app.services.sync_tasks.sync_products": {"queue": "sync_products"},
-        "app.services.sync_tasks.sync_inventory": {"queue": "sync_inventory"},
-        "app.services.sync_tasks.sync_orders": {"queue": "sync_orders"},
-        "app.services.sync_tasks.sync_all_integrations": {"queue": "sync_bulk"},
-        "app.services.sync_tasks.cleanup_old_sync_jobs": {"queue": "maintenance"},
+    task_routes=(route_task,),
+    task_default_priority=SYNC_PRIORITY_STEPS["normal"],
+    broker_transport_options={
+        "priority_steps": sorted(SYNC_PRIORITY_STEPS.values()),
+        "sep": ":",
     },
     
     # Queue configuration
@@ -70,35 +126,21 @@ celery_app.conf.update(
     
     # Beat schedule for periodic tasks
     beat_schedule={
+        "dispatch-scheduled-syncs": {
+            "task": "app.services.sync_tasks.dispatch_scheduled_syncs",
+            "schedule": float(settings.SYNC_SCHEDULER_TICK),  # Adaptive per-integration schedule
+        },
+        "pump-sync-queues": {
+            "task": "app.services.sync_tasks.pump_sync_queues",
+            "schedule": float(settings.SYNC_FAIR_PUMP_INTERVAL),  # Fallback for the fair queue dispatcher
+        },
         "cleanup-old-sync-jobs": {
             "task": "app.services.sync_tasks.cleanup_old_sync_jobs",
-            "schedule": 3600.0,  # Every hour
-            "options": {"queue": "maintenance"}
-        },
-        "sync-all-integrations-daily": {
-            "task": "app.services.sync_tasks.sync_all_integrations",
-            "schedule": 86400.0,  # Every 24 hours
-            "options": {"queue": "sync_bulk"}
+            "schedule": crontab(hour=2, minute=0),  # Daily cleanup
         },
     },
-    beat_scheduler="django_celery_beat.schedulers:DatabaseScheduler",
 )
 
-# Priority routing
-def route_task(name, args, kwargs, options, task=None, **kwds):
-    """Custom task routing based on priority"""
-    priority = kwargs.get('priority', 'normal')
-    
-    if priority == 'urgent':
-        return {'queue': 'urgent'}
-    elif priority == 'high':
-        return {'queue': 'high_priority'}
-    
-    # Default routing
-    return None
-
-celery_app.conf.task_routes = (route_task,)
-
 # Error handling
 @celery_app.task(bind=True)
 def debug_task(self):
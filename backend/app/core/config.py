@@ -3,7 +3,7 @@ Configuration settings for ML-Bling Sync API
 """
 
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -70,10 +70,37 @@ class Settings(BaseSettings):
     
     BLING_API_KEY: str = ""
     BLING_BASE_URL: str = "https://bling.com.br/Api/v2"
+    BLING_API_V3_URL: str = "https://www.bling.com.br/Api/v3"
+    MERCADOLIVRE_API_URL: str = "https://api.mercadolibre.com"
+    SHOPIFY_API_VERSION: str = "2023-10"
+    NUVEMSHOP_API_URL: str = "https://api.nuvemshop.com.br/v1"
+    
+    # Mercado Livre category tree cache (SQLite file shared with scripts/)
+    ML_CATEGORY_CACHE_PATH: Optional[str] = None  # defaults to ~/.cache/ml-bling-sync/ml_categories.sqlite3
+    ML_CATEGORY_CACHE_TTL: int = 7 * 86400  # revalidate with the ETag after a week
+    
+    # Outbound HTTP client pools (one keep-alive pool per API host)
+    HTTP_POOL_MAX_CONNECTIONS: int = 100
+    HTTP_POOL_MAX_KEEPALIVE: int = 20
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 60.0  # seconds
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    
+    # Connector instances cached per worker process
+    CONNECTOR_CACHE_SIZE: int = 256  # integrations kept configured, least recently used evicted
+    CONNECTOR_TEST_TTL: int = 60  # seconds a test_connection result is reused
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     RATE_LIMIT_PER_HOUR: int = 1000
+
+    # Outbound rate limiting (Redis token bucket per marketplace account and API host)
+    OUTBOUND_RATE_LIMIT_ENABLED: bool = True
+    OUTBOUND_RATE_LIMIT_MAX_RETRIES: int = 3  # retries of a request answered with 429
+    OUTBOUND_RATE_LIMIT_DEFAULT_BACKOFF: float = 2.0  # seconds blocked after a 429 without Retry-After
+    OUTBOUND_RATE_LIMIT_MIN_RATE: float = 0.1  # floor for the rate halved on 429s (requests/s)
+    OUTBOUND_RATE_LIMIT_TTL: int = 3600  # idle bucket lifetime
+    OUTBOUND_RATE_LIMIT_FAIL_OPEN_SECONDS: int = 30  # skip limiting this long when Redis is down
     
     # File Upload
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -91,12 +118,43 @@ class Settings(BaseSettings):
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = 30
     WS_MAX_CONNECTIONS: int = 1000
+    SYNC_EVENTS_FLUSH_INTERVAL: float = 0.5  # worker-side batching of sync events
+    SYNC_EVENTS_MAX_BATCH: int = 100
     
     # Sync Settings
     SYNC_BATCH_SIZE: int = 100
     SYNC_TIMEOUT: int = 300  # 5 minutes
     SYNC_RETRY_ATTEMPTS: int = 3
     SYNC_RETRY_DELAY: int = 60  # 1 minute
+    SYNC_MAX_ERRORS: int = 50  # error messages kept per job result
+    SYNC_UPSERT_BATCH_SIZE: int = 1000  # products per INSERT ... ON CONFLICT statement
+    SYNC_WATERMARK_OVERLAP: int = 300  # seconds re-read before the watermark (clock skew)
+    SYNC_RECONCILE_INTERVAL: int = 86400  # full inventory/order scan once a day
+    SYNC_PROGRESS_FLUSH_INTERVAL: int = 10  # seconds between SyncJob progress writes
+    SYNC_PROGRESS_TTL: int = 86400  # lifetime of the Redis progress hash
+    SYNC_QUEUED_SLOT_TTL: int = 3600  # how long a queued job absorbs identical requests
+    SYNC_LEASE_TTL: int = 300  # single-flight lease per integration and sync type, renewed while running
+    SYNC_LEASE_RETRY_DELAY: int = 30  # seconds before a job blocked by a running one is retried
+    SYNC_CHUNK_PAGES: int = 20  # supplier pages per chunk of a parallel product sync
+    SYNC_MAX_CHUNKS: int = 32
+    SYNC_CHUNK_LEASE_TTL: int = 1800  # lease kept for a split job until its chunks report back
+    SYNC_MAX_CONTINUATIONS: int = 5  # reruns from the checkpoint after a soft time limit
+    
+    # Adaptive sync scheduling (per-integration next run from the observed change rate)
+    SYNC_SCHEDULER_TICK: int = 60  # seconds between scheduler beat runs
+    SYNC_SCHEDULE_BASE_INTERVAL: int = 1800  # interval until a change rate is known
+    SYNC_SCHEDULE_MIN_INTERVAL: int = 300
+    SYNC_SCHEDULE_MAX_INTERVAL: int = 21600
+    SYNC_SCHEDULE_TARGET_CHANGES: int = 100  # product changes a run should pick up
+    SYNC_SCHEDULE_JITTER: float = 0.2  # +/- fraction applied to every interval
+    SYNC_SCHEDULE_RATE_SMOOTHING: float = 0.3  # weight of the latest run in the change rate
+    
+    # Fair queuing of NORMAL/LOW sync jobs across tenants (weights from the plan)
+    SYNC_FAIR_QUEUES_ENABLED: bool = True
+    SYNC_FAIR_QUEUE_DEPTH: int = 8  # jobs released to each Celery queue ahead of the workers
+    SYNC_FAIR_PUMP_INTERVAL: int = 10  # seconds between fallback dispatcher runs
+    SYNC_FAIR_LOCK_TTL_MS: int = 5000
+    SYNC_FAIR_PLAN_WEIGHTS: Dict[str, float] = {"starter": 1.0, "professional": 3.0, "enterprise": 10.0}
     
     # Cache
     CACHE_TTL: int = 3600  # 1 hour
@@ -114,12 +172,15 @@ class Settings(BaseSettings):
     CELERY_ACCEPT_CONTENT: List[str] = ["json"]
     CELERY_TIMEZONE: str = "America/Sao_Paulo"
     CELERY_ENABLE_UTC: bool = True
-    CELERY_TASK_SOFT_TIME_LIMIT: int = 300  # 5 minutes
-    CELERY_TASK_TIME_LIMIT: int = 600       # 10 minutes
+    CELERY_TASK_SOFT_TIME_LIMIT: int = 1500  # 25 minutes
+    CELERY_TASK_TIME_LIMIT: int = 1800       # 30 minutes
     CELERY_TASK_MAX_RETRIES: int = 3
     CELERY_TASK_DEFAULT_RETRY_DELAY: int = 60  # 1 minute
     CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1
     CELERY_WORKER_MAX_TASKS_PER_CHILD: int = 1000
+    CELERY_WORKER_CONCURRENCY: int = 4
+    CELERY_PRIORITY_WORKER_CONCURRENCY: int = 2  # slots reserved for URGENT/HIGH syncs
+    SYNC_ASYNC_MAX_IN_FLIGHT: int = 32  # syncs one async worker process runs at once on its event loop
     CELERY_RESULT_EXPIRES: int = 3600  # 1 hour
     
     # Flower (Celery monitoring)
@@ -43,6 +43,8 @@ class IntegrationType(str, enum.Enum):
     BLING = "bling"
     SHOPEE = "shopee"
     WOOCOMMERCE = "woocommerce"
+    SHOPIFY = "shopify"
+    NUVEMSHOP = "nuvemshop"
 
 class IntegrationStatus(str, enum.Enum):
     """Integration status enumeration"""
@@ -245,6 +247,7 @@ class Integration(Base):
     credentials = Column(JSON, nullable=False)  # Encrypted credentials
     settings = Column(JSON, default={})
     last_sync = Column(DateTime(timezone=True))
+    sync_cursors = Column(JSON, default={})  # Incremental sync watermarks per sync type
     error_message = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -308,6 +311,7 @@ class Product(Base):
     category_id = Column(String(36), ForeignKey("categories.id"))
     external_id = Column(String(255), index=True)  # ID from external platform
     external_data = Column(JSON)  # Additional data from external platform
+    content_hash = Column(String(64))  # Fingerprint of the last imported content
     is_synced = Column(Boolean, default=False)
     last_sync = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -323,7 +327,7 @@ class Product(Base):
     
     __table_args__ = (
         UniqueConstraint('tenant_id', 'sku', name='uq_tenant_product_sku'),
-        Index('idx_product_integration_external', 'integration_id', 'external_id'),
+        Index('uq_product_integration_external', 'integration_id', 'external_id', unique=True),
         Index('idx_product_status_synced', 'status', 'is_synced'),
     )
     
@@ -594,6 +598,7 @@ class SyncJob(Base):
     progress = Column(Integer, default=0)  # 0-100
     options = Column(JSON)  # Sync options (limit, offset, etc.)
     result = Column(JSON)  # Sync results
+    checkpoint = Column(JSON)  # Resume point written with each committed batch
     error_message = Column(Text)
     scheduled_at = Column(DateTime(timezone=True))
     started_at = Column(DateTime(timezone=True))
@@ -2,13 +2,16 @@
 Database configuration and connection management for ML-Bling Sync API
 """
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError
 import logging
-from typing import Generator
+from typing import Any, Callable, Generator, List, Optional, TypeVar
 import asyncio
 from contextlib import asynccontextmanager
 
@@ -18,10 +21,16 @@ from app.domain.models import Base
 # Configure logging
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Database engine
 engine = None
 SessionLocal = None
 
+# Async (asyncpg) engine, only set up by the async worker
+async_engine = None
+AsyncSessionLocal = None
+
 def init_database():
     """Initialize database connection"""
     global engine, SessionLocal
@@ -51,6 +60,38 @@ def init_database():
         logger.error(f"❌ Failed to initialize database: {e}")
         raise
 
+def init_async_database():
+    """Initialize the asyncpg engine used by the async worker"""
+    global async_engine, AsyncSessionLocal
+    
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg")
+    async_engine = create_async_engine(
+        url,
+        pool_size=settings.SYNC_ASYNC_MAX_IN_FLIGHT,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=settings.DEBUG
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    logger.info("✅ Async database connection initialized successfully")
+
+async def run_in_transaction(fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn(session, *args)`` in its own transaction from a coroutine
+
+    In the async worker the session runs on the asyncpg engine: SQLAlchemy
+    drives the synchronous ORM code in a greenlet that yields to the event
+    loop on every round trip, so other syncs keep running meanwhile.
+    Elsewhere ``fn`` gets a regular session and runs inline.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                return await session.run_sync(fn, *args)
+    
+    with DatabaseTransaction(get_db_session()) as db:
+        return fn(db, *args)
+
 def get_db() -> Generator[Session, None, None]:
     """Get database session"""
     if SessionLocal is None:
@@ -83,6 +124,8 @@ async def init_db():
 async def close_db():
     """Close database connections"""
     try:
+        if async_engine:
+            await async_engine.dispose()
         if engine:
             engine.dispose()
             logger.info("✅ Database connections closed successfully")
@@ -224,6 +267,37 @@ def bulk_update(model_class, data_list: list, update_fields: list):
         logger.error(f"❌ Bulk update failed: {e}")
         raise
 
+def bulk_upsert(db: Session, model_class, data_list: list, index_elements: list,
+                update_fields: list, returning: Optional[list] = None,
+                chunk_size: int = 1000) -> List:
+    """Insert or update rows with multi-row INSERT ... ON CONFLICT DO UPDATE (PostgreSQL)
+
+    Runs one statement per ``chunk_size`` rows inside the caller's session; the
+    caller owns the transaction. Rows within a chunk must be unique on
+    ``index_elements``. Returns the ``returning`` columns of every affected row.
+    """
+    table = model_class.__table__
+    rows = []
+
+    for start in range(0, len(data_list), chunk_size):
+        stmt = pg_insert(table).values(data_list[start:start + chunk_size])
+
+        set_ = {name: stmt.excluded[name] for name in update_fields}
+        # ON CONFLICT bypasses the ORM, so onupdate timestamps must be set explicitly
+        if 'updated_at' in table.c and 'updated_at' not in set_:
+            set_['updated_at'] = func.now()
+
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        if returning:
+            stmt = stmt.returning(*returning)
+
+        result = db.execute(stmt)
+        if returning:
+            rows.extend(result.all())
+
+    logger.debug(f"Bulk upserted {len(data_list)} records into {model_class.__name__}")
+    return rows
+
 # Connection pool monitoring
 async def monitor_connection_pool():
     """Monitor database connection pool health"""
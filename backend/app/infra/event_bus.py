@@ -0,0 +1,135 @@
+"""
+Cross-process sync event bus
+
+Celery workers publish sync events to a Redis pub/sub channel and every API
+node relays them to its own WebSocket clients. Workers buffer events and
+publish them in batches; progress events for the same job are merged while
+buffered, so a job produces at most one message per flush interval no matter
+how often it reports. Terminal events (completed/failed/cancelled) flush the
+buffer immediately, and a timer flushes whatever is still buffered once the
+interval has passed, so the last update before a quiet period is not held back.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SYNC_EVENTS_CHANNEL = "sync:events"
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+class SyncEventPublisher:
+    """Batches and coalesces sync events before publishing them to Redis
+
+    Safe to share between the task threads of the async worker: the buffer is
+    only touched under ``lock``, and the Redis publish happens outside it.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None,
+                 flush_interval: Optional[float] = None, max_batch: Optional[int] = None):
+        self.redis = redis_client
+        self.flush_interval = settings.SYNC_EVENTS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_batch = max_batch or settings.SYNC_EVENTS_MAX_BATCH
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.last_flush = 0.0
+        self.lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def _client(self) -> redis.Redis:
+        if self.redis is None:
+            self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self.redis
+
+    def publish(self, event: Dict[str, Any]):
+        """Queue an event, merging it into any pending event for the same job"""
+        key = event.get("job_id") or str(uuid.uuid4())
+        with self.lock:
+            self.pending[key] = {**self.pending.pop(key, {}), **event}
+            due = event.get("status") in TERMINAL_STATUSES \
+                or len(self.pending) >= self.max_batch \
+                or time.monotonic() - self.last_flush >= self.flush_interval
+            if not due:
+                self._schedule_flush()
+
+        if due:
+            self.flush()
+
+    def _schedule_flush(self):
+        """Flush buffered events at the end of the interval if nothing else does (caller holds ``lock``)"""
+        if self._timer is not None:
+            return
+        delay = min(self.flush_interval, max(0.0, self.last_flush + self.flush_interval - time.monotonic()))
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Publish all pending events as a single batch"""
+        with self.lock:
+            self.last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.pending:
+                return
+            batch = list(self.pending.values())
+            self.pending = OrderedDict()
+
+        try:
+            self._client().publish(SYNC_EVENTS_CHANNEL, json.dumps({"events": batch}, default=str))
+        except redis.RedisError as e:
+            # Events are best effort; job state is still readable from the progress hash
+            logger.warning(f"Failed to publish {len(batch)} sync events: {e}")
+
+_publisher: Optional[SyncEventPublisher] = None
+
+def get_event_publisher() -> SyncEventPublisher:
+    """Get the process-wide sync event publisher"""
+    global _publisher
+    if _publisher is None:
+        _publisher = SyncEventPublisher()
+    return _publisher
+
+def publish_sync_event(event: Dict[str, Any]):
+    """Publish a sync event from a worker (synchronous, never raises)"""
+    get_event_publisher().publish(event)
+
+async def iter_sync_event_batches(reconnect_delay: float = 5.0) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield batches of sync events published by the workers, reconnecting on errors"""
+    while True:
+        client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(SYNC_EVENTS_CHANNEL)
+            logger.info(f"✅ Subscribed to {SYNC_EVENTS_CHANNEL}")
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    events = json.loads(message["data"]).get("events", [])
+                except (ValueError, AttributeError) as e:
+                    logger.warning(f"Ignoring malformed sync event batch: {e}")
+                    continue
+                yield events
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Sync event subscription failed: {e}")
+            await asyncio.sleep(reconnect_delay)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
@@ -0,0 +1,242 @@
+"""
+Pooled HTTP clients for outbound marketplace/ERP calls
+
+One long-lived, keep-alive ``httpx.AsyncClient`` is kept per API origin
+(scheme + host) and event loop, so every connector talking to the same host
+reuses warm TCP/TLS connections instead of paying a handshake per call.
+Credentials are sent per request, which lets many accounts share one pool.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# (origin, id(loop)) -> client
+_clients: Dict[Tuple[str, int], httpx.AsyncClient] = {}
+
+# Persistent event loop used by synchronous callers (Celery prefork workers)
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_pid: Optional[int] = None
+
+# Event loop thread shared by every task thread of the async worker
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_thread: Optional[threading.Thread] = None
+
+# Monotonic soft deadline of the task running in each task thread of the async worker
+_task_deadline = threading.local()
+
+# Calls handed back from the shared loop to the task thread waiting in run_async
+_task_calls = threading.local()
+
+def _origin(base_url: str) -> str:
+    """Normalize a URL to its scheme://host[:port] origin"""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _current_loop_id() -> int:
+    try:
+        return id(asyncio.get_running_loop())
+    except RuntimeError:
+        return 0
+
+def _create_client(origin: str) -> httpx.AsyncClient:
+    """Create a keep-alive client for a single origin"""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+    return httpx.AsyncClient(
+        base_url=origin,
+        limits=limits,
+        timeout=timeout,
+        headers={"User-Agent": f"ML-Bling-Sync/{settings.APP_VERSION}"},
+    )
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """Get the pooled client for the origin of ``base_url``"""
+    key = (_origin(base_url), _current_loop_id())
+    client = _clients.get(key)
+
+    if client is None or client.is_closed:
+        client = _create_client(key[0])
+        _clients[key] = client
+        logger.debug(f"Created pooled HTTP client for {key[0]}")
+
+    return client
+
+async def close_http_clients():
+    """Close pooled clients bound to the running event loop"""
+    loop_id = _current_loop_id()
+
+    for key in [k for k in _clients if k[1] == loop_id]:
+        client = _clients.pop(key)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client for {key[0]}: {e}")
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """Get pooled client information"""
+    return {
+        "clients": len(_clients),
+        "origins": sorted({origin for origin, _ in _clients}),
+    }
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get this process' persistent event loop, recreating it after a fork"""
+    global _worker_loop, _worker_loop_pid
+
+    pid = os.getpid()
+    if _worker_loop is None or _worker_loop.is_closed() or _worker_loop_pid != pid:
+        if _worker_loop_pid != pid:
+            # Clients inherited from the parent process are bound to its sockets
+            _clients.clear()
+        _worker_loop = asyncio.new_event_loop()
+        _worker_loop_pid = pid
+
+    return _worker_loop
+
+def start_shared_loop() -> asyncio.AbstractEventLoop:
+    """Run one event loop in a background thread for all task threads of this process
+
+    Used by the async worker (Celery threads pool): every task thread hands
+    its coroutines to this loop through ``run_async`` and waits for them, so
+    dozens of IO-bound syncs interleave on one loop and one set of pools.
+    """
+    global _shared_loop, _shared_loop_thread
+
+    if _shared_loop is None:
+        _shared_loop = asyncio.new_event_loop()
+        _shared_loop_thread = threading.Thread(
+            target=_shared_loop.run_forever, name="async-worker-loop", daemon=True
+        )
+        _shared_loop_thread.start()
+        logger.info("Started shared event loop for async worker")
+
+    return _shared_loop
+
+def stop_shared_loop():
+    """Close the shared loop's HTTP clients and stop it"""
+    global _shared_loop, _shared_loop_thread
+
+    if _shared_loop is None:
+        return
+
+    loop, thread = _shared_loop, _shared_loop_thread
+    try:
+        asyncio.run_coroutine_threadsafe(close_http_clients(), loop).result(timeout=10)
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP client pools: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=10)
+    loop.close()
+    _shared_loop = _shared_loop_thread = None
+
+def set_task_deadline(seconds: Optional[float]):
+    """Bound the calling task thread's ``run_async`` calls to ``seconds`` from now (``None`` clears it)
+
+    Celery's threads pool doesn't enforce ``soft_time_limit``, so the async
+    worker sets it here at task start: past the deadline the coroutine is
+    cancelled and ``SoftTimeLimitExceeded`` is raised in the task, which
+    continues from its checkpoint as it would under the prefork pool.
+    """
+    _task_deadline.value = time.monotonic() + seconds if seconds else None
+
+def _task_queue() -> "queue.SimpleQueue":
+    if not hasattr(_task_calls, 'queue'):
+        _task_calls.queue = queue.SimpleQueue()
+    return _task_calls.queue
+
+def _run_task_call(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        logger.warning(f"Task callback {getattr(fn, '__name__', fn)} failed: {e}")
+
+def on_task_thread(fn: Callable[..., Any]) -> Callable[..., None]:
+    """Wrap a blocking callback so it always runs on the calling task thread
+
+    Coroutines report progress through callbacks that touch Redis and the
+    task's sync Session. In the async worker those coroutines run on the
+    shared loop, where a blocking call would stall every task of the process
+    and the Session would be used from two threads. Calls made off the task
+    thread are queued and run, in order, by the task thread waiting in
+    ``run_async``.
+    """
+    owner = threading.get_ident()
+    calls = _task_queue()
+
+    def call(*args, **kwargs):
+        if threading.get_ident() == owner:
+            _run_task_call(fn, args, kwargs)
+        else:
+            calls.put((fn, args, kwargs))
+    return call
+
+def _wait_running_task_calls(future: concurrent.futures.Future, deadline: Optional[float]) -> Any:
+    """Wait for ``future`` while running the callbacks its coroutine hands back to this thread"""
+    calls = _task_queue()
+    future.add_done_callback(lambda finished: calls.put((None, finished, None)))
+    while True:
+        try:
+            fn, args, kwargs = calls.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise concurrent.futures.TimeoutError()
+        if fn is None:
+            # Completion marker; one left behind by a coroutine cut off at its deadline is skipped
+            if args is future:
+                return future.result()
+            continue
+        _run_task_call(fn, args, kwargs)
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine from synchronous code on the persistent worker loop
+
+    Reusing the same loop across tasks keeps pooled connections alive between
+    Celery jobs, which ``asyncio.run`` (a fresh loop per call) would discard.
+    In the async worker the coroutine runs on the shared loop instead, next to
+    those of the other task threads, and is cut off at the task's soft deadline;
+    meanwhile this thread runs the ``on_task_thread`` callbacks it hands back.
+    """
+    if _shared_loop is not None:
+        future = asyncio.run_coroutine_threadsafe(coro, _shared_loop)
+        try:
+            return _wait_running_task_calls(future, getattr(_task_deadline, 'value', None))
+        except concurrent.futures.TimeoutError:
+            if future.done():
+                raise
+            future.cancel()
+            raise SoftTimeLimitExceeded()
+
+    loop = get_worker_loop()
+    asyncio.set_event_loop(loop)
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        # A soft time limit interrupts the loop, not the task: cancel it here, or the
+        # next run_async on this process would resume it next to the retried job
+        if not task.done():
+            task.cancel()
+            try:
+                loop.run_until_complete(task)
+            except BaseException:
+                pass
+        raise
@@ -0,0 +1,198 @@
+"""
+Local cache of the Mercado Livre category tree
+
+The ML category tree barely changes, yet every product used to download
+``/categories/{id}`` again for its ``path_from_root``. Categories are kept in
+a SQLite file shared by the backend and the maintenance scripts, filled
+lazily or in bulk from the site dump (``/sites/{site}/categories/all``) and
+revalidated with their ETag once older than the TTL. Resolved categories are
+memoized in process too, so repeated lookups don't touch the file.
+
+Standard library only, so ``scripts/`` can use it without the backend settings.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "ml-bling-sync" / "ml_categories.sqlite3"
+DEFAULT_TTL = 7 * 86400
+
+# (status, category JSON or None, ETag)
+FetchResult = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    path TEXT NOT NULL,
+    etag TEXT,
+    fetched_at REAL NOT NULL
+)
+"""
+
+def category_entry(category: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce an ML category to its id, name and path from the root"""
+    path = [
+        {"id": node.get("id"), "name": node.get("name")}
+        for node in category.get("path_from_root") or []
+    ]
+    if not path and category.get("name"):
+        path = [{"id": category.get("id"), "name": category.get("name")}]
+    return {
+        "id": category.get("id"),
+        "name": category.get("name"),
+        "path": path,
+        "path_str": " > ".join(node.get("name") or "" for node in path),
+    }
+
+class CategoryCache:
+    """SQLite-backed ML categories with an in-process memo"""
+
+    def __init__(self, path: Optional[str] = None, ttl: int = DEFAULT_TTL):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._connection().execute(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def get(self, category_id: str) -> Optional[Dict[str, Any]]:
+        """Cached category, fresh or stale (``fetched_at``/``etag`` included)"""
+        entry = self._memory.get(category_id)
+        if entry is not None:
+            return entry
+
+        row = self._connection().execute(
+            "SELECT id, name, path, etag, fetched_at FROM categories WHERE id = ?", (category_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        path = json.loads(row[2])
+        entry = {
+            "id": row[0], "name": row[1], "path": path,
+            "path_str": " > ".join(node.get("name") or "" for node in path),
+            "etag": row[3], "fetched_at": row[4],
+        }
+        self._memory[category_id] = entry
+        return entry
+
+    def put_many(self, categories: Iterable[Dict[str, Any]], etags: Optional[Dict[str, str]] = None) -> int:
+        """Store raw ML categories; returns how many were written"""
+        now = time.time()
+        rows = []
+        for category in categories:
+            entry = category_entry(category)
+            etag = (etags or {}).get(entry["id"])
+            rows.append((entry["id"], entry["name"], json.dumps(entry["path"], ensure_ascii=False), etag, now))
+            self._memory[entry["id"]] = {**entry, "etag": etag, "fetched_at": now}
+
+        connection = self._connection()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO categories (id, name, path, etag, fetched_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def put(self, category: Dict[str, Any], etag: Optional[str] = None) -> Dict[str, Any]:
+        self.put_many([category], {category.get("id"): etag} if etag else None)
+        return self._memory[category.get("id")]
+
+    def touch(self, category_id: str) -> Optional[Dict[str, Any]]:
+        """Mark a revalidated (304) category fresh again"""
+        now = time.time()
+        self._connection().execute("UPDATE categories SET fetched_at = ? WHERE id = ?", (now, category_id))
+        entry = self._memory.get(category_id)
+        if entry is not None:
+            entry["fetched_at"] = now
+        return entry
+
+    def prefetch(self, dump: Dict[str, Any]) -> int:
+        """Load a site dump (``/sites/{site}/categories/all``, id -> category)"""
+        return self.put_many(dump.values())
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+
+    # Resolution
+    def _lookup(self, category_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        entry = self.get(category_id)
+        return entry, entry is None or not self.is_fresh(entry)
+
+    def _store(self, category_id: str, entry: Optional[Dict[str, Any]], result: FetchResult) -> Optional[Dict[str, Any]]:
+        status, category, etag = result
+        if status == 304 and entry is not None:
+            return self.touch(category_id) or entry
+        if status == 404 or category is None:
+            return None
+        return self.put(category, etag)
+
+    def resolve(self, category_id: str, fetch: Callable[[str, Optional[str]], FetchResult]) -> Optional[Dict[str, Any]]:
+        """Cached category, fetching (conditionally when stale) on a miss or after the TTL
+
+        ``fetch(category_id, etag)`` returns ``(status, category, etag)``. A
+        stale entry is still served when the revalidation request fails.
+        """
+        entry, needs_fetch = self._lookup(category_id)
+        if not needs_fetch:
+            return entry
+        try:
+            result = fetch(category_id, entry and entry.get("etag"))
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Serving stale ML category {category_id}: {e}")
+            return entry
+        return self._store(category_id, entry, result)
+
+    async def aresolve(self, category_id: str,
+                       fetch: Callable[[str, Optional[str]], Awaitable[FetchResult]]) -> Optional[Dict[str, Any]]:
+        """``resolve`` for an async ``fetch``"""
+        entry, needs_fetch = self._lookup(category_id)
+        if not needs_fetch:
+            return entry
+        try:
+            result = await fetch(category_id, entry and entry.get("etag"))
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Serving stale ML category {category_id}: {e}")
+            return entry
+        return self._store(category_id, entry, result)
+
+_category_cache: Optional[CategoryCache] = None
+
+def get_category_cache() -> CategoryCache:
+    """Get the backend's category cache (path and TTL from the settings)"""
+    global _category_cache
+    if _category_cache is None:
+        # Imported here so the scripts can use this module without the backend settings
+        from app.core.config import settings
+        _category_cache = CategoryCache(settings.ML_CATEGORY_CACHE_PATH, settings.ML_CATEGORY_CACHE_TTL)
+    return _category_cache
@@ -0,0 +1,219 @@
+"""
+Distributed outbound rate limiter for marketplace/ERP APIs
+
+A Redis token bucket per (account, API host) shared by every worker process,
+so 50 workers syncing the same Bling account stay under that account's limit
+while a single worker can still use the whole budget. Buckets are refilled
+using Redis server time, which keeps workers with skewed clocks consistent.
+
+Responses feed back into the bucket: ``Retry-After`` and exhausted
+``X-RateLimit-*`` windows block the bucket, ``X-RateLimit-Remaining`` caps the
+tokens, and 429s halve the bucket's rate, which then recovers additively on
+successful calls. If Redis is unreachable the limiter fails open.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"
+
+# KEYS[1] bucket; ARGV: default rate (tokens/s), burst, cost, ttl (ms)
+# Returns 0 when tokens were taken, otherwise the milliseconds to wait
+ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local rate = tonumber(state[3]) or tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+    return blocked_until - now
+end
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return wait
+"""
+
+# KEYS[1] bucket; ARGV: default rate, min rate, block for (ms, -1 none),
+# remaining tokens (-1 unknown), throttled (0/1), ttl (ms)
+ADJUST_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local default_rate = tonumber(ARGV[1])
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or default_rate
+local block_ms = tonumber(ARGV[3])
+local remaining = tonumber(ARGV[4])
+if ARGV[5] == '1' then
+    rate = math.max(tonumber(ARGV[2]), rate / 2)
+    redis.call('HSET', KEYS[1], 'tokens', '0', 'ts', now)
+elseif rate < default_rate then
+    rate = math.min(default_rate, rate + default_rate / 10)
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+if block_ms >= 0 then
+    redis.call('HSET', KEYS[1], 'blocked_until', now + block_ms, 'tokens', '0', 'ts', now + block_ms)
+end
+if remaining >= 0 then
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+    if tokens == nil or tokens > remaining then
+        redis.call('HSET', KEYS[1], 'tokens', tostring(remaining), 'ts', now)
+    end
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[6])
+return 0
+"""
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def parse_rate_limit_headers(status_code: int, headers: Mapping[str, str]) -> Tuple[Optional[float], Optional[int], bool]:
+    """Extract ``(block_seconds, remaining, throttled)`` from a response
+
+    Understands ``Retry-After``, ``X-RateLimit-Remaining``/``-Reset`` (reset
+    as delta seconds or epoch seconds) and Shopify's ``used/limit`` call limit.
+    """
+    throttled = status_code == 429
+    block = parse_retry_after(headers.get('retry-after'))
+    remaining = None
+
+    raw_remaining = _header(headers, 'x-ratelimit-remaining', 'ratelimit-remaining')
+    if raw_remaining is not None:
+        try:
+            remaining = int(float(raw_remaining))
+        except ValueError:
+            remaining = None
+
+    call_limit = headers.get('x-shopify-shop-api-call-limit')
+    if call_limit and '/' in call_limit:
+        used, limit = call_limit.split('/', 1)
+        try:
+            remaining = max(0, int(limit) - int(used))
+        except ValueError:
+            pass
+
+    if block is None and remaining == 0:
+        raw_reset = _header(headers, 'x-ratelimit-reset', 'ratelimit-reset')
+        try:
+            reset = float(raw_reset) if raw_reset is not None else None
+        except ValueError:
+            reset = None
+        if reset is not None:
+            # Large values are epoch timestamps, small ones are seconds to wait
+            block = max(0.0, reset - time.time()) if reset > 1e9 else reset
+
+    if throttled and block is None:
+        block = settings.OUTBOUND_RATE_LIMIT_DEFAULT_BACKOFF
+
+    return block, remaining, throttled
+
+class OutboundRateLimiter:
+    """Token buckets in Redis keyed by account and API host"""
+
+    def __init__(self):
+        # redis.asyncio connections are bound to the loop (and process) that created them
+        self._clients: Dict[Tuple[int, int], aioredis.Redis] = {}
+        self._disabled_until = 0.0
+
+    def _client(self) -> aioredis.Redis:
+        key = (os.getpid(), id(asyncio.get_running_loop()))
+        client = self._clients.get(key)
+        if client is None:
+            client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+            self._clients[key] = client
+        return client
+
+    @staticmethod
+    def _key(account: str, host: str) -> str:
+        return f"{RATE_LIMIT_KEY_PREFIX}{host}:{account}"
+
+    def _available(self) -> bool:
+        return settings.OUTBOUND_RATE_LIMIT_ENABLED and time.monotonic() >= self._disabled_until
+
+    def _fail_open(self, error: Exception):
+        """Skip limiting for a while instead of failing every marketplace call"""
+        self._disabled_until = time.monotonic() + settings.OUTBOUND_RATE_LIMIT_FAIL_OPEN_SECONDS
+        logger.warning(f"Outbound rate limiter unavailable, failing open: {error}")
+
+    async def acquire(self, account: str, host: str, rate: float, burst: int, cost: int = 1):
+        """Wait until ``cost`` tokens can be taken from the bucket"""
+        ttl_ms = settings.OUTBOUND_RATE_LIMIT_TTL * 1000
+        while self._available():
+            try:
+                wait_ms = await self._client().eval(
+                    ACQUIRE_SCRIPT, 1, self._key(account, host), rate, burst, cost, ttl_ms
+                )
+            except (redis.RedisError, OSError) as e:
+                self._fail_open(e)
+                return
+
+            if not wait_ms:
+                return
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+    async def observe(self, account: str, host: str, rate: float,
+                      status_code: int, headers: Mapping[str, str]):
+        """Adjust the bucket from a response's status and rate limit headers"""
+        if not self._available():
+            return
+
+        block, remaining, throttled = parse_rate_limit_headers(status_code, headers)
+        block_ms = int(block * 1000) if block is not None else -1
+
+        try:
+            await self._client().eval(
+                ADJUST_SCRIPT, 1, self._key(account, host),
+                rate, settings.OUTBOUND_RATE_LIMIT_MIN_RATE, block_ms,
+                remaining if remaining is not None else -1,
+                1 if throttled else 0,
+                settings.OUTBOUND_RATE_LIMIT_TTL * 1000
+            )
+        except (redis.RedisError, OSError) as e:
+            self._fail_open(e)
+
+_rate_limiter: Optional[OutboundRateLimiter] = None
+
+def get_rate_limiter() -> OutboundRateLimiter:
+    """Get the process-wide outbound rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = OutboundRateLimiter()
+    return _rate_limiter
@@ -13,6 +13,7 @@ from enum import Enum
 
 from app.core.config import settings
 from app.core.security import verify_token
+from app.infra.event_bus import iter_sync_event_batches
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -442,7 +443,28 @@ async def broadcast_dashboard_update(dashboard_data: dict, user_id: Optional[str
     if user_id:
         await manager.broadcast_to_user(user_id, message)
 
+async def broadcast_sync_update(sync_data: dict, user_id: Optional[str] = None):
+    """Broadcast sync job update event"""
+    message = WebSocketMessage(
+        event="sync.updated",
+        data={
+            "sync": sync_data,
+            "timestamp": datetime.utcnow().isoformat()
+        },
+        user_id=user_id
+    )
+    
+    await manager.broadcast_to_type(ConnectionType.DASHBOARD, message)
+    if user_id:
+        await manager.broadcast_to_user(user_id, message)
+
 # Background tasks
+async def sync_event_listener():
+    """Relay sync events published by Celery workers to this node's clients"""
+    async for events in iter_sync_event_batches():
+        for event in events:
+            await broadcast_sync_update(event, event.get("user_id"))
+
 async def websocket_maintenance():
     """Background task for WebSocket maintenance"""
     while True:
@@ -465,6 +487,9 @@ async def init_websockets():
     try:
         # Start maintenance task
         asyncio.create_task(websocket_maintenance())
+        
+        # Relay sync events from the workers
+        asyncio.create_task(sync_event_listener())
         logger.info("✅ WebSocket system initialized successfully")
         
     except Exception as e:
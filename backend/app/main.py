@@ -20,6 +20,7 @@ from app.core.config import settings
 from app.core.security import get_current_user
 from app.infra.database import init_db, close_db
 from app.infra.websockets import init_websockets
+from app.infra.http_client import close_http_clients
 from app.api.routers import (
     auth, users, products, orders, integrations, 
     categories, kits, returns, reservations, 
@@ -64,6 +65,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down ML-Bling Sync API...")
     await close_db()
+    await close_http_clients()
     logger.info("✅ API shutdown complete")
 
 # Create FastAPI app
@@ -0,0 +1,438 @@
+"""Streaming Product Import
+
+Page-at-a-time import pipeline used by the product sync task. Pages are
+fetched and normalized one at a time and written in set-based batches with
+INSERT ... ON CONFLICT, so memory stays bounded by the batch size rather than
+by the size of the catalog.
+
+Each batch commits a checkpoint (next page cursor and counters) to its
+``SyncJob`` in the same transaction, so a redelivered or continued task
+resumes after the last committed batch instead of starting over. Chunks of a
+parallel sync keep their own checkpoint under ``checkpoint['chunks'][index]``.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, literal_column, select, text, update
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector, NormalizedProduct, FINGERPRINT_VERSION
+from app.domain.models import Product, ProductImage, ProductStatus, SyncJob, generate_uuid
+from app.infra.database import bulk_upsert, run_in_transaction
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Columns refreshed from the supplier on every import; status and local fields are kept
+PRODUCT_UPSERT_FIELDS = [
+    'name', 'sku', 'price', 'stock_quantity', 'description', 'weight',
+    'external_data', 'content_hash', 'is_synced', 'last_sync'
+]
+
+# Called with (processed, total, message); total is None when the API doesn't report it
+ProgressCallback = Callable[[int, Optional[int], str], None]
+
+# Bump when the checkpoint layout changes; older checkpoints are ignored
+CHECKPOINT_VERSION = 1
+
+# ImportStats fields carried in checkpoints
+CHECKPOINT_COUNTERS = ['processed', 'created', 'updated', 'unchanged', 'failed', 'pages', 'errors_dropped']
+
+# Chunks of one job write concurrently, so each one sets only its own key inside the row update
+CHUNK_CHECKPOINT_UPDATE = text("""
+    UPDATE sync_jobs
+    SET checkpoint = jsonb_set(
+        COALESCE(checkpoint::jsonb, '{}'::jsonb)
+            || jsonb_build_object('chunks', COALESCE(checkpoint::jsonb -> 'chunks', '{}'::jsonb)),
+        ARRAY['chunks', CAST(:chunk AS text)],
+        CAST(:checkpoint AS jsonb)
+    )::json
+    WHERE id = :job_id
+""")
+
+def chunk_checkpoint(job_checkpoint: Optional[Dict[str, Any]], index: int) -> Optional[Dict[str, Any]]:
+    """Checkpoint of chunk ``index`` inside a parallel job's checkpoint"""
+    return ((job_checkpoint or {}).get('chunks') or {}).get(str(index))
+
+@dataclass
+class ImportStats:
+    """Running counters for a product import"""
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    pages: int = 0
+    batches_failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    errors_dropped: int = 0
+    max_errors: int = 50
+
+    def add_error(self, message: str):
+        """Record an error, keeping only the first ``max_errors`` messages"""
+        if len(self.errors) < self.max_errors:
+            self.errors.append(message)
+        else:
+            self.errors_dropped += 1
+
+    def to_result(self, success: bool, start_time: float) -> Dict[str, Any]:
+        """Build the ``SyncJob.result`` payload"""
+        return {
+            'success': success,
+            'products_processed': self.processed,
+            'products_imported': self.created,
+            'products_updated': self.updated,
+            'products_unchanged': self.unchanged,
+            'products_failed': self.failed,
+            'pages': self.pages,
+            'batches_failed': self.batches_failed,
+            'errors': self.errors,
+            'errors_dropped': self.errors_dropped,
+            'duration_ms': int((time.time() - start_time) * 1000)
+        }
+
+class ProductImportPipeline:
+    """Fetch, normalize and persist supplier products one page at a time"""
+
+    def __init__(self, connector: BaseConnector, integration_id: str, tenant_id: str,
+                 page_size: Optional[int] = None, on_progress: Optional[ProgressCallback] = None,
+                 full_refresh: bool = False, job_id: Optional[str] = None,
+                 checkpoint: Optional[Dict[str, Any]] = None, chunk_index: Optional[int] = None):
+        self.connector = connector
+        self.integration_id = integration_id
+        self.tenant_id = tenant_id
+        self.full_refresh = full_refresh
+        self.page_size = min(page_size or settings.SYNC_BATCH_SIZE, connector.max_page_size)
+        self.on_progress = on_progress
+        self.stats = ImportStats(max_errors=settings.SYNC_MAX_ERRORS)
+        self.items_seen = 0
+        # Checkpoints are only written when the import belongs to a job
+        self.job_id = job_id
+        self.chunk_index = chunk_index
+        self.next_cursor: Optional[str] = None
+        self.resumed = False
+        self.completed = False
+        # Set when a batch fails to persist: later checkpoints would point past it
+        self.checkpoint_held = False
+        if checkpoint:
+            self._restore(checkpoint)
+
+    def _restore(self, checkpoint: Dict[str, Any]):
+        """Continue from a checkpoint written by an earlier attempt of the same job"""
+        if checkpoint.get('version') != CHECKPOINT_VERSION \
+                or checkpoint.get('fingerprint_version') != FINGERPRINT_VERSION \
+                or checkpoint.get('page_size') != self.page_size:
+            logger.info(f"Ignoring incompatible checkpoint for job {self.job_id}")
+            return
+        # Checkpoints are only written after a page was read; without a next page every page is stored
+        completed = bool(checkpoint.get('completed')) or checkpoint.get('cursor') is None
+        if not completed and not self.connector.resumable_cursors:
+            # Unchanged products are skipped by content hash, so starting over is cheap
+            logger.info(f"{self.connector.type} cursors can't be resumed, restarting job {self.job_id}")
+            return
+
+        for name in CHECKPOINT_COUNTERS:
+            setattr(self.stats, name, checkpoint['stats'].get(name, 0))
+        self.stats.errors = list(checkpoint['stats'].get('errors', []))
+        self.items_seen = checkpoint.get('items_seen', 0)
+        self.next_cursor = checkpoint.get('cursor')
+        self.completed = completed
+        self.resumed = True
+
+    def checkpoint_state(self, created: int = 0, updated: int = 0, completed: bool = False) -> Dict[str, Any]:
+        """Checkpoint for everything up to ``next_cursor``, counting a batch about to commit"""
+        stats = {name: getattr(self.stats, name) for name in CHECKPOINT_COUNTERS}
+        stats['created'] += created
+        stats['updated'] += updated
+        stats['errors'] = list(self.stats.errors)
+
+        return {
+            'version': CHECKPOINT_VERSION,
+            'fingerprint_version': FINGERPRINT_VERSION,
+            'page_size': self.page_size,
+            'cursor': None if completed else self.next_cursor,
+            'items_seen': self.items_seen,
+            'completed': completed,
+            'stats': stats,
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    def _write_checkpoint(self, db, checkpoint: Dict[str, Any]):
+        # After a failed batch the checkpoint stays before it, so a resumed attempt retries it
+        if not self.job_id or self.checkpoint_held:
+            return
+        if self.chunk_index is None:
+            db.execute(update(SyncJob).where(SyncJob.id == self.job_id).values(checkpoint=checkpoint))
+        else:
+            db.execute(CHUNK_CHECKPOINT_UPDATE, {
+                'job_id': self.job_id,
+                'chunk': str(self.chunk_index),
+                'checkpoint': json.dumps(checkpoint)
+            })
+
+    async def iter_normalized_pages(self, limit: Optional[int] = None,
+                                    offset: int = 0) -> AsyncIterator[Tuple[List[NormalizedProduct], Optional[int]]]:
+        """Yield ``(products, total)`` for each page, up to ``limit`` raw items
+
+        After each page ``next_cursor`` points at the page that follows it.
+        """
+        if self.resumed:
+            cursor, to_skip = self.next_cursor, 0
+        else:
+            cursor = self.connector.cursor_for_offset(offset, self.page_size) if offset else None
+            to_skip = 0 if cursor or not offset else offset
+
+        async for page in self.connector.iter_product_pages(self.page_size, cursor):
+            self.next_cursor = page.next_cursor
+            self.stats.pages += 1
+            products: List[NormalizedProduct] = []
+
+            for raw_product in page.items:
+                if to_skip:
+                    to_skip -= 1
+                    continue
+                if limit is not None and self.items_seen >= limit:
+                    break
+
+                self.items_seen += 1
+                try:
+                    products.extend(self.connector.normalize_product(raw_product))
+                except Exception as e:
+                    self.stats.failed += 1
+                    self.stats.add_error(f"Failed to normalize product {raw_product.get('id')}: {e}")
+
+            total = page.total
+            if limit is not None:
+                total = min(total, limit) if total is not None else limit
+
+            yield products, total
+
+            if limit is not None and self.items_seen >= limit:
+                break
+
+    def _dedupe(self, products: List[NormalizedProduct]) -> List[NormalizedProduct]:
+        """Drop rows a single upsert statement can't hold twice (same external_id or SKU)"""
+        by_external_id: Dict[str, NormalizedProduct] = {}
+        for item in products:
+            by_external_id[item.external_id] = item
+
+        unique = []
+        skus = set()
+        for item in by_external_id.values():
+            if item.sku in skus:
+                self.stats.failed += 1
+                self.stats.add_error(f"Duplicate SKU {item.sku} for product {item.external_id}")
+                continue
+            skus.add(item.sku)
+            unique.append(item)
+
+        return unique
+
+    def _drop_unchanged(self, db, products: List[NormalizedProduct],
+                        hashes: Dict[str, str]) -> List[NormalizedProduct]:
+        """Skip products whose stored content hash matches the imported content"""
+        if self.full_refresh:
+            return products
+
+        stored = dict(db.execute(
+            select(Product.external_id, Product.content_hash).where(
+                Product.integration_id == self.integration_id,
+                Product.external_id.in_([p.external_id for p in products])
+            )
+        ).all())
+
+        changed = [item for item in products if stored.get(item.external_id) != hashes[item.external_id]]
+        self.stats.unchanged += len(products) - len(changed)
+        return changed
+
+    def _drop_sku_conflicts(self, db, products: List[NormalizedProduct]) -> List[NormalizedProduct]:
+        """Skip products whose SKU already belongs to another product of the tenant
+
+        ``uq_tenant_product_sku`` is not the ON CONFLICT target, so a clash
+        would abort the whole statement instead of a single row.
+        """
+        owners = {}
+        for row in db.execute(
+            select(Product.sku, Product.integration_id, Product.external_id).where(
+                Product.tenant_id == self.tenant_id,
+                Product.sku.in_([p.sku for p in products])
+            )
+        ):
+            owners[row.sku] = (row.integration_id, row.external_id)
+
+        allowed = []
+        for item in products:
+            owner = owners.get(item.sku)
+            if owner is not None and owner != (self.integration_id, item.external_id):
+                self.stats.failed += 1
+                self.stats.add_error(f"SKU {item.sku} already used by another product (product {item.external_id})")
+                continue
+            allowed.append(item)
+
+        return allowed
+
+    async def persist_batch(self, products: List[NormalizedProduct], completed: bool = False) -> Tuple[int, int]:
+        """Upsert the changed products of a batch and replace their images in one transaction
+
+        Unchanged products (same content hash) are neither written nor have
+        their ``last_sync`` bumped, which keeps write volume proportional to
+        what actually changed at the supplier. The job checkpoint commits in
+        the same transaction, so it never points past unwritten products.
+        """
+        return await run_in_transaction(self._write_batch, products, completed)
+
+    def _write_batch(self, db, products: List[NormalizedProduct], completed: bool) -> Tuple[int, int]:
+        now = datetime.utcnow()
+
+        products = self._dedupe(products)
+        if products:
+            hashes = {item.external_id: item.fingerprint() for item in products}
+            products = self._drop_sku_conflicts(db, self._drop_unchanged(db, products, hashes))
+        if not products:
+            self._write_checkpoint(db, self.checkpoint_state(completed=completed))
+            return 0, 0
+
+        rows = [
+            {
+                'id': generate_uuid(),
+                'tenant_id': self.tenant_id,
+                'integration_id': self.integration_id,
+                'external_id': item.external_id,
+                'name': item.name,
+                'sku': item.sku,
+                'price': item.price,
+                'stock_quantity': item.stock_quantity,
+                'description': item.description,
+                'weight': item.weight,
+                'external_data': item.external_data,
+                'content_hash': hashes[item.external_id],
+                'status': ProductStatus.ACTIVE,
+                'is_synced': True,
+                'last_sync': now,
+            }
+            for item in products
+        ]
+
+        # xmax is 0 only for freshly inserted tuples
+        upserted = bulk_upsert(
+            db, Product, rows,
+            index_elements=['integration_id', 'external_id'],
+            update_fields=PRODUCT_UPSERT_FIELDS,
+            returning=[Product.id, Product.external_id, literal_column('xmax = 0').label('inserted')],
+            chunk_size=settings.SYNC_UPSERT_BATCH_SIZE
+        )
+        product_ids = {row.external_id: row.id for row in upserted}
+        created = sum(1 for row in upserted if row.inserted)
+
+        # Images are replaced wholesale so removed supplier images disappear too
+        db.execute(delete(ProductImage).where(ProductImage.product_id.in_(list(product_ids.values()))))
+        images = [
+            {
+                'id': generate_uuid(),
+                'product_id': product_ids[item.external_id],
+                'url': url[:500],
+                'order_index': index,
+                'is_primary': index == 0,
+            }
+            for item in products
+            for index, url in enumerate(item.images)
+        ]
+        if images:
+            db.execute(insert(ProductImage), images)
+
+        self._write_checkpoint(db, self.checkpoint_state(created, len(upserted) - created, completed))
+
+        return created, len(upserted) - created
+
+    async def _persist_with_errors(self, products: List[NormalizedProduct], completed: bool = False):
+        """Persist a batch, counting the whole batch as failed if the write fails"""
+        try:
+            created, updated = await self.persist_batch(products, completed)
+            self.stats.created += created
+            self.stats.updated += updated
+        except Exception as e:
+            self.checkpoint_held = True
+            self.stats.batches_failed += 1
+            self.stats.failed += len(products)
+            self.stats.add_error(f"Failed to persist batch ending at page {self.stats.pages}: {e}")
+            logger.error(f"Product import batch failed for {self.integration_id}: {e}")
+
+    async def run(self, limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """Run the import and return a summary with counts only
+
+        Progress is reported in supplier items (``total`` uses the same unit),
+        while the result counts normalized products, which differ for
+        connectors that split variants into separate products. The run is only
+        successful if every batch was persisted.
+        """
+        start_time = time.time()
+
+        if self.completed:
+            # Every batch committed before the previous attempt died; only the job update was lost
+            return self.stats.to_result(True, start_time)
+        if self.resumed and self.on_progress:
+            self.on_progress(self.items_seen, None, f"Resuming after {self.items_seen} items")
+
+        # Pages are buffered up to SYNC_UPSERT_BATCH_SIZE products per write
+        buffer: List[NormalizedProduct] = []
+
+        async for products, total in self.iter_normalized_pages(limit, offset):
+            buffer.extend(products)
+            self.stats.processed += len(products)
+
+            if len(buffer) >= settings.SYNC_UPSERT_BATCH_SIZE:
+                await self._persist_with_errors(buffer)
+                buffer = []
+
+            if self.on_progress:
+                self.on_progress(
+                    self.items_seen,
+                    total,
+                    f"Imported {self.stats.processed} products ({self.stats.pages} pages)"
+                )
+
+        if buffer or self.job_id:
+            await self._persist_with_errors(buffer, completed=True)
+
+        logger.info(
+            f"Product import finished for {self.integration_id}: "
+            f"{self.stats.created} created, {self.stats.updated} updated, "
+            f"{self.stats.unchanged} unchanged, {self.stats.failed} failed"
+        )
+        return self.stats.to_result(self.stats.batches_failed == 0, start_time)
+
+async def update_inventory(integration_id: str, items: List[Dict[str, Any]]) -> int:
+    """Write ``{sku, quantity, price}`` entries onto the integration's products
+
+    Runs a single executemany UPDATE keyed on (integration_id, sku) and
+    returns the number of product rows that were touched.
+    """
+    if not items:
+        return 0
+    return await run_in_transaction(_write_inventory, integration_id, items)
+
+def _write_inventory(db, integration_id: str, items: List[Dict[str, Any]]) -> int:
+    # Core table update: an ORM update with a parameter list would require primary keys
+    table = Product.__table__
+    stmt = (
+        update(table)
+        .where(table.c.integration_id == integration_id, table.c.sku == bindparam('b_sku'))
+        .values(
+            stock_quantity=bindparam('b_quantity'),
+            price=bindparam('b_price'),
+            # The import fingerprint no longer describes the row; the next import must rewrite it
+            content_hash=None,
+            last_sync=datetime.utcnow()
+        )
+    )
+
+    result = db.execute(stmt, [
+        {'b_sku': item['sku'], 'b_quantity': item['quantity'], 'b_price': item['price']}
+        for item in items
+    ])
+    return result.rowcount
@@ -0,0 +1,55 @@
+"""Parallel Product Sync Planning
+
+Helpers for the map-reduce product sync: the catalog is split into page
+ranges imported by separate Celery tasks (a chord), and their results are
+merged into the parent ``SyncJob`` by the reduce step.
+"""
+
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.connectors.base import BaseConnector
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def plan_product_chunks(connector: BaseConnector, page_size: int, estimated_items: int,
+                        chunks: Optional[int] = None) -> List[Tuple[int, Optional[int]]]:
+    """Split a catalog import into ``(offset, limit)`` page ranges for parallel workers
+
+    Ranges are aligned to ``page_size`` so each chunk can seek straight to its
+    first page, and the last range is open-ended so products added since the
+    estimate are still imported. Connectors that can only walk their catalog
+    from the start (scroll ids, opaque cursors) get a single range.
+    """
+    if connector.cursor_for_offset(page_size, page_size) is None:
+        return [(0, None)]
+
+    total_pages = max(1, math.ceil(estimated_items / page_size))
+    count = chunks or math.ceil(total_pages / settings.SYNC_CHUNK_PAGES)
+    count = max(1, min(count, settings.SYNC_MAX_CHUNKS, total_pages))
+    pages_per_chunk = math.ceil(total_pages / count)
+    chunk_items = pages_per_chunk * page_size
+
+    return [
+        (index * chunk_items, chunk_items if index < count - 1 else None)
+        for index in range(count)
+    ]
+
+def merge_import_results(results: List[Dict[str, Any]], duration_ms: int) -> Dict[str, Any]:
+    """Combine the results of chunked imports into one ``SyncJob.result``"""
+    counters = [
+        'products_processed', 'products_imported', 'products_updated',
+        'products_unchanged', 'products_failed', 'pages', 'batches_failed', 'errors_dropped'
+    ]
+    merged: Dict[str, Any] = {name: sum(result.get(name, 0) for result in results) for name in counters}
+
+    errors = [error for result in results for error in result.get('errors', [])]
+    merged['errors'] = errors[:settings.SYNC_MAX_ERRORS]
+    merged['errors_dropped'] += len(errors) - len(merged['errors'])
+    merged['success'] = all(result.get('success') for result in results)
+    merged['chunks'] = len(results)
+    merged['duration_ms'] = duration_ms
+    return merged
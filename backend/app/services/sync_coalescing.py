@@ -0,0 +1,191 @@
+"""Sync Request Coalescing
+
+Keeps at most one queued and one running job per (integration, sync type).
+
+* A request for an integration and sync type that already has an identical
+  job waiting in the queue, at the same or a more urgent priority, merges into
+  that job instead of creating another one. The waiting job is tracked in a Redis slot (``sync:queued:...``) that
+  the worker clears when the job starts, so a running job collects at most
+  one follow-up.
+* Workers take a lease lock (``sync:lease:...``) before running a job. The
+  lease has a TTL and is renewed by a heartbeat thread, so a crashed worker
+  frees it automatically. A job that finds the lease taken is retried later
+  instead of syncing the same data twice in parallel.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.celery_config import sync_priority_step
+from app.core.config import settings
+from app.services.sync_progress import get_progress_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUEUED_KEY_PREFIX = "sync:queued:"
+LEASE_KEY_PREFIX = "sync:lease:"
+
+# Compare-and-set scripts so a worker never touches a lease it no longer owns
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# (integration_id, sync_type, job_id, options, priority)
+SlotClaim = Tuple[str, str, str, Optional[Dict[str, Any]], str]
+
+def _queued_key(integration_id: str, sync_type: str) -> str:
+    return f"{QUEUED_KEY_PREFIX}{integration_id}:{sync_type}"
+
+def _lease_key(integration_id: str, sync_type: str) -> str:
+    return f"{LEASE_KEY_PREFIX}{integration_id}:{sync_type}"
+
+def _canonical_options(options: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(options or {}, sort_keys=True, default=str)
+
+def claim_queued_slots(claims: List[SlotClaim], redis_client: Optional[redis.Redis] = None) -> List[Optional[str]]:
+    """Claim the queued slot for each new job, in two round trips
+
+    Returns, per claim, the id of the already queued job the request merges
+    into, or None when the new job took the slot (or can't merge because the
+    queued job has different options or a lower priority) and must be created.
+    A more urgent request never waits behind a queued LOW/NORMAL job in the
+    tenant's fair queue. Duplicates within ``claims`` merge into the first of them.
+    """
+    client = redis_client or get_progress_redis()
+    slots = [
+        json.dumps({"job_id": job_id, "options": _canonical_options(options), "priority": priority})
+        for _, _, job_id, options, priority in claims
+    ]
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for (integration_id, sync_type, _, _, _), slot in zip(claims, slots):
+            pipe.set(_queued_key(integration_id, sync_type), slot, nx=True, ex=settings.SYNC_QUEUED_SLOT_TTL)
+        claimed = pipe.execute()
+
+        pipe = client.pipeline(transaction=False)
+        for (integration_id, sync_type, _, _, _), took_slot in zip(claims, claimed):
+            if not took_slot:
+                pipe.get(_queued_key(integration_id, sync_type))
+        current = iter(pipe.execute())
+    except redis.RedisError as e:
+        # Without Redis every request becomes its own job; the broker is likely down anyway
+        logger.warning(f"Failed to claim queued slots for {len(claims)} sync requests: {e}")
+        return [None] * len(claims)
+
+    merged_into: List[Optional[str]] = []
+    for (_, _, _, options, priority), took_slot in zip(claims, claimed):
+        if took_slot:
+            merged_into.append(None)
+            continue
+
+        raw = next(current)
+        queued = json.loads(raw) if raw else None
+        if queued and queued["options"] == _canonical_options(options) \
+                and sync_priority_step(queued.get("priority", "normal")) <= sync_priority_step(priority):
+            merged_into.append(queued["job_id"])
+        else:
+            # The slot was freed meanwhile or holds a different or less urgent request; the lease still serializes them
+            merged_into.append(None)
+
+    return merged_into
+
+def claim_queued_slot(integration_id: str, sync_type: str, job_id: str,
+                      options: Optional[Dict[str, Any]] = None,
+                      redis_client: Optional[redis.Redis] = None, priority: str = "normal") -> Optional[str]:
+    """Claim the queued slot for a single job; returns the job it merges into, if any"""
+    return claim_queued_slots([(integration_id, sync_type, job_id, options, priority)], redis_client)[0]
+
+def release_queued_slot(integration_id: str, sync_type: str, job_id: str,
+                        redis_client: Optional[redis.Redis] = None):
+    """Free the queued slot if it still belongs to ``job_id``
+
+    Only the slot's owner ever deletes it and nobody else can claim it while
+    it exists, so a plain GET followed by DEL is race free.
+    """
+    client = redis_client or get_progress_redis()
+    key = _queued_key(integration_id, sync_type)
+    try:
+        raw = client.get(key)
+        if raw and json.loads(raw)["job_id"] == job_id:
+            client.delete(key)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to release queued slot for sync job {job_id}: {e}")
+
+class SyncLease:
+    """Single-flight lease for one (integration, sync type), held by a running job"""
+
+    def __init__(self, integration_id: str, sync_type: str, job_id: str,
+                 redis_client: Optional[redis.Redis] = None, ttl: Optional[int] = None):
+        self.integration_id = integration_id
+        self.sync_type = sync_type
+        self.job_id = job_id
+        self.redis = redis_client or get_progress_redis()
+        self.ttl = ttl or settings.SYNC_LEASE_TTL
+        self.key = _lease_key(integration_id, sync_type)
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self) -> bool:
+        """Take the lease and free the queued slot so new requests queue a follow-up"""
+        try:
+            acquired = self.redis.set(self.key, self.job_id, nx=True, ex=self.ttl) \
+                or self.redis.get(self.key) == self.job_id
+        except redis.RedisError as e:
+            logger.warning(f"Failed to acquire sync lease for job {self.job_id}, running unlocked: {e}")
+            return True
+
+        if acquired:
+            release_queued_slot(self.integration_id, self.sync_type, self.job_id, self.redis)
+        return bool(acquired)
+
+    def renew(self) -> bool:
+        """Extend the lease; returns False if it expired and was lost"""
+        try:
+            return bool(self.redis.eval(RENEW_LEASE_SCRIPT, 1, self.key, self.job_id, self.ttl * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to renew sync lease for job {self.job_id}: {e}")
+            return False
+
+    def start_heartbeat(self):
+        """Renew the lease every third of its TTL until released"""
+        def beat():
+            while not self._stop.wait(self.ttl / 3):
+                if not self.renew():
+                    logger.warning(f"Sync lease for job {self.job_id} could not be renewed")
+
+        self._heartbeat = threading.Thread(target=beat, name=f"sync-lease-{self.job_id}", daemon=True)
+        self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        """Stop renewing the lease without releasing it"""
+        self._stop.set()
+
+    def handoff(self, ttl: int):
+        """Keep the lease for ``ttl`` seconds for other tasks of the same job to renew and release"""
+        self.stop_heartbeat()
+        self.ttl = ttl
+        self.renew()
+
+    def release(self):
+        """Stop the heartbeat and drop the lease if this job still holds it"""
+        self.stop_heartbeat()
+        try:
+            self.redis.eval(RELEASE_LEASE_SCRIPT, 1, self.key, self.job_id)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release sync lease for job {self.job_id}: {e}")
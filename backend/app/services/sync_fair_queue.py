@@ -0,0 +1,233 @@
+"""Fair Sync Queues
+
+Weighted fair scheduling of NORMAL/LOW sync jobs across tenants. Instead of
+going straight to the per-type Celery queue, where thousands of jobs from
+one tenant delay everyone else's, jobs wait in a Redis list per tenant
+(``sync:fair:<queue>:t:<tenant>``). A dispatcher keeps the Celery queue only
+``SYNC_FAIR_QUEUE_DEPTH`` messages deep and refills it by deficit round
+robin over the tenants with waiting jobs: on its turn a tenant earns its
+plan weight in credit and releases one job per whole credit. A small
+tenant's job therefore waits for about one round, whatever large tenants
+have queued.
+
+The dispatcher runs when jobs are queued, when a sync task starts, and
+every ``SYNC_FAIR_PUMP_INTERVAL`` seconds as a fallback.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+from app.core.celery_config import SYNC_PRIORITY_STEPS, celery_app
+from app.services.sync_coalescing import RELEASE_LEASE_SCRIPT
+from app.services.sync_progress import get_progress_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FAIR_KEY_PREFIX = "sync:fair:"
+FAIR_QUEUES = ("sync_products", "sync_inventory", "sync_orders")
+WEIGHTS_KEY = "sync:fair:weights"
+
+# Weights below this would take many empty turns to release a job
+MIN_WEIGHT = 0.1
+
+# Removes a tenant from the ring only if no job was queued for it meanwhile
+RETIRE_TENANT_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+def _tenant_key(queue: str, tenant_id: str) -> str:
+    return f"{FAIR_KEY_PREFIX}{queue}:t:{tenant_id}"
+
+def _ring_key(queue: str) -> str:
+    return f"{FAIR_KEY_PREFIX}{queue}:ring"
+
+def _deficit_key(queue: str) -> str:
+    return f"{FAIR_KEY_PREFIX}{queue}:deficit"
+
+def _lock_key(queue: str) -> str:
+    return f"{FAIR_KEY_PREFIX}{queue}:lock"
+
+def encode_message(task: str, job_id: str, task_id: str, priority: int) -> str:
+    """Serialize a queued task; deterministic so a cancelled job can be removed by value"""
+    return json.dumps({"task": task, "args": [job_id], "task_id": task_id, "priority": priority}, sort_keys=True)
+
+def plan_dispatch(ring: List[str], deficits: Dict[str, float], weights: Dict[str, float],
+                  backlog: Dict[str, int], budget: int) -> Tuple[List[str], Dict[str, float], List[str]]:
+    """Deficit round robin over the tenant ring
+
+    Returns the tenant of each job to release, in release order, the
+    updated deficits and the ring order for the next dispatch. Tenants whose
+    backlog runs out leave the ring and lose their leftover credit.
+    """
+    ring = deque(tenant_id for tenant_id in ring if backlog.get(tenant_id, 0) > 0)
+    deficits = {tenant_id: deficits.get(tenant_id, 0.0) for tenant_id in ring}
+    backlog = dict(backlog)
+    picks: List[str] = []
+
+    while budget > 0 and ring:
+        tenant_id = ring[0]
+        if deficits[tenant_id] < 1:
+            deficits[tenant_id] += max(weights.get(tenant_id, 1.0), MIN_WEIGHT)
+
+        while budget > 0 and backlog[tenant_id] > 0 and deficits[tenant_id] >= 1:
+            picks.append(tenant_id)
+            backlog[tenant_id] -= 1
+            deficits[tenant_id] -= 1
+            budget -= 1
+
+        if backlog[tenant_id] == 0:
+            ring.popleft()
+            del deficits[tenant_id]
+        elif deficits[tenant_id] < 1:
+            ring.rotate(-1)
+        # Otherwise the budget ran out mid-turn and the tenant keeps the head
+
+    return picks, deficits, list(ring)
+
+class FairSyncQueue:
+    """Per-tenant sub-queues in front of the per-type Celery queues"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None,
+                 broker_client: Optional[redis.Redis] = None,
+                 publish: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.redis = redis_client or get_progress_redis()
+        self.broker = broker_client or redis.from_url(settings.CELERY_BROKER_URL, decode_responses=True)
+        self.publish = publish or _send_task
+
+    def push(self, queue: str, tenant_id: str, weight: float, messages: List[str]):
+        """Queue messages behind the tenant's other jobs and put the tenant in the ring"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(_tenant_key(queue, tenant_id), *messages)
+        pipe.zadd(_ring_key(queue), {tenant_id: time.time()}, nx=True)
+        pipe.hset(WEIGHTS_KEY, tenant_id, weight)
+        pipe.execute()
+
+    def discard(self, queue: str, tenant_id: str, message: str) -> bool:
+        """Drop a job that hasn't been released to Celery yet"""
+        try:
+            return bool(self.redis.lrem(_tenant_key(queue, tenant_id), 1, message))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to discard fair queued task from {queue}: {e}")
+            return False
+
+    def broker_depth(self, queue: str) -> int:
+        """Messages waiting in the Celery queue (one Redis list per priority step)"""
+        pipe = self.broker.pipeline(transaction=False)
+        for step in sorted(SYNC_PRIORITY_STEPS.values()):
+            pipe.llen(queue if step == 0 else f"{queue}:{step}")
+        return sum(pipe.execute())
+
+    def dispatch(self, queue: str) -> int:
+        """Top the Celery queue up to ``SYNC_FAIR_QUEUE_DEPTH``; returns the jobs released
+
+        Only one dispatcher per queue runs at a time; the others skip, since
+        the one running is refilling the same queue.
+        """
+        token = str(uuid.uuid4())
+        try:
+            if not self.redis.set(_lock_key(queue), token, nx=True, px=settings.SYNC_FAIR_LOCK_TTL_MS):
+                return 0
+        except redis.RedisError as e:
+            logger.warning(f"Failed to dispatch fair queue {queue}: {e}")
+            return 0
+
+        try:
+            return self._dispatch(queue)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to dispatch fair queue {queue}: {e}")
+            return 0
+        finally:
+            try:
+                self.redis.eval(RELEASE_LEASE_SCRIPT, 1, _lock_key(queue), token)
+            except redis.RedisError:
+                pass
+
+    def _dispatch(self, queue: str) -> int:
+        budget = settings.SYNC_FAIR_QUEUE_DEPTH - self.broker_depth(queue)
+        if budget <= 0:
+            return 0
+
+        ring = self.redis.zrange(_ring_key(queue), 0, -1)
+        if not ring:
+            return 0
+
+        pipe = self.redis.pipeline(transaction=False)
+        for tenant_id in ring:
+            pipe.llen(_tenant_key(queue, tenant_id))
+        pipe.hmget(_deficit_key(queue), ring)
+        pipe.hmget(WEIGHTS_KEY, ring)
+        *lengths, raw_deficits, raw_weights = pipe.execute()
+
+        backlog = dict(zip(ring, lengths))
+        deficits = {t: float(d) for t, d in zip(ring, raw_deficits) if d is not None}
+        weights = {t: float(w) for t, w in zip(ring, raw_weights) if w is not None}
+        picks, deficits, next_ring = plan_dispatch(ring, deficits, weights, backlog, budget)
+
+        counts: Dict[str, int] = defaultdict(int)
+        for tenant_id in picks:
+            counts[tenant_id] += 1
+        pipe = self.redis.pipeline(transaction=False)
+        for tenant_id, count in counts.items():
+            pipe.lpop(_tenant_key(queue, tenant_id), count)
+        popped = {tenant_id: deque(messages or []) for tenant_id, messages in zip(counts, pipe.execute())}
+
+        released = 0
+        for tenant_id in picks:
+            if not popped[tenant_id]:
+                continue
+            try:
+                self.publish(json.loads(popped[tenant_id][0]))
+            except Exception as e:
+                logger.error(f"Failed to release fair queued task to {queue}: {e}")
+                break
+            popped[tenant_id].popleft()
+            released += 1
+
+        # Unreleased jobs go back to the head of their sub-queue, in order
+        for tenant_id, messages in popped.items():
+            if messages:
+                self.redis.lpush(_tenant_key(queue, tenant_id), *reversed(messages))
+
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        if deficits:
+            pipe.hset(_deficit_key(queue), mapping=deficits)
+        if next_ring:
+            # Scores only order the ring; tenants that joined meanwhile keep theirs
+            pipe.zadd(_ring_key(queue), {
+                tenant_id: now + position / 1000 for position, tenant_id in enumerate(next_ring)
+            }, xx=True)
+        for tenant_id in set(ring) - set(next_ring):
+            pipe.eval(RETIRE_TENANT_SCRIPT, 3, _tenant_key(queue, tenant_id),
+                      _ring_key(queue), _deficit_key(queue), tenant_id)
+        pipe.execute()
+
+        if released:
+            logger.info(f"Released {released} sync jobs from {len(counts)} tenants to {queue}")
+        return released
+
+def _send_task(message: Dict[str, Any]):
+    celery_app.send_task(message["task"], args=message["args"], task_id=message["task_id"],
+                         priority=message["priority"])
+
+_fair_queue: Optional[FairSyncQueue] = None
+
+def get_fair_queue() -> FairSyncQueue:
+    """Get the process-wide fair sync queue"""
+    global _fair_queue
+    if _fair_queue is None:
+        _fair_queue = FairSyncQueue()
+    return _fair_queue
@@ -4,58 +4,32 @@ Orchestrates synchronization between suppliers and marketplaces using Celery tas
 """
 
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 import asyncio
-from celery import Celery
+import uuid
+from celery import group
 from celery.result import AsyncResult
+from sqlalchemy import and_, insert
 import redis
 import json
 
 from app.core.config import settings
+from app.core.celery_config import TASK_QUEUES, celery_app, sync_priority_step
 from app.infra.database import get_db
-from app.domain.models import Integration, SyncJob, SyncJobStatus
+from app.domain.models import Integration, Plan, Subscription, SubscriptionStatus, SyncJob, SyncJobStatus
+from app.services.sync_progress import read_progress, write_progress, write_progress_many
+from app.services.sync_coalescing import (
+    SyncLease, claim_queued_slot, claim_queued_slots, release_queued_slot
+)
+from app.services.sync_fair_queue import encode_message, get_fair_queue
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Celery app configuration
-celery_app = Celery(
-    'ml-bling-sync',
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL,
-    include=['app.services.sync_tasks']
-)
-
-# Celery configuration
-celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
-    timezone='UTC',
-    enable_utc=True,
-    task_track_started=True,
-    task_time_limit=30 * 60,  # 30 minutes
-    task_soft_time_limit=25 * 60,  # 25 minutes
-    worker_prefetch_multiplier=1,
-    task_acks_late=True,
-    worker_disable_rate_limits=False,
-    task_default_retry_delay=60,  # 1 minute
-    task_max_retries=3,
-    beat_schedule={
-        'sync-all-integrations': {
-            'task': 'app.services.sync_tasks.sync_all_integrations',
-            'schedule': timedelta(minutes=30),  # Every 30 minutes
-        },
-        'cleanup-old-sync-jobs': {
-            'task': 'app.services.sync_tasks.cleanup_old_sync_jobs',
-            'schedule': timedelta(hours=24),  # Daily cleanup
-        },
-    },
-)
-
 # Redis client for queue management
 redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
@@ -82,18 +56,39 @@ class SyncOrchestrator:
     def __init__(self):
         self.redis = redis_client
         self.celery = celery_app
+        self.fair_queue = get_fair_queue()
         
     async def queue_sync(self, request: SyncRequest) -> str:
-        """Queue a synchronization task"""
+        """Queue a synchronization task
+
+        An identical request already waiting in the queue for the same
+        integration and sync type, at the same or a more urgent priority,
+        absorbs this one; its job id is returned.
+        """
+        job_id = str(uuid.uuid4())
+        task_id = str(uuid.uuid4())
+        claimed = False
+        if self._coalesces(request):
+            merged_into = claim_queued_slot(
+                request.integration_id, request.sync_type, job_id, request.options, self.redis,
+                priority=request.priority.value
+            )
+            if merged_into:
+                logger.info(f"Sync request for {request.integration_id} ({request.sync_type}) merged into queued job {merged_into}")
+                return merged_into
+            claimed = True
+        
         try:
             # Create sync job record
             db = next(get_db())
             sync_job = SyncJob(
+                id=job_id,
                 integration_id=request.integration_id,
                 sync_type=request.sync_type,
                 status=SyncJobStatus.QUEUED,
                 priority=request.priority.value,
                 options=request.options or {},
+                task_id=task_id,
                 scheduled_at=request.scheduled_at or datetime.utcnow(),
                 user_id=request.user_id
             )
@@ -101,40 +96,59 @@ class SyncOrchestrator:
             db.commit()
             db.refresh(sync_job)
             
-            # Queue Celery task
-            task_name = f"app.services.sync_tasks.sync_{request.sync_type}"
-            
-            if request.scheduled_at and request.scheduled_at > datetime.utcnow():
-                # Schedule for later
-                task = self.celery.send_task(
-                    task_name,
-                    args=[sync_job.id],
-                    eta=request.scheduled_at,
-                    priority=self._get_celery_priority(request.priority)
-                )
-            else:
-                # Execute immediately
-                task = self.celery.send_task(
-                    task_name,
-                    args=[sync_job.id],
-                    priority=self._get_celery_priority(request.priority)
-                )
+            # Queue Celery task, through the tenant's fair queue unless urgent or scheduled
+            self._publish(db, [(request, sync_job.id, task_id)])
             
-            # Update job with task ID
-            sync_job.task_id = task.id
-            db.commit()
+            # Seed the progress hash so status reads can skip the database
+            write_progress(sync_job.id, {
+                "id": sync_job.id,
+                "integration_id": sync_job.integration_id,
+                "sync_type": sync_job.sync_type,
+                "status": SyncJobStatus.QUEUED.value,
+                "priority": sync_job.priority,
+                "created_at": sync_job.created_at.isoformat() if sync_job.created_at else datetime.utcnow().isoformat(),
+                "task_id": task_id,
+                "progress": 0
+            }, self.redis)
             
-            logger.info(f"Sync job queued: {sync_job.id} (task: {task.id})")
+            logger.info(f"Sync job queued: {sync_job.id} (task: {task_id})")
             return sync_job.id
             
         except Exception as e:
+            if claimed:
+                release_queued_slot(request.integration_id, request.sync_type, job_id, self.redis)
             logger.error(f"Failed to queue sync job: {e}")
             raise
         finally:
             db.close()
     
     async def get_sync_status(self, job_id: str) -> Dict[str, Any]:
-        """Get status of a sync job"""
+        """Get status of a sync job, from the Redis progress hash when available"""
+        cached = read_progress(job_id, self.redis)
+        if cached and cached.get("integration_id"):
+            result = {
+                "id": job_id,
+                "integration_id": cached["integration_id"],
+                "sync_type": cached.get("sync_type"),
+                "status": cached.get("status"),
+                "priority": cached.get("priority"),
+                "created_at": cached.get("created_at"),
+                "updated_at": cached.get("updated_at"),
+                "progress": cached.get("progress", 0),
+                "processed": cached.get("processed"),
+                "total": cached.get("total"),
+                "message": cached.get("message"),
+                "result": cached.get("result"),
+                "error_message": cached.get("error_message")
+            }
+            
+            if cached.get("task_id"):
+                celery_result = AsyncResult(cached["task_id"], app=self.celery)
+                result["celery_status"] = celery_result.status
+                result["celery_info"] = celery_result.info
+            
+            return result
+        
         try:
             db = next(get_db())
             sync_job = db.query(SyncJob).filter(SyncJob.id == job_id).first()
@@ -187,6 +201,20 @@ class SyncOrchestrator:
             sync_job.status = SyncJobStatus.CANCELLED
             sync_job.completed_at = datetime.utcnow()
             db.commit()
+            write_progress(job_id, {"status": SyncJobStatus.CANCELLED.value}, self.redis)
+            
+            # A job still waiting for its tenant's turn must not reach a worker at all
+            queue = TASK_QUEUES.get(self._task_name(sync_job.sync_type))
+            integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
+            if queue and integration and sync_job.task_id:
+                self.fair_queue.discard(queue, integration.tenant_id, encode_message(
+                    self._task_name(sync_job.sync_type), job_id, sync_job.task_id,
+                    sync_priority_step(sync_job.priority)
+                ))
+            
+            # A terminated worker can't clean up, so free the job's slot and lease here
+            release_queued_slot(sync_job.integration_id, sync_job.sync_type, job_id, self.redis)
+            SyncLease(sync_job.integration_id, sync_job.sync_type, job_id, self.redis).release()
             
             logger.info(f"Sync job cancelled: {job_id}")
             return True
@@ -216,9 +244,9 @@ class SyncOrchestrator:
             
             return {
                 "celery": {
-                    "active_tasks": len(active_tasks.get('celery@worker', [])) if active_tasks else 0,
-                    "scheduled_tasks": len(scheduled_tasks.get('celery@worker', [])) if scheduled_tasks else 0,
-                    "reserved_tasks": len(reserved_tasks.get('celery@worker', [])) if reserved_tasks else 0
+                    "active_tasks": sum(len(tasks) for tasks in active_tasks.values()) if active_tasks else 0,
+                    "scheduled_tasks": sum(len(tasks) for tasks in scheduled_tasks.values()) if scheduled_tasks else 0,
+                    "reserved_tasks": sum(len(tasks) for tasks in reserved_tasks.values()) if reserved_tasks else 0
                 },
                 "database": {
                     "total_jobs": total_jobs,
@@ -235,32 +263,178 @@ class SyncOrchestrator:
         finally:
             db.close()
     
+    def queue_bulk_sync(self, requests: List[SyncRequest]) -> List[str]:
+        """Queue many sync tasks at once
+
+        All ``SyncJob`` rows go in with one multi-row INSERT, task ids are
+        assigned up front so no follow-up UPDATE is needed, and the tasks are
+        published together: NORMAL/LOW ones into their tenants' fair queues,
+        the rest as a single Celery group over one broker connection.
+        Synchronous so it can run inside Celery tasks as well.
+        """
+        if not requests:
+            return []
+        
+        now = datetime.utcnow()
+        rows = []
+        queued = []
+        job_ids = [str(uuid.uuid4()) for _ in requests]
+        
+        # Requests matching an already queued job merge into it instead of adding a row
+        coalescing = [i for i, request in enumerate(requests) if self._coalesces(request)]
+        merged_into = dict(zip(coalescing, claim_queued_slots([
+            (requests[i].integration_id, requests[i].sync_type, job_ids[i], requests[i].options,
+             requests[i].priority.value)
+            for i in coalescing
+        ], self.redis))) if coalescing else {}
+        
+        for i, request in enumerate(requests):
+            if merged_into.get(i):
+                job_ids[i] = merged_into[i]
+                continue
+            
+            job_id = job_ids[i]
+            task_id = str(uuid.uuid4())
+            rows.append({
+                "id": job_id,
+                "integration_id": request.integration_id,
+                "sync_type": request.sync_type,
+                "status": SyncJobStatus.QUEUED,
+                "priority": request.priority.value,
+                "task_id": task_id,
+                "progress": 0,
+                "options": request.options or {},
+                "scheduled_at": request.scheduled_at or now,
+                "user_id": request.user_id
+            })
+            queued.append((request, job_id, task_id))
+        
+        if not rows:
+            logger.info(f"Bulk sync: all {len(requests)} requests merged into queued jobs")
+            return job_ids
+        
+        db = next(get_db())
+        try:
+            try:
+                # Core insert: the ORM unit of work would flush one row at a time
+                db.execute(insert(SyncJob.__table__), rows)
+                db.commit()
+            except Exception:
+                for i in coalescing:
+                    if not merged_into.get(i):
+                        release_queued_slot(requests[i].integration_id, requests[i].sync_type, job_ids[i], self.redis)
+                raise
+            
+            self._publish(db, queued)
+        finally:
+            db.close()
+        
+        write_progress_many({
+            row["id"]: {
+                "id": row["id"],
+                "integration_id": row["integration_id"],
+                "sync_type": row["sync_type"],
+                "status": SyncJobStatus.QUEUED.value,
+                "priority": row["priority"],
+                "created_at": now.isoformat(),
+                "task_id": row["task_id"],
+                "progress": 0
+            }
+            for row in rows
+        }, self.redis)
+        
+        logger.info(f"Bulk queued {len(rows)} sync jobs ({len(requests) - len(rows)} merged into queued jobs)")
+        return job_ids
+    
     async def schedule_bulk_sync(self, integration_ids: List[str], sync_type: str, 
                                 priority: SyncPriority = SyncPriority.NORMAL) -> List[str]:
         """Schedule bulk synchronization for multiple integrations"""
-        job_ids = []
-        
-        for integration_id in integration_ids:
-            request = SyncRequest(
+        job_ids = self.queue_bulk_sync([
+            SyncRequest(
                 integration_id=integration_id,
                 sync_type=sync_type,
                 priority=priority
             )
-            job_id = await self.queue_sync(request)
-            job_ids.append(job_id)
+            for integration_id in integration_ids
+        ])
         
         logger.info(f"Scheduled bulk sync: {len(job_ids)} jobs for {sync_type}")
         return job_ids
     
-    def _get_celery_priority(self, priority: SyncPriority) -> int:
-        """Convert sync priority to Celery priority"""
-        priority_map = {
-            SyncPriority.LOW: 1,
-            SyncPriority.NORMAL: 5,
-            SyncPriority.HIGH: 8,
-            SyncPriority.URGENT: 10
+    def _publish(self, db, jobs: List[Tuple[SyncRequest, str, str]]):
+        """Send queued jobs to Celery; NORMAL/LOW ones wait their tenant's turn in a fair queue"""
+        direct = [job for job in jobs if not self._fair_queue_for(job[0])]
+        fair = [job for job in jobs if self._fair_queue_for(job[0])]
+        
+        if fair:
+            tenants = self._tenant_weights(db, [request.integration_id for request, _, _ in fair])
+            grouped = defaultdict(list)
+            for request, job_id, task_id in fair:
+                tenant_id, weight = tenants.get(request.integration_id, (request.integration_id, 1.0))
+                grouped[(self._fair_queue_for(request), tenant_id, weight)].append((request, job_id, task_id))
+            
+            for (queue, tenant_id, weight), tenant_jobs in grouped.items():
+                try:
+                    self.fair_queue.push(queue, tenant_id, weight, [
+                        encode_message(self._task_name(request.sync_type), job_id, task_id,
+                                       self._get_celery_priority(request.priority))
+                        for request, job_id, task_id in tenant_jobs
+                    ])
+                except redis.RedisError as e:
+                    # Unfair beats not queued at all
+                    logger.warning(f"Failed to fair queue {len(tenant_jobs)} sync jobs, publishing directly: {e}")
+                    direct.extend(tenant_jobs)
+            
+            for queue in {queue for queue, _, _ in grouped}:
+                self.fair_queue.dispatch(queue)
+        
+        if direct:
+            signatures = []
+            for request, job_id, task_id in direct:
+                options = {"task_id": task_id, "priority": self._get_celery_priority(request.priority)}
+                if request.scheduled_at and request.scheduled_at > datetime.utcnow():
+                    options["eta"] = request.scheduled_at
+                signatures.append(self.celery.signature(self._task_name(request.sync_type), args=[job_id], **options))
+            group(signatures).apply_async()
+    
+    def _fair_queue_for(self, request: SyncRequest) -> Optional[str]:
+        """Celery queue a request is fair queued for, or None to publish it directly
+
+        URGENT/HIGH jobs go to their reserved queues and scheduled ones keep
+        their own ETA, so only NORMAL/LOW jobs due now wait for their turn.
+        """
+        if not settings.SYNC_FAIR_QUEUES_ENABLED or not self._coalesces(request) \
+                or request.priority in (SyncPriority.HIGH, SyncPriority.URGENT):
+            return None
+        return TASK_QUEUES.get(self._task_name(request.sync_type))
+    
+    def _tenant_weights(self, db, integration_ids: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Tenant and fair queue weight (from ``SYNC_FAIR_PLAN_WEIGHTS``) of each integration"""
+        rows = (
+            db.query(Integration.id, Integration.tenant_id, Plan.name)
+            .outerjoin(Subscription, and_(
+                Subscription.tenant_id == Integration.tenant_id,
+                Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING])
+            ))
+            .outerjoin(Plan, Plan.id == Subscription.plan_id)
+            .filter(Integration.id.in_(set(integration_ids)))
+            .all()
+        )
+        return {
+            integration_id: (tenant_id, settings.SYNC_FAIR_PLAN_WEIGHTS.get((plan or 'starter').lower(), 1.0))
+            for integration_id, tenant_id, plan in rows
         }
-        return priority_map.get(priority, 5)
+    
+    def _task_name(self, sync_type: str) -> str:
+        return f"app.services.sync_tasks.sync_{sync_type}"
+    
+    def _coalesces(self, request: SyncRequest) -> bool:
+        """Whether a request may merge into a queued job (scheduled ones keep their own ETA)"""
+        return not (request.scheduled_at and request.scheduled_at > datetime.utcnow())
+    
+    def _get_celery_priority(self, priority: SyncPriority) -> int:
+        """Convert sync priority to Celery priority (URGENT/HIGH also route to their own queues)"""
+        return sync_priority_step(priority.value)
 
 # Global orchestrator instance
 orchestrator = SyncOrchestrator()
\ No newline at end of file
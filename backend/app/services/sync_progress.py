@@ -0,0 +1,124 @@
+"""Sync Progress Channel
+
+Coalesced progress reporting for sync jobs. Workers write progress to a Redis
+hash per job (``sync:progress:<job_id>``) on every update, and only write it
+through to the ``SyncJob`` row and the Celery result backend every
+``SYNC_PROGRESS_FLUSH_INTERVAL`` seconds. State transitions are recorded
+immediately. Status reads check the hash before falling back to Postgres.
+Updates are also published on the sync event bus for WebSocket clients.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.infra.event_bus import SyncEventPublisher, get_event_publisher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "sync:progress:"
+
+_redis_client: Optional[redis.Redis] = None
+
+def get_progress_redis() -> redis.Redis:
+    """Get the Redis client used for job progress"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
+def _progress_key(job_id: str) -> str:
+    return f"{PROGRESS_KEY_PREFIX}{job_id}"
+
+def write_progress(job_id: str, fields: Dict[str, Any], redis_client: Optional[redis.Redis] = None) -> bool:
+    """Merge ``fields`` into the job's progress hash; returns False if Redis is unavailable"""
+    return write_progress_many({job_id: fields}, redis_client)
+
+def write_progress_many(updates: Dict[str, Dict[str, Any]], redis_client: Optional[redis.Redis] = None) -> bool:
+    """Merge fields into several jobs' progress hashes in one round trip"""
+    client = redis_client or get_progress_redis()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for job_id, fields in updates.items():
+            pipe.hset(_progress_key(job_id), mapping={
+                name: json.dumps(value, default=str) for name, value in fields.items()
+            })
+            pipe.expire(_progress_key(job_id), settings.SYNC_PROGRESS_TTL)
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        logger.warning(f"Failed to write progress for {len(updates)} sync jobs: {e}")
+        return False
+
+def increment_progress(job_id: str, field: str, amount: int,
+                       redis_client: Optional[redis.Redis] = None) -> Optional[int]:
+    """Atomically add to a numeric progress field (chunks of one job share it)"""
+    client = redis_client or get_progress_redis()
+    try:
+        # JSON-encoded integers are plain digits, so HINCRBY works on them
+        return client.hincrby(_progress_key(job_id), field, amount)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to increment {field} for sync job {job_id}: {e}")
+        return None
+
+def read_progress(job_id: str, redis_client: Optional[redis.Redis] = None) -> Optional[Dict[str, Any]]:
+    """Read the job's progress hash, or None when it is missing or Redis is down"""
+    client = redis_client or get_progress_redis()
+    try:
+        raw = client.hgetall(_progress_key(job_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read progress for sync job {job_id}: {e}")
+        return None
+
+    if not raw:
+        return None
+    return {name: json.loads(value) for name, value in raw.items()}
+
+class ProgressChannel:
+    """Buffers a running job's progress in Redis and flushes it periodically"""
+
+    def __init__(self, job_id: str, on_flush: Callable[[Dict[str, Any]], None],
+                 redis_client: Optional[redis.Redis] = None, flush_interval: Optional[float] = None,
+                 publisher: Optional[SyncEventPublisher] = None):
+        self.job_id = job_id
+        self.on_flush = on_flush
+        self.redis = redis_client
+        self.publisher = publisher or get_event_publisher()
+        self.flush_interval = settings.SYNC_PROGRESS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.state: Dict[str, Any] = {}
+        self.last_flush = time.monotonic()
+
+    def update(self, **fields):
+        """Record progress fields; flushes to the database at most once per interval"""
+        self.state.update(fields, updated_at=datetime.utcnow().isoformat())
+        # The publisher coalesces these, so clients see a few updates per second at most
+        self.publisher.publish({"job_id": self.job_id, **fields})
+
+        # If Redis is down the database is the only place progress can go
+        if not write_progress(self.job_id, self.state, self.redis) \
+                or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def transition(self, status: str, **fields):
+        """Record a state change right away
+
+        The caller persists the ``SyncJob`` row as part of the transition, so
+        this only resets the flush timer instead of calling ``on_flush``.
+        """
+        self.state.update(fields, status=status, updated_at=datetime.utcnow().isoformat())
+        write_progress(self.job_id, self.state, self.redis)
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        """Write the current snapshot through ``on_flush``"""
+        self.last_flush = time.monotonic()
+        try:
+            self.on_flush(dict(self.state))
+        except Exception as e:
+            logger.warning(f"Failed to flush progress for sync job {self.job_id}: {e}")
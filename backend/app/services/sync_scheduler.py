@@ -0,0 +1,188 @@
+"""Adaptive Sync Scheduler
+
+Per-integration scheduling of periodic product syncs. Instead of syncing
+every integration at the same wall-clock moment, each integration gets its
+own next-run time in a Redis sorted set (``sync:schedule``):
+
+* The interval follows the integration's observed change rate (products
+  created or updated per hour, smoothed across runs), aiming for about
+  ``SYNC_SCHEDULE_TARGET_CHANGES`` changes per run, clamped between
+  ``SYNC_SCHEDULE_MIN_INTERVAL`` and ``SYNC_SCHEDULE_MAX_INTERVAL``.
+* Consecutive failures back the interval off exponentially.
+* New integrations get a stable phase within the base interval and every
+  interval is jittered, so runs spread evenly instead of bunching up.
+
+A beat task ticks every ``SYNC_SCHEDULER_TICK`` seconds and queues the
+integrations that are due, capped per tick so a backlog drains gradually.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+import redis
+
+from app.core.config import settings
+from app.services.sync_progress import get_progress_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEDULE_KEY = "sync:schedule"
+SCHEDULE_STATE_KEY = "sync:schedule:state"
+
+# Failures double the interval up to this many times
+MAX_BACKOFF_STEPS = 6
+
+@dataclass
+class ScheduleState:
+    """What the scheduler has learned about an integration"""
+    change_rate: Optional[float] = None  # changes per hour; None until two runs succeeded
+    failures: int = 0  # consecutive failed runs
+    last_success_at: Optional[float] = None  # epoch seconds
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "ScheduleState":
+        if not raw:
+            return cls()
+        try:
+            return cls(**json.loads(raw))
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid sync schedule state: {raw}")
+            return cls()
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+def next_interval(state: ScheduleState) -> float:
+    """Seconds until the integration should sync again"""
+    if state.change_rate is None:
+        interval = float(settings.SYNC_SCHEDULE_BASE_INTERVAL)
+    elif state.change_rate <= 0:
+        interval = float(settings.SYNC_SCHEDULE_MAX_INTERVAL)
+    else:
+        interval = settings.SYNC_SCHEDULE_TARGET_CHANGES / state.change_rate * 3600
+
+    if state.failures:
+        interval *= 2 ** min(state.failures, MAX_BACKOFF_STEPS)
+
+    return min(max(interval, settings.SYNC_SCHEDULE_MIN_INTERVAL), settings.SYNC_SCHEDULE_MAX_INTERVAL)
+
+def record_outcome(state: ScheduleState, changes: int, success: bool, now: float) -> ScheduleState:
+    """Fold a finished run into the integration's state"""
+    if not success:
+        return ScheduleState(state.change_rate, state.failures + 1, state.last_success_at)
+
+    change_rate = state.change_rate
+    if state.last_success_at is not None:
+        # Changes accumulated since the previous successful run
+        elapsed_hours = max(now - state.last_success_at, 60) / 3600
+        observed = changes / elapsed_hours
+        alpha = settings.SYNC_SCHEDULE_RATE_SMOOTHING
+        change_rate = observed if change_rate is None else alpha * observed + (1 - alpha) * change_rate
+
+    return ScheduleState(change_rate, 0, now)
+
+def initial_offset(integration_id: str) -> float:
+    """Stable phase within the base interval, so new integrations don't start together"""
+    digest = hashlib.sha1(integration_id.encode()).hexdigest()
+    return int(digest[:8], 16) / 0xFFFFFFFF * settings.SYNC_SCHEDULE_BASE_INTERVAL
+
+class AdaptiveSyncScheduler:
+    """Keeps the next-run time of every active integration in Redis"""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, rng: Optional[random.Random] = None):
+        self.redis = redis_client or get_progress_redis()
+        self.rng = rng or random.Random()
+
+    def _jittered(self, interval: float) -> float:
+        jitter = settings.SYNC_SCHEDULE_JITTER
+        return interval * self.rng.uniform(1 - jitter, 1 + jitter)
+
+    def dispatch_limit(self, active_count: int) -> int:
+        """Most integrations to queue per tick: the rate if all of them were busy"""
+        return max(1, math.ceil(active_count * settings.SYNC_SCHEDULER_TICK / settings.SYNC_SCHEDULE_MIN_INTERVAL))
+
+    def load_states(self, integration_ids: List[str]) -> Dict[str, ScheduleState]:
+        """Read the learned state of several integrations in one call"""
+        if not integration_ids:
+            return {}
+        raw = self.redis.hmget(SCHEDULE_STATE_KEY, integration_ids)
+        return {
+            integration_id: ScheduleState.from_json(value)
+            for integration_id, value in zip(integration_ids, raw)
+        }
+
+    def register(self, integration_ids: Iterable[str], now: Optional[float] = None):
+        """Schedule newly active integrations and forget inactive ones"""
+        now = time.time() if now is None else now
+        active = set(integration_ids)
+        scheduled = set(self.redis.zrange(SCHEDULE_KEY, 0, -1))
+
+        pipe = self.redis.pipeline(transaction=False)
+        added = active - scheduled
+        if added:
+            pipe.zadd(SCHEDULE_KEY, {
+                integration_id: now + initial_offset(integration_id) for integration_id in added
+            }, nx=True)
+        removed = scheduled - active
+        if removed:
+            pipe.zrem(SCHEDULE_KEY, *removed)
+            pipe.hdel(SCHEDULE_STATE_KEY, *removed)
+        pipe.execute()
+
+        if added or removed:
+            logger.info(f"Sync schedule: {len(added)} integrations added, {len(removed)} removed")
+
+    def pop_due(self, limit: int, now: Optional[float] = None) -> List[str]:
+        """Return up to ``limit`` due integrations, most overdue first
+
+        Each one is immediately pushed to a provisional next run so later
+        ticks don't queue it again; the outcome of the run reschedules it
+        from its completion time.
+        """
+        now = time.time() if now is None else now
+        due = self.redis.zrangebyscore(SCHEDULE_KEY, '-inf', now, start=0, num=limit)
+        if not due:
+            return []
+
+        states = self.load_states(due)
+        self.redis.zadd(SCHEDULE_KEY, {
+            integration_id: now + self._jittered(next_interval(states[integration_id]))
+            for integration_id in due
+        }, xx=True)
+        return due
+
+    def record(self, integration_id: str, changes: int, success: bool, now: Optional[float] = None) -> float:
+        """Learn from a finished run and reschedule the integration; returns the next run time"""
+        now = time.time() if now is None else now
+        state = record_outcome(self.load_states([integration_id])[integration_id], changes, success, now)
+        next_run = now + self._jittered(next_interval(state))
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(SCHEDULE_STATE_KEY, integration_id, state.to_json())
+        # Only reschedule integrations the scheduler knows; manual syncs of others are ignored
+        pipe.zadd(SCHEDULE_KEY, {integration_id: next_run}, xx=True)
+        pipe.execute()
+        return next_run
+
+_scheduler: Optional[AdaptiveSyncScheduler] = None
+
+def get_sync_scheduler() -> AdaptiveSyncScheduler:
+    """Get the process-wide sync scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AdaptiveSyncScheduler()
+    return _scheduler
+
+def record_sync_outcome(integration_id: str, changes: int, success: bool):
+    """Feed a finished product sync into the scheduler (never raises)"""
+    try:
+        get_sync_scheduler().record(integration_id, changes, success)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to record sync outcome for {integration_id}: {e}")
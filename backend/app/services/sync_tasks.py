@@ -4,49 +4,85 @@ Background tasks for product, inventory, and order synchronization.
 """
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
-from celery import current_task
-import asyncio
+from celery import current_task, chord
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from celery.signals import task_prerun, worker_process_shutdown
+from sqlalchemy import func
 import sys
 import os
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.sync_orchestrator import celery_app
+from app.core.config import settings
+from app.core.celery_config import TASK_QUEUES, celery_app, sync_priority_step
 from app.infra.database import get_db
-from app.domain.models import SyncJob, SyncJobStatus, Integration
-from app.infra.websockets import broadcast_sync_update
+from app.domain.models import SyncJob, SyncJobStatus, Integration, IntegrationStatus, Product
+from app.infra.event_bus import publish_sync_event
+from app.infra.http_client import on_task_thread, run_async, close_http_clients
+from app.connectors import get_cached_connector
+from app.services.product_import import ProductImportPipeline, chunk_checkpoint, update_inventory
+from app.services.sync_chunks import plan_product_chunks, merge_import_results
+from app.services.sync_watermarks import plan_sync_window, advance_watermark
+from app.services.sync_progress import ProgressChannel, write_progress, increment_progress
+from app.services.sync_coalescing import SyncLease
+from app.services.sync_scheduler import get_sync_scheduler, record_sync_outcome
+from app.services.sync_fair_queue import FAIR_QUEUES, get_fair_queue
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Import connectors dynamically
-def get_connector(integration_type: str, config: Dict[str, Any]):
-    """Get connector instance based on integration type"""
-    if integration_type == 'shopify':
-        from src.connectors.shopify.ShopifyConnector import ShopifyConnector
-        connector = ShopifyConnector()
-        connector.configure(config)
-        return connector
-    elif integration_type == 'nuvemshop':
-        from src.connectors.nuvemshop.NuvemShopConnector import NuvemShopConnector
-        connector = NuvemShopConnector()
-        connector.configure(config)
-        return connector
-    elif integration_type == 'bling':
-        from src.connectors.bling.BlingConnector import BlingConnector
-        connector = BlingConnector()
-        connector.configure(config)
-        return connector
-    else:
-        raise ValueError(f"Unknown integration type: {integration_type}")
+@worker_process_shutdown.connect
+def close_connector_pools(**kwargs):
+    """Close pooled connector HTTP clients when a worker process exits"""
+    try:
+        run_async(close_http_clients())
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP client pools: {e}")
+
+@task_prerun.connect
+def refill_fair_queue(task=None, **kwargs):
+    """A sync task taking a message frees a slot in its queue for the next tenant's job"""
+    queue = TASK_QUEUES.get(task.name) if task else None
+    if settings.SYNC_FAIR_QUEUES_ENABLED and queue in FAIR_QUEUES:
+        get_fair_queue().dispatch(queue)
+
+def flush_job_progress(task, db, sync_job: SyncJob, snapshot: Dict[str, Any]):
+    """Write a coalesced progress snapshot to the Celery backend and the SyncJob row"""
+    task.update_state(state='PROGRESS', meta=snapshot)
+    sync_job.progress = snapshot.get('progress', sync_job.progress)
+    db.commit()
+
+def acquire_sync_lease(task, sync_job: SyncJob) -> SyncLease:
+    """Take the single-flight lease for the job's integration and sync type
+
+    While another job of the same type runs for the integration, this job
+    stays queued and the task is retried after ``SYNC_LEASE_RETRY_DELAY``.
+    """
+    lease = SyncLease(sync_job.integration_id, sync_job.sync_type, sync_job.id)
+    if not lease.acquire():
+        logger.info(f"Sync job {sync_job.id} waiting for the running {sync_job.sync_type} sync of {sync_job.integration_id}")
+        raise task.retry(countdown=settings.SYNC_LEASE_RETRY_DELAY, max_retries=None)
+    lease.start_heartbeat()
+    return lease
+
+def continue_from_checkpoint(task, continuation: int) -> Retry:
+    """Retry ``task`` from its checkpoint after a soft time limit
+
+    Lease waits retry the task too, so ``request.retries`` can't tell how many
+    times it ran out of time; the count travels in the ``continuation`` kwarg.
+    """
+    kwargs = {**(task.request.kwargs or {}), 'continuation': continuation + 1}
+    return task.retry(kwargs=kwargs, countdown=0, max_retries=None)
 
 @celery_app.task(bind=True, name='app.services.sync_tasks.sync_products')
-def sync_products(self, job_id: str):
+def sync_products(self, job_id: str, continuation: int = 0):
     """Sync products from supplier"""
     db = next(get_db())
+    channel = None
+    lease = None
     
     try:
         # Get sync job
@@ -54,108 +90,359 @@ def sync_products(self, job_id: str):
         if not sync_job:
             raise ValueError(f"Sync job not found: {job_id}")
         
+        # A redelivered split job is already running as chunks
+        if sync_job.status == SyncJobStatus.RUNNING and (sync_job.result or {}).get('chunks'):
+            logger.info(f"Product sync {job_id} already split into chunks, skipping redelivery")
+            return sync_job.result
+        
+        # One running job per integration and sync type
+        lease = acquire_sync_lease(self, sync_job)
+        
         # Update job status
         sync_job.status = SyncJobStatus.RUNNING
         sync_job.started_at = datetime.utcnow()
         sync_job.task_id = self.request.id
         db.commit()
         
+        # Progress goes to Redis; the row is only written every few seconds and on transitions
+        channel = ProgressChannel(job_id, on_flush=lambda snapshot: flush_job_progress(self, db, sync_job, snapshot))
+        channel.transition(SyncJobStatus.RUNNING.value, progress=0, task_id=self.request.id)
+        
         # Get integration
         integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
         if not integration:
             raise ValueError(f"Integration not found: {sync_job.integration_id}")
         
         # Broadcast start event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "running",
             "message": "Starting product synchronization",
             "progress": 0
-        }))
+        })
         
         # Get connector
-        connector = get_connector(integration.type, {
+        connector = get_cached_connector(integration.type, {
             'type': integration.type,
-            'credentials': integration.credentials
+            'credentials': integration.credentials,
+            'integration_id': integration.id
         })
         
-        # Get sync options
+        # Get sync options (no limit imports the whole catalog)
         options = sync_job.options or {}
-        limit = options.get('limit', 100)
+        limit = options.get('limit')
         offset = options.get('offset', 0)
+        page_size = options.get('batch_size', settings.SYNC_BATCH_SIZE)
         
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 10, 'message': 'Connecting to supplier'})
-        sync_job.progress = 10
-        db.commit()
+        def report_progress(processed: int, total: Optional[int], message: str):
+            """Report progress in supplier items; percentage only when the total is known"""
+            progress = min(99, processed * 100 // total) if total else channel.state.get('progress', 0)
+            channel.update(progress=progress, processed=processed, total=total, message=message)
+        
+        report_progress(0, None, 'Connecting to supplier')
         
         # Test connection
-        if not connector.test_connection():
+        if not run_async(connector.check_connection()):
             raise Exception("Failed to connect to supplier")
         
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 20, 'message': 'Importing products'})
-        sync_job.progress = 20
-        db.commit()
-        
-        # Import products
-        result = connector.import_products(limit, offset)
-        
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 80, 'message': 'Processing results'})
-        sync_job.progress = 80
-        db.commit()
+        # Large catalogs can be split into page ranges imported by several workers
+        if options.get('parallel') and limit is None and not offset:
+            chunk_page_size = min(page_size, connector.max_page_size)
+            estimate = db.query(func.count(Product.id)).filter(Product.integration_id == integration.id).scalar()
+            chunks = plan_product_chunks(connector, chunk_page_size, estimate, options.get('chunks'))
+            
+            if len(chunks) > 1:
+                channel.update(processed=0, total=estimate, message=f"Split into {len(chunks)} parallel chunks")
+                
+                # The chunks renew the lease and the reduce step releases it
+                handed_off, lease = lease, None
+                handed_off.handoff(settings.SYNC_CHUNK_LEASE_TTL)
+                try:
+                    return dispatch_product_chunks(db, sync_job, chunks, chunk_page_size, estimate)
+                except Exception:
+                    handed_off.release()
+                    raise
+        
+        # Import products page by page, resuming from the checkpoint of an interrupted attempt
+        pipeline = ProductImportPipeline(
+            connector,
+            integration_id=integration.id,
+            tenant_id=integration.tenant_id,
+            page_size=page_size,
+            on_progress=on_task_thread(report_progress),
+            full_refresh=options.get('full_sync', False),
+            job_id=job_id,
+            checkpoint=sync_job.checkpoint
+        )
+        result = run_async(pipeline.run(limit=limit, offset=offset))
         
         # Update job with results
         sync_job.status = SyncJobStatus.COMPLETED if result['success'] else SyncJobStatus.FAILED
         sync_job.completed_at = datetime.utcnow()
         sync_job.progress = 100
         sync_job.result = result
+        sync_job.checkpoint = None
         
         if not result['success'] and result.get('errors'):
             sync_job.error_message = '; '.join(result['errors'])
         
+        channel.transition(sync_job.status.value, progress=100, result=result, error_message=sync_job.error_message)
         db.commit()
         
+        # Products that actually changed drive the integration's next scheduled run
+        record_sync_outcome(
+            sync_job.integration_id,
+            result['products_imported'] + result['products_updated'],
+            result['success']
+        )
+        
         # Broadcast completion event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "completed" if result['success'] else "failed",
-            "message": f"Imported {result['products_imported']} products" if result['success'] else "Sync failed",
+            "message": (
+                f"Imported {result['products_imported']} products, updated {result['products_updated']}"
+                if result['success'] else "Sync failed"
+            ),
             "progress": 100,
             "result": result
-        }))
+        })
         
-        logger.info(f"Product sync completed: {job_id} - {result}")
+        logger.info(
+            f"Product sync completed: {job_id} - {result['products_processed']} processed, "
+            f"{result['products_failed']} failed in {result['pages']} pages"
+        )
         return result
         
+    except Retry:
+        raise
+        
+    except SoftTimeLimitExceeded:
+        # Out of time: continue from the last checkpoint in a fresh task run
+        if continuation < settings.SYNC_MAX_CONTINUATIONS:
+            logger.warning(f"Product sync {job_id} hit the soft time limit, continuing from checkpoint")
+            db.rollback()
+            raise continue_from_checkpoint(self, continuation)
+        
+        sync_job.status = SyncJobStatus.FAILED
+        sync_job.completed_at = datetime.utcnow()
+        sync_job.error_message = f"Time limit exceeded after {continuation} continuations"
+        if channel:
+            channel.transition(SyncJobStatus.FAILED.value, error_message=sync_job.error_message)
+        db.commit()
+        record_sync_outcome(sync_job.integration_id, 0, False)
+        logger.error(f"Product sync failed: {job_id} - {sync_job.error_message}")
+        raise
+        
     except Exception as e:
         # Update job with error
         sync_job.status = SyncJobStatus.FAILED
         sync_job.completed_at = datetime.utcnow()
         sync_job.error_message = str(e)
         sync_job.progress = 0
+        if channel:
+            channel.transition(SyncJobStatus.FAILED.value, progress=0, error_message=str(e))
         db.commit()
         
         # Broadcast error event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "failed",
             "message": f"Sync failed: {str(e)}",
             "progress": 0,
             "error": str(e)
-        }))
+        })
+        
+        record_sync_outcome(sync_job.integration_id, 0, False)
         
         logger.error(f"Product sync failed: {job_id} - {e}")
         raise
     
     finally:
+        if lease:
+            lease.release()
+        db.close()
+
+def dispatch_product_chunks(db, sync_job: SyncJob, chunks: List[Tuple[int, Optional[int]]],
+                            page_size: int, estimate: int) -> Dict[str, Any]:
+    """Run a product sync as a chord of page-range imports reduced into the job"""
+    sync_job.result = {'chunks': len(chunks), 'estimated_items': estimate}
+    db.commit()
+    
+    # Chunks keep the job's priority so an URGENT sync stays on the reserved workers
+    priority = sync_priority_step(sync_job.priority)
+    chord([
+        sync_products_chunk.s(sync_job.id, index, offset, limit, page_size).set(priority=priority)
+        for index, (offset, limit) in enumerate(chunks)
+    ])(finalize_product_chunks.s(sync_job.id).set(priority=priority))
+    
+    logger.info(f"Product sync {sync_job.id} split into {len(chunks)} chunks (~{estimate} items)")
+    return sync_job.result
+
+@celery_app.task(bind=True, name='app.services.sync_tasks.sync_products_chunk')
+def sync_products_chunk(self, job_id: str, index: int, offset: int, limit: Optional[int], page_size: int,
+                        continuation: int = 0):
+    """Map step of a parallel product sync: import one page range
+
+    Failures are returned as a failed result instead of raised, so one bad
+    chunk doesn't keep the reduce step from recording the others. Each chunk
+    checkpoints its own progress in the job, so a redelivered chunk or one
+    continued after the soft time limit resumes where it stopped.
+    """
+    db = next(get_db())
+    lease = None
+    
+    try:
+        sync_job = db.query(SyncJob).filter(SyncJob.id == job_id).first()
+        if not sync_job:
+            raise ValueError(f"Sync job not found: {job_id}")
+        if sync_job.status == SyncJobStatus.CANCELLED:
+            return {'success': False, 'errors': [f"Chunk {index} skipped: job cancelled"]}
+        
+        integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
+        if not integration:
+            raise ValueError(f"Integration not found: {sync_job.integration_id}")
+        
+        # Keep the job's lease alive while this chunk runs
+        lease = SyncLease(sync_job.integration_id, sync_job.sync_type, job_id, ttl=settings.SYNC_CHUNK_LEASE_TTL)
+        lease.start_heartbeat()
+        
+        connector = get_cached_connector(integration.type, {
+            'type': integration.type,
+            'credentials': integration.credentials,
+            'integration_id': integration.id
+        })
+        options = sync_job.options or {}
+        estimate = (sync_job.result or {}).get('estimated_items')
+        reported = 0
+        
+        def report_progress(processed: int, total: Optional[int], message: str):
+            """Add this chunk's items to the job-wide counter shared by all chunks"""
+            nonlocal reported
+            done = increment_progress(job_id, 'processed', processed - reported)
+            reported = processed
+            if done is None:
+                return
+            
+            fields = {'processed': done}
+            if estimate:
+                fields['progress'] = min(99, done * 100 // estimate)
+                write_progress(job_id, {'progress': fields['progress']})
+            publish_sync_event({"job_id": job_id, **fields, "message": f"Chunk {index}: {message}"})
+        
+        pipeline = ProductImportPipeline(
+            connector,
+            integration_id=integration.id,
+            tenant_id=integration.tenant_id,
+            page_size=page_size,
+            on_progress=on_task_thread(report_progress),
+            full_refresh=options.get('full_sync', False),
+            job_id=job_id,
+            checkpoint=chunk_checkpoint(sync_job.checkpoint, index),
+            chunk_index=index
+        )
+        # A resumed chunk already counted the items before its checkpoint
+        reported = pipeline.items_seen
+        return run_async(pipeline.run(limit=limit, offset=offset))
+        
+    except Retry:
+        raise
+        
+    except SoftTimeLimitExceeded:
+        # Out of time: continue this chunk from its checkpoint; the chord waits for the retry
+        if continuation < settings.SYNC_MAX_CONTINUATIONS:
+            logger.warning(f"Product sync chunk {index} of {job_id} hit the soft time limit, continuing from checkpoint")
+            raise continue_from_checkpoint(self, continuation)
+        
+        logger.error(f"Product sync chunk {index} of {job_id} ran out of time after {continuation} continuations")
+        return {'success': False, 'errors': [f"Chunk {index} failed: time limit exceeded after {continuation} continuations"]}
+        
+    except Exception as e:
+        logger.error(f"Product sync chunk {index} of {job_id} failed: {e}")
+        return {'success': False, 'errors': [f"Chunk {index} failed: {e}"]}
+    
+    finally:
+        if lease:
+            lease.stop_heartbeat()
+        db.close()
+
+@celery_app.task(name='app.services.sync_tasks.finalize_product_chunks')
+def finalize_product_chunks(results: List[Dict[str, Any]], job_id: str):
+    """Reduce step of a parallel product sync: merge chunk results into the job"""
+    db = next(get_db())
+    sync_job = None
+    
+    try:
+        sync_job = db.query(SyncJob).filter(SyncJob.id == job_id).first()
+        if not sync_job:
+            raise ValueError(f"Sync job not found: {job_id}")
+        
+        started_at = sync_job.started_at or datetime.utcnow()
+        result = merge_import_results(results, int((datetime.utcnow() - started_at).total_seconds() * 1000))
+        
+        if sync_job.status == SyncJobStatus.CANCELLED:
+            logger.info(f"Product sync {job_id} was cancelled, discarding chunk results")
+            return result
+        
+        sync_job.status = SyncJobStatus.COMPLETED if result['success'] else SyncJobStatus.FAILED
+        sync_job.completed_at = datetime.utcnow()
+        sync_job.progress = 100
+        sync_job.result = result
+        sync_job.checkpoint = None
+        if not result['success'] and result['errors']:
+            sync_job.error_message = '; '.join(result['errors'])
+        db.commit()
+        
+        write_progress(job_id, {
+            "status": sync_job.status.value,
+            "progress": 100,
+            "result": result,
+            "error_message": sync_job.error_message
+        })
+        record_sync_outcome(
+            sync_job.integration_id,
+            result['products_imported'] + result['products_updated'],
+            result['success']
+        )
+        
+        publish_sync_event({
+            "job_id": job_id,
+            "status": sync_job.status.value,
+            "message": (
+                f"Imported {result['products_imported']} products, updated {result['products_updated']} "
+                f"in {result['chunks']} chunks"
+            ),
+            "progress": 100,
+            "result": result
+        })
+        
+        logger.info(
+            f"Parallel product sync completed: {job_id} - {result['products_processed']} processed, "
+            f"{result['products_failed']} failed in {result['chunks']} chunks"
+        )
+        return result
+        
+    except Exception as e:
+        if sync_job:
+            sync_job.status = SyncJobStatus.FAILED
+            sync_job.completed_at = datetime.utcnow()
+            sync_job.error_message = str(e)
+            db.commit()
+            write_progress(job_id, {"status": SyncJobStatus.FAILED.value, "error_message": str(e)})
+        logger.error(f"Failed to finalize product sync {job_id}: {e}")
+        raise
+    
+    finally:
+        if sync_job:
+            SyncLease(sync_job.integration_id, sync_job.sync_type, job_id).release()
         db.close()
 
 @celery_app.task(bind=True, name='app.services.sync_tasks.sync_inventory')
 def sync_inventory(self, job_id: str):
     """Sync inventory from supplier"""
     db = next(get_db())
+    channel = None
+    lease = None
     
     try:
         # Get sync job
@@ -163,52 +450,76 @@ def sync_inventory(self, job_id: str):
         if not sync_job:
             raise ValueError(f"Sync job not found: {job_id}")
         
+        # One running job per integration and sync type
+        lease = acquire_sync_lease(self, sync_job)
+        
         # Update job status
         sync_job.status = SyncJobStatus.RUNNING
         sync_job.started_at = datetime.utcnow()
         sync_job.task_id = self.request.id
         db.commit()
         
+        # Progress goes to Redis; the row is only written every few seconds and on transitions
+        channel = ProgressChannel(job_id, on_flush=lambda snapshot: flush_job_progress(self, db, sync_job, snapshot))
+        channel.transition(SyncJobStatus.RUNNING.value, progress=0, task_id=self.request.id)
+        
         # Get integration
         integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
         if not integration:
             raise ValueError(f"Integration not found: {sync_job.integration_id}")
         
         # Broadcast start event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "running",
             "message": "Starting inventory synchronization",
             "progress": 0
-        }))
+        })
         
         # Get connector
-        connector = get_connector(integration.type, {
+        connector = get_cached_connector(integration.type, {
             'type': integration.type,
-            'credentials': integration.credentials
+            'credentials': integration.credentials,
+            'integration_id': integration.id
         })
         
         # Get sync options
         options = sync_job.options or {}
         skus = options.get('skus', [])
+        window = plan_sync_window(integration.sync_cursors, 'inventory', force_full=options.get('full_sync', False))
         
         # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 20, 'message': 'Fetching inventory'})
-        sync_job.progress = 20
-        db.commit()
+        channel.update(processed=0, message='Fetching inventory')
         
-        # Fetch inventory
-        inventory = connector.fetch_inventory(skus if skus else None)
+        counts = {'fetched': 0, 'updated': 0}
+        # Coroutines may run on the async worker's shared loop; progress is written from this thread
+        report_progress = on_task_thread(channel.update)
         
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 80, 'message': 'Processing inventory data'})
-        sync_job.progress = 80
-        db.commit()
+        async def write_page(page: List[Dict[str, Any]]):
+            counts['fetched'] += len(page)
+            counts['updated'] += await update_inventory(integration.id, page)
+            report_progress(processed=counts['fetched'], message=f"Updated {counts['updated']} inventory items")
+        
+        async def pull_inventory():
+            """Fetch inventory page by page, writing each page as it arrives"""
+            if skus:
+                await write_page(await connector.fetch_inventory(skus))
+                return
+            async for page in connector.iter_inventory(window.updated_since):
+                await write_page(page)
+        
+        run_async(pull_inventory())
+        
+        # Targeted SKU syncs don't cover the whole catalog, so they leave the watermark alone
+        if not skus:
+            integration.sync_cursors = advance_watermark(integration.sync_cursors, window)
+            integration.last_sync = window.started_at
         
-        # Process inventory data (update database, etc.)
         result = {
             'success': True,
-            'inventory_items': len(inventory),
+            'inventory_items': counts['fetched'],
+            'products_updated': counts['updated'],
+            **window.to_dict(),
             'updated_at': datetime.utcnow().isoformat()
         }
         
@@ -217,47 +528,57 @@ def sync_inventory(self, job_id: str):
         sync_job.completed_at = datetime.utcnow()
         sync_job.progress = 100
         sync_job.result = result
+        channel.transition(SyncJobStatus.COMPLETED.value, progress=100, result=result)
         db.commit()
         
         # Broadcast completion event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "completed",
-            "message": f"Updated {len(inventory)} inventory items",
+            "message": f"Updated {counts['updated']} inventory items",
             "progress": 100,
             "result": result
-        }))
+        })
         
         logger.info(f"Inventory sync completed: {job_id} - {result}")
         return result
         
+    except Retry:
+        raise
+        
     except Exception as e:
         # Update job with error
         sync_job.status = SyncJobStatus.FAILED
         sync_job.completed_at = datetime.utcnow()
         sync_job.error_message = str(e)
         sync_job.progress = 0
+        if channel:
+            channel.transition(SyncJobStatus.FAILED.value, progress=0, error_message=str(e))
         db.commit()
         
         # Broadcast error event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "failed",
             "message": f"Inventory sync failed: {str(e)}",
             "progress": 0,
             "error": str(e)
-        }))
+        })
         
         logger.error(f"Inventory sync failed: {job_id} - {e}")
         raise
     
     finally:
+        if lease:
+            lease.release()
         db.close()
 
 @celery_app.task(bind=True, name='app.services.sync_tasks.sync_orders')
 def sync_orders(self, job_id: str):
     """Sync orders from supplier"""
     db = next(get_db())
+    channel = None
+    lease = None
     
     try:
         # Get sync job
@@ -265,91 +586,131 @@ def sync_orders(self, job_id: str):
         if not sync_job:
             raise ValueError(f"Sync job not found: {job_id}")
         
+        # One running job per integration and sync type
+        lease = acquire_sync_lease(self, sync_job)
+        
         # Update job status
         sync_job.status = SyncJobStatus.RUNNING
         sync_job.started_at = datetime.utcnow()
         sync_job.task_id = self.request.id
         db.commit()
         
+        # Progress goes to Redis; the row is only written every few seconds and on transitions
+        channel = ProgressChannel(job_id, on_flush=lambda snapshot: flush_job_progress(self, db, sync_job, snapshot))
+        channel.transition(SyncJobStatus.RUNNING.value, progress=0, task_id=self.request.id)
+        
         # Get integration
         integration = db.query(Integration).filter(Integration.id == sync_job.integration_id).first()
         if not integration:
             raise ValueError(f"Integration not found: {sync_job.integration_id}")
         
         # Broadcast start event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "running",
             "message": "Starting order synchronization",
             "progress": 0
-        }))
+        })
         
         # Get connector
-        connector = get_connector(integration.type, {
+        connector = get_cached_connector(integration.type, {
             'type': integration.type,
-            'credentials': integration.credentials
+            'credentials': integration.credentials,
+            'integration_id': integration.id
         })
         
-        # Get sync options
+        # Get sync options; an explicit ``since`` overrides the stored watermark
         options = sync_job.options or {}
+        # Orders are not persisted yet, so a run only samples the first ``limit`` orders
+        # instead of spending the marketplace quota on the whole history
         limit = options.get('limit', 50)
         since = options.get('since')
+        window = plan_sync_window(integration.sync_cursors, 'orders', force_full=options.get('full_sync', False))
+        if since:
+            window.updated_since = datetime.fromisoformat(since)
         
         # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 20, 'message': 'Fetching orders'})
-        sync_job.progress = 20
-        db.commit()
+        channel.update(processed=0, message='Fetching orders')
+        # Coroutines may run on the async worker's shared loop; progress is written from this thread
+        report_progress = on_task_thread(channel.update)
+        
+        async def pull_orders() -> int:
+            """Walk the order pages modified inside the sync window"""
+            fetched = 0
+            async for page in connector.iter_order_pages(limit=limit, updated_since=window.updated_since):
+                fetched += len(page.items)
+                report_progress(processed=min(fetched, limit), total=page.total, message=f"Fetched {fetched} orders")
+                if fetched >= limit:
+                    break
+            return min(fetched, limit)
+        
+        # Order persistence is not wired to connectors yet. The orders watermark stays put until
+        # it is, otherwise incremental runs would start after orders that were never stored
+        if connector.supports_orders:
+            orders_fetched = run_async(pull_orders())
+        else:
+            logger.info(f"Order sync {job_id} skipped: {integration.type} connector does not support orders")
+            orders_fetched = 0
         
-        # Fetch orders (this would need to be implemented in connectors)
-        # For now, simulate order sync
         result = {
             'success': True,
+            'orders_fetched': orders_fetched,
             'orders_imported': 0,
             'orders_updated': 0,
             'orders_failed': 0,
-            'message': 'Order sync not yet implemented in connectors'
+            **window.to_dict()
         }
+        if not connector.supports_orders:
+            result['message'] = f"{integration.type} connector does not support order sync"
         
         # Update job with results
         sync_job.status = SyncJobStatus.COMPLETED
         sync_job.completed_at = datetime.utcnow()
         sync_job.progress = 100
         sync_job.result = result
+        channel.transition(SyncJobStatus.COMPLETED.value, progress=100, result=result)
         db.commit()
         
         # Broadcast completion event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "completed",
-            "message": "Order sync completed (placeholder)",
+            "message": f"Fetched {orders_fetched} orders",
             "progress": 100,
             "result": result
-        }))
+        })
         
         logger.info(f"Order sync completed: {job_id} - {result}")
         return result
         
+    except Retry:
+        raise
+        
     except Exception as e:
         # Update job with error
         sync_job.status = SyncJobStatus.FAILED
         sync_job.completed_at = datetime.utcnow()
         sync_job.error_message = str(e)
         sync_job.progress = 0
+        if channel:
+            channel.transition(SyncJobStatus.FAILED.value, progress=0, error_message=str(e))
         db.commit()
         
         # Broadcast error event
-        asyncio.create_task(broadcast_sync_update({
+        publish_sync_event({
             "job_id": job_id,
             "status": "failed",
             "message": f"Order sync failed: {str(e)}",
             "progress": 0,
             "error": str(e)
-        }))
+        })
         
         logger.error(f"Order sync failed: {job_id} - {e}")
         raise
     
     finally:
+        if lease:
+            lease.release()
         db.close()
 
 @celery_app.task(name='app.services.sync_tasks.sync_all_integrations')
@@ -358,26 +719,29 @@ def sync_all_integrations():
     db = next(get_db())
     
     try:
-        # Get all active integrations
-        integrations = db.query(Integration).filter(Integration.is_active == True).all()
+        from app.services.sync_orchestrator import orchestrator, SyncRequest, SyncPriority
         
-        logger.info(f"Starting periodic sync for {len(integrations)} integrations")
+        # Only ids are needed; loading full rows would decrypt/parse every credentials blob
+        integration_ids = [
+            integration_id for (integration_id,) in
+            db.query(Integration.id).filter(Integration.status == IntegrationStatus.ACTIVE)
+        ]
         
-        for integration in integrations:
-            # Queue product sync for each integration
-            from app.services.sync_orchestrator import orchestrator, SyncRequest, SyncPriority
-            
-            request = SyncRequest(
-                integration_id=integration.id,
+        logger.info(f"Starting periodic sync for {len(integration_ids)} integrations")
+        
+        # One multi-row insert and one Celery group for the whole fan-out
+        job_ids = orchestrator.queue_bulk_sync([
+            SyncRequest(
+                integration_id=integration_id,
                 sync_type='products',
                 priority=SyncPriority.LOW,
                 options={'limit': 50, 'offset': 0}
             )
-            
-            asyncio.create_task(orchestrator.queue_sync(request))
+            for integration_id in integration_ids
+        ])
         
-        logger.info(f"Queued periodic sync for {len(integrations)} integrations")
-        return {'synced_integrations': len(integrations)}
+        logger.info(f"Queued periodic sync for {len(job_ids)} integrations")
+        return {'synced_integrations': len(job_ids)}
         
     except Exception as e:
         logger.error(f"Periodic sync failed: {e}")
@@ -386,6 +750,54 @@ def sync_all_integrations():
     finally:
         db.close()
 
+@celery_app.task(name='app.services.sync_tasks.dispatch_scheduled_syncs')
+def dispatch_scheduled_syncs():
+    """Beat tick: queue product syncs for integrations whose adaptive next run is due"""
+    db = next(get_db())
+    
+    try:
+        from app.services.sync_orchestrator import orchestrator, SyncRequest, SyncPriority
+        
+        integration_ids = [
+            integration_id for (integration_id,) in
+            db.query(Integration.id).filter(Integration.status == IntegrationStatus.ACTIVE)
+        ]
+        
+        scheduler = get_sync_scheduler()
+        scheduler.register(integration_ids)
+        due = scheduler.pop_due(scheduler.dispatch_limit(len(integration_ids)))
+        if not due:
+            return {'dispatched': 0}
+        
+        # Unchanged products are skipped by content hash, so no item limit is needed
+        job_ids = orchestrator.queue_bulk_sync([
+            SyncRequest(
+                integration_id=integration_id,
+                sync_type='products',
+                priority=SyncPriority.LOW
+            )
+            for integration_id in due
+        ])
+        
+        logger.info(f"Dispatched scheduled sync for {len(due)} of {len(integration_ids)} integrations")
+        return {'dispatched': len(job_ids)}
+        
+    except Exception as e:
+        logger.error(f"Scheduled sync dispatch failed: {e}")
+        raise
+    
+    finally:
+        db.close()
+
+@celery_app.task(name='app.services.sync_tasks.pump_sync_queues')
+def pump_sync_queues():
+    """Beat tick: release fair queued sync jobs no enqueue or task start has released yet"""
+    if not settings.SYNC_FAIR_QUEUES_ENABLED:
+        return {'released': 0}
+    
+    fair_queue = get_fair_queue()
+    return {'released': sum(fair_queue.dispatch(queue) for queue in FAIR_QUEUES)}
+
 @celery_app.task(name='app.services.sync_tasks.cleanup_old_sync_jobs')
 def cleanup_old_sync_jobs():
     """Clean up old sync jobs"""
@@ -19,6 +19,6 @@ if __name__ == '__main__':
     celery_app.start([
         'beat',
         '--loglevel=info',
-        '--scheduler=django_celery_beat.schedulers:DatabaseScheduler',
+        '--schedule=/tmp/celerybeat-schedule',
         '--pidfile=/tmp/celerybeat.pid'
     ])
\ No newline at end of file
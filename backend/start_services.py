@@ -158,6 +158,10 @@ def main():
             "name": "Celery Worker",
             "command": ["python", "worker.py"]
         },
+        {
+            "name": "Celery Priority Worker",
+            "command": ["python", "worker.py", "priority"]
+        },
         {
             "name": "Celery Beat",
             "command": ["python", "beat.py"]
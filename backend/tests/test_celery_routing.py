@@ -0,0 +1,38 @@
+"""Tests for priority-based task routing"""
+
+from app.core.celery_config import celery_app, route_task, sync_priority_step
+
+SYNC_PRODUCTS = 'app.services.sync_tasks.sync_products'
+
+def route(name, **options):
+    """Resolve the final queue the way Celery does when publishing"""
+    return celery_app.amqp.router.route(options, name, (), {})['queue'].name
+
+class TestPriorityRouting:
+    """Tests for sending urgent jobs to the reserved queues"""
+
+    def test_priority_steps_favor_urgent(self):
+        """Test that Redis serves URGENT before HIGH, NORMAL and LOW"""
+        steps = [sync_priority_step(p) for p in ('urgent', 'high', 'normal', 'low')]
+
+        assert steps == sorted(steps)
+        assert sync_priority_step('unknown') == sync_priority_step('normal')
+
+    def test_urgent_and_high_syncs_use_dedicated_queues(self):
+        """Test routing of URGENT and HIGH jobs to their own queues"""
+        assert route(SYNC_PRODUCTS, priority=sync_priority_step('urgent')) == 'urgent'
+        assert route('app.services.sync_tasks.sync_orders', priority=sync_priority_step('high')) == 'high_priority'
+
+    def test_normal_and_low_syncs_use_type_queues(self):
+        """Test that NORMAL and LOW jobs go to the sync type's queue"""
+        assert route(SYNC_PRODUCTS, priority=sync_priority_step('low')) == 'sync_products'
+        assert route('app.services.sync_tasks.sync_inventory', priority=sync_priority_step('normal')) == 'sync_inventory'
+
+    def test_other_tasks_ignore_priority(self):
+        """Test that maintenance tasks stay out of the reserved queues"""
+        assert route('app.services.sync_tasks.cleanup_old_sync_jobs', priority=0) == 'maintenance'
+        assert route_task('app.core.celery_config.debug_task', (), {}, {}) is None
+
+    def test_explicit_queue_wins(self):
+        """Test that an explicitly given queue is not overridden"""
+        assert route(SYNC_PRODUCTS, queue='sync_bulk', priority=sync_priority_step('urgent')) == 'sync_bulk'
@@ -0,0 +1,487 @@
+"""Tests for the async marketplace connectors"""
+
+import base64
+import hashlib
+import hmac
+import json
+import asyncio
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+from unittest.mock import patch
+
+from app.connectors import (
+    get_connector, get_cached_connector, BaseConnector, CONNECTORS, ConnectorCache, BlingConnector,
+    MercadoLivreConnector, ShopifyConnector, NuvemShopConnector, ConnectorError, NormalizedProduct
+)
+from app.infra.http_client import (
+    get_http_client, on_task_thread, run_async, set_task_deadline, start_shared_loop, stop_shared_loop
+)
+
+def mock_client(handler):
+    """Create an httpx client with a mock transport"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+class TestConnectorRegistry:
+    """Tests for connector creation"""
+
+    def test_get_connector_by_type(self):
+        """Test creating a connector from the integration type"""
+        connector = get_connector('bling', {'type': 'bling', 'credentials': {'access_token': 'abc'}})
+
+        assert isinstance(connector, BlingConnector)
+        assert connector.base_url.endswith('/Api/v3')
+
+    def test_get_connector_unknown_type(self):
+        """Test the error for an unknown integration type"""
+        with pytest.raises(ValueError):
+            get_connector('woocommerce', {'credentials': {'access_token': 'abc'}})
+
+    def test_get_connector_requires_credentials(self):
+        """Test credential validation"""
+        with pytest.raises(ValueError):
+            get_connector('shopify', {'type': 'shopify', 'credentials': {}})
+
+    def test_connectors_without_orders_yield_an_empty_page(self):
+        """Test that a connector without order support reports it and pages no orders"""
+        class CatalogOnlyConnector(BlingConnector):
+            supports_orders = False
+            fetch_orders_page = BaseConnector.fetch_orders_page
+
+        connector = CatalogOnlyConnector()
+
+        async def collect():
+            return [page async for page in connector.iter_order_pages()]
+
+        pages = asyncio.run(collect())
+        assert [page.items for page in pages] == [[]]
+        assert all(connector_class.supports_orders for connector_class in CONNECTORS.values())
+
+class TestConnectorCache:
+    """Tests for the per-worker cache of configured connectors"""
+
+    def config(self, integration_id, token='abc'):
+        return {'type': 'bling', 'credentials': {'access_token': token}, 'integration_id': integration_id}
+
+    def test_reused_per_integration(self):
+        """Test reusing the connector across jobs of the same integration"""
+        with patch('app.connectors.cache._connector_cache', ConnectorCache(max_size=8)):
+            connector = get_cached_connector('bling', self.config('int-1'))
+
+            assert get_cached_connector('bling', self.config('int-1')) is connector
+            assert get_cached_connector('bling', self.config('int-2')) is not connector
+
+    def test_new_credentials_replace_connector(self):
+        """Test that a refreshed token builds a new connector for the integration"""
+        cache = ConnectorCache(max_size=8)
+        with patch('app.connectors.cache._connector_cache', cache):
+            old = get_cached_connector('bling', self.config('int-1', 'abc'))
+            new = get_cached_connector('bling', self.config('int-1', 'xyz'))
+
+        assert new is not old and new.access_token == 'xyz'
+        assert len(cache) == 1
+
+    def test_lru_eviction(self):
+        """Test evicting the least recently used integration"""
+        cache = ConnectorCache(max_size=2)
+        with patch('app.connectors.cache._connector_cache', cache):
+            first = get_cached_connector('bling', self.config('int-1'))
+            get_cached_connector('bling', self.config('int-2'))
+            get_cached_connector('bling', self.config('int-1'))
+            get_cached_connector('bling', self.config('int-3'))
+
+            assert len(cache) == 2
+            assert get_cached_connector('bling', self.config('int-1')) is first
+            assert 'int-2' not in cache._entries
+
+    @pytest.mark.asyncio
+    async def test_connection_result_cached(self):
+        """Test that the connection check calls the API only once within the TTL"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={'data': []})
+
+        connector = get_connector('bling', self.config('int-1'))
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            assert await connector.check_connection() is True
+            assert await connector.check_connection() is True
+            assert len(calls) == 1
+
+            with patch('app.connectors.base.time.monotonic', return_value=time.monotonic() + 3600):
+                assert await connector.check_connection() is True
+            assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_unauthorized_response_resets_connection_check(self):
+        """Test that a 401 forces a new connection check on the next job"""
+        connector = get_connector('bling', self.config('int-1'))
+        connector._connection_checked = (time.monotonic(), True)
+        client = mock_client(lambda request: httpx.Response(401, json={'error': 'invalid_token'}))
+
+        with patch('app.connectors.base.get_http_client', return_value=client):
+            with pytest.raises(ConnectorError):
+                await connector.fetch_products_page()
+            assert await connector.check_connection() is False
+
+class TestProductFingerprint:
+    """Tests for the content hash of normalized products"""
+
+    def make_product(self, **overrides):
+        """Create a sample normalized product"""
+        data = {
+            'external_id': '1', 'sku': 'SKU-1', 'name': 'Produto', 'price': 10.0,
+            'stock_quantity': 5, 'images': ['https://img/1.jpg'],
+            'attributes': {'marca': 'X', 'cor': 'azul'}, 'external_data': {'raw': 1}
+        }
+        data.update(overrides)
+        return NormalizedProduct(**data)
+
+    def test_fingerprint_is_stable(self):
+        """Test that the hash ignores attribute order and raw data"""
+        first = self.make_product()
+        second = self.make_product(
+            attributes={'cor': 'azul', 'marca': 'X'},
+            external_data={'raw': 2, 'date_modified': 'agora'}
+        )
+
+        assert first.fingerprint() == second.fingerprint()
+
+    def test_fingerprint_changes_with_content(self):
+        """Test that price, stock and images change the hash"""
+        base = self.make_product().fingerprint()
+
+        assert self.make_product(price=10.5).fingerprint() != base
+        assert self.make_product(stock_quantity=4).fingerprint() != base
+        assert self.make_product(images=[]).fingerprint() != base
+
+class TestHttpClientPool:
+    """Tests for the HTTP client pool"""
+
+    def test_client_reused_per_origin(self):
+        """Test reusing the client for the same host"""
+        async def get_clients():
+            return (
+                get_http_client('https://api.mercadolibre.com/items'),
+                get_http_client('https://api.mercadolibre.com/users/me'),
+                get_http_client('https://www.bling.com.br/Api/v3'),
+            )
+
+        first, second, other = run_async(get_clients())
+
+        assert first is second
+        assert first is not other
+
+    def test_shared_loop_runs_task_threads_concurrently(self):
+        """Test that task threads share a single event loop (async worker)"""
+        async def wait_for_api():
+            await asyncio.sleep(0.2)
+            return id(asyncio.get_running_loop())
+
+        start_shared_loop()
+        try:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=20) as threads:
+                loops = list(threads.map(lambda _: run_async(wait_for_api()), range(20)))
+            elapsed = time.monotonic() - started
+        finally:
+            stop_shared_loop()
+
+        assert len(set(loops)) == 1
+        assert elapsed < 1
+
+    def test_shared_loop_enforces_soft_time_limit(self):
+        """Test that the async worker stops the task at the soft limit and cancels the coroutine"""
+        cancelled = []
+
+        async def slow_import():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        start_shared_loop()
+        try:
+            set_task_deadline(0.1)
+            started = time.monotonic()
+            with pytest.raises(SoftTimeLimitExceeded):
+                run_async(slow_import())
+            elapsed = time.monotonic() - started
+
+            set_task_deadline(None)
+            assert run_async(asyncio.sleep(0.2, result='ok')) == 'ok'
+        finally:
+            set_task_deadline(None)
+            stop_shared_loop()
+
+        assert elapsed < 1
+        assert cancelled == [True]
+
+    def test_shared_loop_hands_callbacks_back_to_task_thread(self):
+        """Test that progress callbacks from a coroutine on the shared loop run, in order, on the task thread"""
+        calls = []
+        report = on_task_thread(lambda step, message='': calls.append((step, message, threading.get_ident())))
+
+        async def import_pages():
+            for step in range(3):
+                report(step, message=f'page {step}')
+                await asyncio.sleep(0)
+            return 'done'
+
+        start_shared_loop()
+        try:
+            result = run_async(import_pages())
+        finally:
+            stop_shared_loop()
+
+        task_thread = threading.get_ident()
+        assert result == 'done'
+        assert calls == [(step, f'page {step}', task_thread) for step in range(3)]
+
+    def test_worker_loop_cancels_interrupted_coroutine(self):
+        """Test that a soft time limit on the prefork loop cancels the import instead of leaving it pending"""
+        steps = []
+
+        async def slow_import():
+            try:
+                await asyncio.sleep(5)
+                steps.append('finished')
+            except asyncio.CancelledError:
+                steps.append('cancelled')
+                raise
+
+        def soft_time_limit(signum, frame):
+            raise SoftTimeLimitExceeded()
+
+        previous = signal.signal(signal.SIGALRM, soft_time_limit)
+        try:
+            signal.setitimer(signal.ITIMER_REAL, 0.1)
+            with pytest.raises(SoftTimeLimitExceeded):
+                run_async(slow_import())
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+        assert steps == ['cancelled']
+        assert run_async(asyncio.sleep(0.1, result='ok')) == 'ok'
+        assert steps == ['cancelled']
+
+class TestBlingConnector:
+    """Tests for the Bling connector"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_products_page(self):
+        """Test product pagination and normalization"""
+        def handler(request):
+            assert request.headers['Authorization'] == 'Bearer abc'
+            assert request.url.params['pagina'] == '1'
+            return httpx.Response(200, json={'data': [
+                {'id': 1, 'nome': 'Produto A', 'codigo': 'SKU-A', 'preco': '10.5',
+                 'estoque': {'saldoVirtualTotal': 7}},
+                {'id': 2, 'nome': 'Produto B', 'codigo': 'SKU-B', 'preco': 20},
+            ]})
+
+        connector = get_connector('bling', {'type': 'bling', 'credentials': {'access_token': 'abc'}})
+
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            page = await connector.fetch_products_page(limit=2)
+
+        assert page.next_cursor == '2'
+        product = connector.normalize_product(page.items[0])[0]
+        assert product.sku == 'SKU-A'
+        assert product.price == 10.5
+        assert product.stock_quantity == 7
+
+    @pytest.mark.asyncio
+    async def test_api_error_raises_connector_error(self):
+        """Test converting HTTP errors into ConnectorError"""
+        connector = get_connector('bling', {'type': 'bling', 'credentials': {'access_token': 'abc'}})
+        client = mock_client(lambda request: httpx.Response(401, json={'error': 'invalid_token'}))
+
+        with patch('app.connectors.base.get_http_client', return_value=client):
+            with pytest.raises(ConnectorError) as exc_info:
+                await connector.fetch_products_page()
+            assert await connector.test_connection() is False
+
+        assert exc_info.value.status_code == 401
+
+class TestMercadoLivreConnector:
+    """Tests for the Mercado Livre connector"""
+
+    @pytest.mark.asyncio
+    async def test_scan_and_multiget(self):
+        """Test the scroll search and item multiget"""
+        def handler(request):
+            if request.url.path == '/users/42/items/search':
+                assert request.url.params['search_type'] == 'scan'
+                return httpx.Response(200, json={'results': ['MLB1', 'MLB2'], 'scroll_id': 'next-scroll'})
+            if request.url.path == '/items':
+                assert request.url.params['ids'] == 'MLB1,MLB2'
+                return httpx.Response(200, json=[
+                    {'code': 200, 'body': {'id': 'MLB1', 'title': 'Item 1', 'price': 99.9,
+                                           'available_quantity': 3, 'seller_custom_field': 'SKU-1'}},
+                    {'code': 404, 'body': {}},
+                ])
+            return httpx.Response(404)
+
+        connector = get_connector('mercadolivre', {
+            'type': 'mercadolivre', 'credentials': {'access_token': 'abc', 'user_id': '42'}
+        })
+
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            page = await connector.fetch_products_page()
+
+        assert page.next_cursor == 'next-scroll'
+        assert len(page.items) == 1
+        assert connector.normalize_product(page.items[0])[0].sku == 'SKU-1'
+
+    @pytest.mark.asyncio
+    async def test_incremental_inventory_filters_locally(self):
+        """Test local filtering by last_updated, since the scan can't filter by date"""
+        def handler(request):
+            if request.url.path == '/users/42/items/search':
+                assert 'last_updated' not in request.url.params
+                return httpx.Response(200, json={'results': ['MLB1', 'MLB2']})
+            return httpx.Response(200, json=[
+                {'code': 200, 'body': {'id': 'MLB1', 'title': 'Novo', 'price': 10, 'available_quantity': 1,
+                                       'last_updated': '2024-03-01T15:00:00.000Z'}},
+                {'code': 200, 'body': {'id': 'MLB2', 'title': 'Antigo', 'price': 10, 'available_quantity': 1,
+                                       'last_updated': '2024-01-01T15:00:00.000Z'}},
+            ])
+
+        connector = get_connector('mercadolivre', {
+            'type': 'mercadolivre', 'credentials': {'access_token': 'abc', 'user_id': '42'}
+        })
+
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            inventory = await connector.fetch_inventory(updated_since=datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert [item['sku'] for item in inventory] == ['MLB1']
+
+    @pytest.mark.asyncio
+    async def test_handle_notification(self):
+        """Test parsing ML notifications"""
+        connector = get_connector('ml', {'type': 'ml', 'credentials': {'access_token': 'abc'}})
+
+        event = await connector.handle_webhook({'resource': '/items/MLB123', 'topic': 'items'})
+
+        assert event == {'event': 'items', 'type': 'product', 'external_id': 'MLB123'}
+
+class TestShopifyConnector:
+    """Tests for the Shopify connector"""
+
+    @pytest.mark.asyncio
+    async def test_cursor_pagination(self):
+        """Test reading the page_info cursor from the Link header"""
+        def handler(request):
+            return httpx.Response(
+                200,
+                json={'products': [{'id': 1, 'title': 'Camiseta', 'variants': [
+                    {'id': 10, 'sku': 'TS-P', 'title': 'P', 'price': '49.90', 'inventory_quantity': 5},
+                    {'id': 11, 'sku': '', 'title': 'M', 'price': '49.90', 'inventory_quantity': 2},
+                ]}]},
+                headers={'Link': '<https://loja.myshopify.com/admin/api/2023-10/products.json?limit=250&page_info=abc123>; rel="next"'}
+            )
+
+        connector = get_connector('shopify', {
+            'type': 'shopify', 'credentials': {'shop_domain': 'loja', 'access_token': 'tok'}
+        })
+
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            page = await connector.fetch_products_page()
+
+        products = connector.normalize_product(page.items[0])
+        assert page.next_cursor == 'abc123'
+        assert [p.sku for p in products] == ['TS-P', '1-11']
+        assert products[0].external_id == '1:10'
+
+    @pytest.mark.asyncio
+    async def test_orders_updated_since(self):
+        """Test that updated_at_min is sent only on the first order page"""
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.params)
+            if 'page_info' in request.url.params:
+                return httpx.Response(200, json={'orders': [{'id': 2}]})
+            return httpx.Response(
+                200,
+                json={'orders': [{'id': 1}]},
+                headers={'Link': '<https://loja.myshopify.com/admin/api/2023-10/orders.json?page_info=p2>; rel="next"'}
+            )
+
+        connector = get_connector('shopify', {
+            'type': 'shopify', 'credentials': {'shop_domain': 'loja', 'access_token': 'tok'}
+        })
+
+        with patch('app.connectors.base.get_http_client', return_value=mock_client(handler)):
+            pages = [page async for page in connector.iter_order_pages(
+                updated_since=datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+            )]
+
+        assert [page.items[0]['id'] for page in pages] == [1, 2]
+        assert requests[0]['updated_at_min'] == '2024-03-01T12:00:00+00:00'
+        assert requests[0]['status'] == 'any'
+        assert 'updated_at_min' not in requests[1]
+
+    @pytest.mark.asyncio
+    async def test_webhook_signature(self):
+        """Test webhook HMAC signature validation"""
+        connector = get_connector('shopify', {
+            'type': 'shopify',
+            'credentials': {'shop_domain': 'loja', 'access_token': 'tok', 'webhook_secret': 'segredo'}
+        })
+        body = json.dumps({'id': 1})
+        signature = base64.b64encode(hmac.new(b'segredo', body.encode(), hashlib.sha256).digest()).decode()
+
+        event = await connector.handle_webhook({
+            'event': 'products/update', 'data': {'id': 1}, 'raw_body': body,
+            'headers': {'x-shopify-hmac-sha256': signature}
+        })
+        assert event['type'] == 'product'
+
+        with pytest.raises(ConnectorError):
+            await connector.handle_webhook({
+                'event': 'products/update', 'data': {'id': 1}, 'raw_body': body,
+                'headers': {'x-shopify-hmac-sha256': 'invalida'}
+            })
+
+class TestNuvemShopConnector:
+    """Tests for the Nuvemshop connector"""
+
+    @pytest.mark.asyncio
+    async def test_page_past_end_is_empty(self):
+        """Test that a 404 after the last page ends pagination"""
+        connector = get_connector('nuvemshop', {
+            'type': 'nuvemshop', 'credentials': {'store_id': '123', 'access_token': 'tok'}
+        })
+        client = mock_client(lambda request: httpx.Response(404, json={'description': 'Last page is 1'}))
+
+        with patch('app.connectors.base.get_http_client', return_value=client):
+            page = await connector.fetch_products_page(cursor='2')
+
+        assert page.items == []
+        assert page.next_cursor is None
+
+    def test_normalize_localized_names(self):
+        """Test normalizing localized names and variants"""
+        connector = get_connector('nuvemshop', {
+            'type': 'nuvemshop', 'credentials': {'store_id': '123', 'access_token': 'tok'}
+        })
+
+        products = connector.normalize_product({
+            'id': 789, 'name': {'pt': 'Camiseta Básica'},
+            'variants': [{'id': 1, 'sku': 'TSHIRT-01', 'price': '49.90', 'stock': 25,
+                          'values': [{'pt': 'P'}, {'pt': 'Branco'}]}]
+        })
+
+        assert products[0].name == 'Camiseta Básica - P / Branco'
+        assert products[0].stock_quantity == 25
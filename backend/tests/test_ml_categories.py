@@ -0,0 +1,110 @@
+"""Tests for the local cache of the Mercado Livre category tree"""
+
+import time
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.connectors import get_connector
+from app.infra.ml_categories import CategoryCache
+
+CATEGORY = {
+    'id': 'MLB1002',
+    'name': 'Televisores',
+    'path_from_root': [
+        {'id': 'MLB1000', 'name': 'Eletrônicos, Áudio e Vídeo'},
+        {'id': 'MLB1002', 'name': 'Televisores'},
+    ],
+}
+
+class FakeFetch:
+    """Fake /categories/{id} endpoint that records its calls"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def __call__(self, category_id, etag):
+        self.calls.append((category_id, etag))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+class TestCategoryCache:
+    """Tests for the SQLite category cache"""
+
+    def test_miss_fetches_once(self, tmp_path):
+        """Test that a category is downloaded only on the first lookup"""
+        cache = CategoryCache(tmp_path / 'categories.sqlite3')
+        fetch = FakeFetch((200, CATEGORY, '"v1"'))
+
+        entry = cache.resolve('MLB1002', fetch)
+        assert entry['path_str'] == 'Eletrônicos, Áudio e Vídeo > Televisores'
+        assert cache.resolve('MLB1002', fetch)['id'] == 'MLB1002'
+        assert len(fetch.calls) == 1
+
+    def test_persists_across_processes(self, tmp_path):
+        """Test reading the file from another instance (scripts and backend)"""
+        CategoryCache(tmp_path / 'categories.sqlite3').put(CATEGORY, '"v1"')
+
+        entry = CategoryCache(tmp_path / 'categories.sqlite3').resolve('MLB1002', FakeFetch())
+
+        assert entry['path'][0] == {'id': 'MLB1000', 'name': 'Eletrônicos, Áudio e Vídeo'}
+
+    def test_stale_entry_revalidated_with_etag(self, tmp_path):
+        """Test conditional revalidation (304) after the TTL"""
+        cache = CategoryCache(tmp_path / 'categories.sqlite3', ttl=60)
+        cache.put(CATEGORY, '"v1"')
+        fetch = FakeFetch((304, None, '"v1"'))
+
+        with patch('app.infra.ml_categories.time.time', return_value=time.time() + 120):
+            assert cache.resolve('MLB1002', fetch)['name'] == 'Televisores'
+            assert cache.resolve('MLB1002', fetch)['name'] == 'Televisores'
+
+        assert fetch.calls == [('MLB1002', '"v1"')]
+
+    def test_stale_entry_served_when_api_fails(self, tmp_path):
+        """Test that an expired entry is served while the API is down"""
+        cache = CategoryCache(tmp_path / 'categories.sqlite3', ttl=0)
+        cache.put(CATEGORY)
+
+        entry = cache.resolve('MLB1002', FakeFetch(ConnectionError('down')))
+
+        assert entry['id'] == 'MLB1002'
+
+    def test_prefetch_site_dump(self, tmp_path):
+        """Test bulk loading of the site tree"""
+        cache = CategoryCache(tmp_path / 'categories.sqlite3')
+        dump = {'MLB1002': CATEGORY, 'MLB1000': {'id': 'MLB1000', 'name': 'Eletrônicos, Áudio e Vídeo',
+                                                 'path_from_root': [CATEGORY['path_from_root'][0]]}}
+
+        assert cache.prefetch(dump) == 2
+        assert len(cache) == 2
+        assert cache.resolve('MLB1000', FakeFetch())['path_str'] == 'Eletrônicos, Áudio e Vídeo'
+
+class TestMercadoLivreCategories:
+    """Tests for the categories served by the Mercado Livre connector"""
+
+    @pytest.mark.asyncio
+    async def test_get_category_uses_cache(self, tmp_path):
+        """Test that the connector calls the API only on the first lookup"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json=CATEGORY, headers={'ETag': '"v1"'})
+
+        connector = get_connector('ml', {'type': 'ml', 'credentials': {'access_token': 'abc'}})
+        cache = CategoryCache(tmp_path / 'categories.sqlite3')
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        with patch('app.connectors.mercadolivre.get_category_cache', return_value=cache), \
+             patch('app.connectors.base.get_http_client', return_value=client):
+            first = await connector.get_category('MLB1002')
+            second = await connector.get_category('MLB1002')
+
+        assert first['path_str'] == second['path_str'] == 'Eletrônicos, Áudio e Vídeo > Televisores'
+        assert calls == ['/categories/MLB1002']
+        assert cache.get('MLB1002')['etag'] == '"v1"'
@@ -0,0 +1,255 @@
+"""Tests for the streaming product import pipeline"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from sqlalchemy.dialects import postgresql
+
+from app.connectors.base import NormalizedProduct, ProductPage
+from app.core.config import settings
+from app.domain.models import Product
+from app.infra.database import bulk_upsert
+from app.services.product_import import (
+    CHUNK_CHECKPOINT_UPDATE, ProductImportPipeline, _write_inventory, chunk_checkpoint
+)
+from app.services.sync_tasks import continue_from_checkpoint
+
+class FakeConnector:
+    """In-memory connector with ``pages`` pages of ``page_size`` items"""
+
+    type = 'fake'
+    max_page_size = 100
+    resumable_cursors = True
+
+    def __init__(self, pages: int, page_size: int = 10):
+        self.items = [{'id': str(i)} for i in range(pages * page_size)]
+        self.fetched = 0
+
+    def cursor_for_offset(self, offset, limit):
+        return str(offset // limit + 1)
+
+    async def iter_product_pages(self, page_size, cursor=None, updated_since=None):
+        page = int(cursor or 1)
+        while True:
+            start = (page - 1) * page_size
+            self.fetched += 1
+            next_cursor = str(page + 1) if start + page_size < len(self.items) else None
+            yield ProductPage(self.items[start:start + page_size], next_cursor, len(self.items))
+            if not next_cursor:
+                break
+            page += 1
+
+    def normalize_product(self, raw):
+        return [NormalizedProduct(external_id=raw['id'], sku=f"SKU-{raw['id']}", name=f"Produto {raw['id']}", price=10.0)]
+
+class RecordingSession:
+    """Session that only records the executed statements"""
+
+    def __init__(self):
+        self.statements = []
+        self.params = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement)
+        self.params.append(params)
+        return SimpleNamespace(rowcount=len(params) if isinstance(params, list) else 1)
+
+def recording_pipeline(connector, **kwargs):
+    """Pipeline whose ``persist_batch`` only records the batches it receives"""
+    pipeline = ProductImportPipeline(connector, 'int-1', 'tenant-1', page_size=10, **kwargs)
+    pipeline.batches = []
+    pipeline.checkpoints = []
+
+    async def persist(products, completed=False):
+        pipeline.batches.append(([p.external_id for p in products], connector.fetched, completed))
+        pipeline.checkpoints.append(pipeline.checkpoint_state(len(products), 0, completed))
+        return len(products), 0
+
+    pipeline.persist_batch = persist
+    return pipeline
+
+class TestStreamingImport:
+    """Tests for the page-at-a-time import"""
+
+    @pytest.mark.asyncio
+    async def test_batches_written_while_pages_stream(self):
+        """Test that each batch is written before the following pages are fetched"""
+        connector = FakeConnector(pages=5)
+        pipeline = recording_pipeline(connector)
+
+        with patch.object(settings, 'SYNC_UPSERT_BATCH_SIZE', 20):
+            result = await pipeline.run()
+
+        assert [(len(ids), fetched, completed) for ids, fetched, completed in pipeline.batches] == [
+            (20, 2, False), (20, 4, False), (10, 5, True)
+        ]
+        assert result['products_imported'] == 50
+        assert result['pages'] == 5
+
+    @pytest.mark.asyncio
+    async def test_limit_and_offset(self):
+        """Test that ``offset`` starts on the right page and ``limit`` stops the read"""
+        connector = FakeConnector(pages=5)
+        pipeline = recording_pipeline(connector)
+
+        result = await pipeline.run(limit=15, offset=10)
+
+        imported = [external_id for ids, _, _ in pipeline.batches for external_id in ids]
+        assert imported == [str(i) for i in range(10, 25)]
+        assert connector.fetched == 2
+        assert result['products_processed'] == 15
+
+class TestBulkUpsert:
+    """Tests for batch writes with INSERT ... ON CONFLICT"""
+
+    def test_one_statement_per_chunk(self):
+        """Test one multi-row upsert per chunk, updating only the requested fields"""
+        db = RecordingSession()
+        rows = [
+            {'id': str(i), 'tenant_id': 't-1', 'integration_id': 'int-1', 'external_id': str(i),
+             'name': f'Produto {i}', 'sku': f'SKU-{i}', 'price': 10.0}
+            for i in range(5)
+        ]
+
+        bulk_upsert(db, Product, rows, index_elements=['integration_id', 'external_id'],
+                    update_fields=['name', 'price'], chunk_size=2)
+
+        assert len(db.statements) == 3
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert 'ON CONFLICT (integration_id, external_id) DO UPDATE SET' in sql
+        assert 'name = excluded.name, price = excluded.price, updated_at = now()' in sql
+        assert 'sku = excluded.sku' not in sql
+
+    def test_batch_rows_are_unique(self):
+        """Test that a batch repeats neither external_id nor SKU within one statement"""
+        pipeline = ProductImportPipeline(FakeConnector(pages=1), 'int-1', 'tenant-1')
+        products = [
+            NormalizedProduct(external_id='1', sku='A', name='Antigo', price=1.0),
+            NormalizedProduct(external_id='1', sku='A', name='Novo', price=1.0),
+            NormalizedProduct(external_id='2', sku='A', name='Outro', price=1.0),
+        ]
+
+        unique = pipeline._dedupe(products)
+
+        assert [(p.external_id, p.name) for p in unique] == [('1', 'Novo')]
+        assert pipeline.stats.failed == 1
+
+class TestChunkCheckpoints:
+    """Tests for the checkpoints of a parallel sync's chunks"""
+
+    def test_chunk_writes_only_its_key(self):
+        """Test that each chunk writes its own checkpoint inside the job"""
+        db = RecordingSession()
+        pipeline = ProductImportPipeline(FakeConnector(pages=1), 'int-1', 'tenant-1', page_size=10,
+                                         job_id='job-1', chunk_index=3)
+
+        pipeline._write_checkpoint(db, pipeline.checkpoint_state())
+
+        assert db.statements == [CHUNK_CHECKPOINT_UPDATE]
+        assert db.params[0]['job_id'] == 'job-1'
+        assert db.params[0]['chunk'] == '3'
+
+    @pytest.mark.asyncio
+    async def test_chunk_resumes_from_its_checkpoint(self):
+        """Test that a redelivered chunk continues from its own checkpoint within its range"""
+        connector = FakeConnector(pages=6)
+        first = recording_pipeline(connector, job_id='job-1', chunk_index=1)
+        with patch.object(settings, 'SYNC_UPSERT_BATCH_SIZE', 10):
+            await first.run(limit=30, offset=20)
+
+        job_checkpoint = {'chunks': {'0': None, '1': first.checkpoints[0]}}
+        resumed = recording_pipeline(connector, job_id='job-1', chunk_index=1,
+                                     checkpoint=chunk_checkpoint(job_checkpoint, 1))
+        with patch.object(settings, 'SYNC_UPSERT_BATCH_SIZE', 10):
+            result = await resumed.run(limit=30, offset=20)
+
+        imported = [external_id for ids, _, _ in resumed.batches for external_id in ids]
+        assert imported == [str(i) for i in range(30, 50)]
+        assert result['products_processed'] == 30
+
+class TestResumeCheckpoints:
+    """Tests for resuming the import from its checkpoint"""
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_without_cursor_is_completed(self):
+        """Test that a last-page checkpoint does not reimport the catalog"""
+        connector = FakeConnector(pages=2)
+        first = recording_pipeline(connector, job_id='job-1')
+        with patch.object(settings, 'SYNC_UPSERT_BATCH_SIZE', 20):
+            await first.run()
+        last_batch = first.checkpoints[0]
+        assert last_batch['cursor'] is None and not last_batch['completed']
+
+        resumed = recording_pipeline(connector, job_id='job-1', checkpoint=last_batch)
+        fetched = connector.fetched
+        result = await resumed.run()
+
+        assert connector.fetched == fetched
+        assert resumed.batches == []
+        assert result['products_imported'] == 20
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_on_resume(self):
+        """Test that the checkpoint does not move past a batch that failed to write"""
+        connector = FakeConnector(pages=3)
+        pipeline = ProductImportPipeline(connector, 'int-1', 'tenant-1', page_size=10, job_id='job-1')
+        db = RecordingSession()
+
+        def write_batch(session, products, completed):
+            if products and products[0].external_id == '10':
+                raise RuntimeError('deadlock detected')
+            pipeline._write_checkpoint(session, pipeline.checkpoint_state(len(products), 0, completed))
+            return len(products), 0
+
+        async def in_transaction(fn, *args):
+            return fn(db, *args)
+
+        with patch.object(settings, 'SYNC_UPSERT_BATCH_SIZE', 10), \
+                patch('app.services.product_import.run_in_transaction', in_transaction), \
+                patch.object(pipeline, '_write_batch', write_batch):
+            result = await pipeline.run()
+
+        assert result['products_failed'] == 10
+        assert result['success'] is False
+        assert result['batches_failed'] == 1
+        assert len(db.statements) == 1
+        checkpoint = db.statements[0].compile().params['checkpoint']
+        assert checkpoint['cursor'] == '2'
+
+        resumed = recording_pipeline(connector, job_id='job-1', checkpoint=checkpoint)
+        await resumed.run()
+        imported = [external_id for ids, _, _ in resumed.batches for external_id in ids]
+        assert imported == [str(i) for i in range(10, 30)]
+
+class TestInventoryWrite:
+    """Tests for the inventory UPDATE"""
+
+    def test_inventory_write_clears_fingerprint(self):
+        """Test that stock/price writes drop the import hash so the next import rewrites the row"""
+        db = RecordingSession()
+
+        touched = _write_inventory(db, 'int-1', [{'sku': 'A', 'quantity': 3, 'price': 9.9}])
+
+        assert touched == 1
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert 'content_hash=' in sql.replace(' ', '')
+        assert db.params[0] == [{'b_sku': 'A', 'b_quantity': 3, 'b_price': 9.9}]
+
+class TestTimeLimitContinuations:
+    """Tests for continuing a product sync after a soft time limit"""
+
+    def test_continuations_counted_apart_from_lease_waits(self):
+        """Test that the continuation count travels in the task kwargs, not in request.retries"""
+        calls = []
+
+        class FakeTask:
+            request = SimpleNamespace(retries=7, kwargs={'continuation': 1})
+
+            def retry(self, **options):
+                calls.append(options)
+                return Retry()
+
+        assert isinstance(continue_from_checkpoint(FakeTask(), 1), Retry)
+        assert calls == [{'kwargs': {'continuation': 2}, 'countdown': 0, 'max_retries': None}]
@@ -0,0 +1,108 @@
+"""Tests for the rate limiter of marketplace calls"""
+
+import httpx
+import pytest
+import redis
+from unittest.mock import AsyncMock, patch
+
+from app.connectors import get_connector
+from app.infra.rate_limiter import OutboundRateLimiter, parse_rate_limit_headers
+
+class FakeScriptRedis:
+    """Fake Redis client returning canned EVAL replies"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def eval(self, script, numkeys, *args):
+        self.calls.append(args)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+class TestRateLimitHeaders:
+    """Tests for reading rate limit headers"""
+
+    def test_retry_after_on_429(self):
+        """Test blocking for Retry-After on 429 responses"""
+        block, remaining, throttled = parse_rate_limit_headers(429, {'retry-after': '7'})
+
+        assert block == 7.0
+        assert remaining is None
+        assert throttled is True
+
+    def test_429_without_retry_after_uses_default_backoff(self):
+        """Test the default back-off when a 429 gives no wait time"""
+        block, _, throttled = parse_rate_limit_headers(429, {})
+
+        assert block == 2.0
+        assert throttled is True
+
+    def test_exhausted_window_blocks_until_reset(self):
+        """Test blocking until the reset when no requests remain"""
+        block, remaining, throttled = parse_rate_limit_headers(
+            200, {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '12'}
+        )
+
+        assert (block, remaining, throttled) == (12.0, 0, False)
+
+    def test_shopify_call_limit(self):
+        """Test reading Shopify's bucket usage header"""
+        block, remaining, _ = parse_rate_limit_headers(200, {'x-shopify-shop-api-call-limit': '32/40'})
+
+        assert block is None
+        assert remaining == 8
+
+class TestOutboundRateLimiter:
+    """Tests for the shared token bucket"""
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_tokens(self):
+        """Test waiting for the time returned by the script until a token is granted"""
+        limiter = OutboundRateLimiter()
+        client = FakeScriptRedis([250, 0])
+
+        with patch.object(limiter, '_client', return_value=client), \
+                patch('app.infra.rate_limiter.asyncio.sleep', new=AsyncMock()) as sleep:
+            await limiter.acquire('acc-1', 'api.example.com', 3.0, 3)
+
+        sleep.assert_awaited_once_with(0.25)
+        assert client.calls[0][0] == 'ratelimit:api.example.com:acc-1'
+
+    @pytest.mark.asyncio
+    async def test_fails_open_without_redis(self):
+        """Test that Redis being down does not block calls"""
+        limiter = OutboundRateLimiter()
+        client = FakeScriptRedis([redis.ConnectionError('down')])
+
+        with patch.object(limiter, '_client', return_value=client):
+            await limiter.acquire('acc-1', 'api.example.com', 3.0, 3)
+            await limiter.acquire('acc-1', 'api.example.com', 3.0, 3)
+
+        assert len(client.calls) == 1
+
+class TestConnectorRateLimiting:
+    """Tests for the limiter wired into the connectors"""
+
+    @pytest.mark.asyncio
+    async def test_retries_after_429(self):
+        """Test retrying after a 429 and keying the account by integration"""
+        responses = [httpx.Response(429, headers={'Retry-After': '1'}), httpx.Response(200, json={'data': []})]
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+        limiter = AsyncMock()
+
+        connector = get_connector('bling', {
+            'type': 'bling', 'credentials': {'access_token': 'abc'}, 'integration_id': 'int-1'
+        })
+
+        with patch('app.connectors.base.get_http_client', return_value=client), \
+                patch('app.connectors.base.get_rate_limiter', return_value=limiter):
+            page = await connector.fetch_products_page()
+
+        assert page.items == []
+        assert limiter.acquire.await_count == 2
+        account, host, rate, burst = limiter.acquire.await_args.args
+        assert (account, host, rate, burst) == ('int-1', 'www.bling.com.br', 3.0, 3)
+        assert limiter.observe.await_args_list[0].args[3] == 429
@@ -0,0 +1,57 @@
+"""Tests for planning parallel product syncs"""
+
+from app.connectors import get_connector
+from app.services.sync_chunks import merge_import_results, plan_product_chunks
+
+def bling_connector():
+    """Create a connector with numbered pages (pages can be skipped)"""
+    return get_connector('bling', {'type': 'bling', 'credentials': {'access_token': 'abc'}})
+
+class TestPlanProductChunks:
+    """Tests for splitting the catalog into page ranges"""
+
+    def test_ranges_are_page_aligned_and_open_ended(self):
+        """Test page-aligned ranges with an unbounded last range"""
+        chunks = plan_product_chunks(bling_connector(), 100, 10000)
+
+        assert chunks == [(0, 2000), (2000, 2000), (4000, 2000), (6000, 2000), (8000, None)]
+
+    def test_chunk_count_is_capped(self):
+        """Test the chunk cap with larger ranges covering the catalog"""
+        chunks = plan_product_chunks(bling_connector(), 100, 1000000)
+
+        assert len(chunks) == 32
+        assert chunks[1][0] == chunks[0][1] == 31300
+
+    def test_explicit_chunk_count(self):
+        """Test the chunk count given in the job options"""
+        assert plan_product_chunks(bling_connector(), 100, 1000, chunks=4) == [
+            (0, 300), (300, 300), (600, 300), (900, None)
+        ]
+
+    def test_small_or_unseekable_catalog_runs_serially(self):
+        """Test a single run for small catalogs or opaque cursors"""
+        shopify = get_connector('shopify', {
+            'type': 'shopify', 'credentials': {'shop_domain': 'loja', 'access_token': 'tok'}
+        })
+
+        assert plan_product_chunks(bling_connector(), 100, 150) == [(0, None)]
+        assert plan_product_chunks(shopify, 250, 100000) == [(0, None)]
+
+class TestMergeImportResults:
+    """Tests for the result reduce step"""
+
+    def test_merges_counts_and_errors(self):
+        """Test summing counters and failing when any chunk fails"""
+        merged = merge_import_results([
+            {'success': True, 'products_processed': 10, 'products_imported': 4, 'products_updated': 1,
+             'products_unchanged': 5, 'products_failed': 0, 'pages': 1, 'errors': [], 'errors_dropped': 0},
+            {'success': False, 'errors': ['Chunk 1 failed: timeout']},
+        ], duration_ms=1500)
+
+        assert merged['success'] is False
+        assert merged['products_processed'] == 10
+        assert merged['products_imported'] == 4
+        assert merged['errors'] == ['Chunk 1 failed: timeout']
+        assert merged['chunks'] == 2
+        assert merged['duration_ms'] == 1500
@@ -0,0 +1,146 @@
+"""Tests for job deduplication and the per-integration lease"""
+
+import redis
+
+from app.services.sync_coalescing import (
+    SyncLease, claim_queued_slot, claim_queued_slots, release_queued_slot
+)
+
+class FakeRedis:
+    """In-memory Redis with the subset used by deduplication"""
+
+    def __init__(self):
+        self.values = {}
+        self.results = []
+
+    def pipeline(self, transaction=True):
+        self.results = []
+        return self
+
+    def execute(self):
+        return self.results
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            result = None
+        else:
+            self.values[key] = value
+            result = True
+        self.results.append(result)
+        return result
+
+    def get(self, key):
+        value = self.values.get(key)
+        self.results.append(value)
+        return value
+
+    def delete(self, key):
+        return int(self.values.pop(key, None) is not None)
+
+    def eval(self, script, numkeys, key, owner, *args):
+        # Renew and release scripts only act if the lease belongs to the job
+        if self.values.get(key) != owner:
+            return 0
+        if 'DEL' in script:
+            del self.values[key]
+        return 1
+
+class BrokenRedis(FakeRedis):
+    """Unavailable Redis"""
+
+    def execute(self):
+        raise redis.ConnectionError("down")
+
+    def set(self, key, value, nx=False, ex=None):
+        raise redis.ConnectionError("down")
+
+class TestQueuedSlots:
+    """Tests for merging requests into already queued jobs"""
+
+    def test_identical_request_merges_into_queued_job(self):
+        """Test that an identical request reuses the queued job"""
+        client = FakeRedis()
+
+        assert claim_queued_slot('int-1', 'products', 'job-1', {'full_sync': True}, client) is None
+        assert claim_queued_slot('int-1', 'products', 'job-2', {'full_sync': True}, client) == 'job-1'
+        assert claim_queued_slot('int-1', 'inventory', 'job-3', None, client) is None
+
+    def test_different_options_do_not_merge(self):
+        """Test that different options create their own job"""
+        client = FakeRedis()
+        claim_queued_slot('int-1', 'inventory', 'job-1', {'skus': ['A']}, client)
+
+        assert claim_queued_slot('int-1', 'inventory', 'job-2', None, client) is None
+
+    def test_bulk_duplicates_merge_into_first(self):
+        """Test merging repeated requests in the same batch"""
+        client = FakeRedis()
+
+        merged = claim_queued_slots([
+            ('int-1', 'products', 'job-1', None, 'normal'),
+            ('int-1', 'products', 'job-2', None, 'normal'),
+            ('int-2', 'products', 'job-3', None, 'normal'),
+        ], client)
+
+        assert merged == [None, 'job-1', None]
+
+    def test_urgent_request_does_not_merge_into_low_job(self):
+        """Test that an urgent request gets its own job instead of waiting behind a queued LOW one"""
+        client = FakeRedis()
+        claim_queued_slot('int-1', 'products', 'job-1', None, client, priority='low')
+
+        assert claim_queued_slot('int-1', 'products', 'job-2', None, client, priority='urgent') is None
+        assert claim_queued_slot('int-1', 'products', 'job-3', None, client, priority='low') == 'job-1'
+
+    def test_low_request_merges_into_urgent_job(self):
+        """Test that a less urgent request rides along with a queued urgent job"""
+        client = FakeRedis()
+        claim_queued_slot('int-1', 'products', 'job-1', None, client, priority='urgent')
+
+        assert claim_queued_slot('int-1', 'products', 'job-2', None, client, priority='low') == 'job-1'
+
+    def test_redis_down_never_merges(self):
+        """Test that without Redis every request creates its own job"""
+        assert claim_queued_slot('int-1', 'products', 'job-1', None, BrokenRedis()) is None
+
+class TestSyncLease:
+    """Tests for the single-run lease per integration"""
+
+    def test_running_job_gets_one_follow_up(self):
+        """Test that the running job frees the slot for a single follow-up job"""
+        client = FakeRedis()
+        claim_queued_slot('int-1', 'products', 'job-1', None, client)
+
+        lease = SyncLease('int-1', 'products', 'job-1', client)
+        assert lease.acquire() is True
+
+        # With job-1 running, the next request becomes the follow-up and the rest merge into it
+        assert claim_queued_slot('int-1', 'products', 'job-2', None, client) is None
+        assert claim_queued_slot('int-1', 'products', 'job-3', None, client) == 'job-2'
+
+        follow_up = SyncLease('int-1', 'products', 'job-2', client)
+        assert follow_up.acquire() is False
+
+        lease.release()
+        assert follow_up.acquire() is True
+        assert claim_queued_slot('int-1', 'products', 'job-4', None, client) is None
+
+    def test_release_ignores_lease_of_other_job(self):
+        """Test that a job can't release another job's lease"""
+        client = FakeRedis()
+        SyncLease('int-1', 'orders', 'job-1', client).acquire()
+
+        SyncLease('int-1', 'orders', 'job-2', client).release()
+
+        assert client.values['sync:lease:int-1:orders'] == 'job-1'
+
+    def test_release_queued_slot_checks_owner(self):
+        """Test that only the job holding the slot releases it"""
+        client = FakeRedis()
+        claim_queued_slot('int-1', 'products', 'job-1', None, client)
+
+        release_queued_slot('int-1', 'products', 'job-2', client)
+        assert claim_queued_slot('int-1', 'products', 'job-3', None, client) == 'job-1'
+
+        release_queued_slot('int-1', 'products', 'job-1', client)
+        assert claim_queued_slot('int-1', 'products', 'job-3', None, client) is None
@@ -0,0 +1,189 @@
+"""Tests for fair scheduling of jobs across tenants"""
+
+import json
+from collections import Counter
+
+from app.services.sync_fair_queue import FairSyncQueue, encode_message, plan_dispatch
+
+class FakeRedis:
+    """In-memory Redis with the subset used by the fair queues"""
+
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.hashes = {}
+        self.values = {}
+        self.results = None
+
+    def pipeline(self, transaction=True):
+        self.results = []
+        return self
+
+    def execute(self):
+        results, self.results = self.results, None
+        return results
+
+    def _reply(self, value):
+        if self.results is not None:
+            self.results.append(value)
+        return value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def eval(self, script, numkeys, *args):
+        if 'LLEN' in script:
+            tenant_list, ring, deficits, tenant_id = args
+            if not self.lists.get(tenant_list):
+                self.zsets.get(ring, {}).pop(tenant_id, None)
+                self.hashes.get(deficits, {}).pop(tenant_id, None)
+            return self._reply(1)
+        key, owner = args
+        if self.values.get(key) == owner:
+            del self.values[key]
+        return self._reply(1)
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return self._reply(len(self.lists[key]))
+
+    def lpush(self, key, *values):
+        self.lists.setdefault(key, [])[:0] = reversed(values)
+        return self._reply(len(self.lists[key]))
+
+    def lpop(self, key, count):
+        items = self.lists.get(key, [])
+        popped, self.lists[key] = items[:count], items[count:]
+        return self._reply(popped or None)
+
+    def llen(self, key):
+        return self._reply(len(self.lists.get(key, [])))
+
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+            return self._reply(1)
+        return self._reply(0)
+
+    def zadd(self, key, mapping, nx=False, xx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if (nx and member in zset) or (xx and member not in zset):
+                continue
+            zset[member] = score
+        return self._reply(None)
+
+    def zrange(self, key, start, end):
+        zset = self.zsets.get(key, {})
+        return sorted(zset, key=zset.get)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.hashes.setdefault(key, {}).update(mapping or {field: value})
+        return self._reply(None)
+
+    def hmget(self, key, fields):
+        return self._reply([self.hashes.get(key, {}).get(field) for field in fields])
+
+def fair_queue(published, broker=None):
+    return FairSyncQueue(FakeRedis(), broker or FakeRedis(), publish=published.append)
+
+def enqueue(queue, tenant_id, weight, count):
+    queue.push('sync_products', tenant_id, weight, [
+        encode_message('app.services.sync_tasks.sync_products', f'{tenant_id}-{i}', f'task-{tenant_id}-{i}', 6)
+        for i in range(count)
+    ])
+
+class TestPlanDispatch:
+    """Tests for deficit round robin across tenants"""
+
+    def test_small_tenant_is_not_starved(self):
+        """Test that a small tenant is served even behind a huge backlog"""
+        picks, _, _ = plan_dispatch(['big', 'small'], {}, {}, {'big': 1000000, 'small': 1}, budget=2)
+
+        assert picks == ['big', 'small']
+
+    def test_weights_follow_plan(self):
+        """Test shares proportional to the plan weight"""
+        weights = {'enterprise': 10.0, 'professional': 3.0, 'starter': 1.0}
+        backlog = dict.fromkeys(weights, 1000)
+
+        picks, _, _ = plan_dispatch(list(weights), {}, weights, backlog, budget=140)
+
+        assert Counter(picks) == {'enterprise': 100, 'professional': 30, 'starter': 10}
+
+    def test_credit_carries_over_between_dispatches(self):
+        """Test that leftover credit and ring order persist between dispatches"""
+        weights = {'a': 3.0, 'b': 1.0}
+        backlog = {'a': 10, 'b': 10}
+
+        picks, deficits, ring = plan_dispatch(['a', 'b'], {}, weights, backlog, budget=2)
+        assert picks == ['a', 'a']
+        assert ring == ['a', 'b'] and deficits['a'] == 1
+
+        picks, deficits, ring = plan_dispatch(ring, deficits, weights, {'a': 8, 'b': 10}, budget=2)
+        assert picks == ['a', 'b']
+        assert ring == ['a', 'b']
+
+    def test_idle_tenants_leave_the_ring(self):
+        """Test that tenants without backlog leave the ring without banking credit"""
+        picks, deficits, ring = plan_dispatch(['a', 'b'], {'b': 5.0}, {'a': 5.0}, {'a': 1, 'b': 0}, budget=10)
+
+        assert picks == ['a']
+        assert ring == [] and deficits == {}
+
+    def test_fractional_weights(self):
+        """Test that weights below 1 are served once every few rounds"""
+        picks, _, _ = plan_dispatch(['half', 'one'], {}, {'half': 0.5}, {'half': 10, 'one': 10}, budget=6)
+
+        assert Counter(picks) == {'one': 4, 'half': 2}
+
+class TestFairSyncQueue:
+    """Tests for the per-tenant sub-queues in Redis"""
+
+    def test_dispatch_releases_round_robin(self):
+        """Test alternating releases across tenants up to the queue depth"""
+        published = []
+        queue = fair_queue(published)
+        enqueue(queue, 'big', 1.0, 50)
+        enqueue(queue, 'small', 1.0, 2)
+
+        assert queue.dispatch('sync_products') == 8
+        assert [message['args'][0] for message in published][:5] == ['big-0', 'small-0', 'big-1', 'small-1', 'big-2']
+        assert published[0]['task_id'] == 'task-big-0' and published[0]['priority'] == 6
+
+        # The tenant without backlog leaves the ring
+        assert queue.redis.zrange('sync:fair:sync_products:ring', 0, -1) == ['big']
+
+    def test_dispatch_tops_up_to_depth(self):
+        """Test that the Celery queue never exceeds SYNC_FAIR_QUEUE_DEPTH messages"""
+        published = []
+        broker = FakeRedis()
+        broker.lists = {'sync_products:6': ['m'] * 5, 'sync_products:9': ['m'] * 2}
+        queue = fair_queue(published, broker)
+        enqueue(queue, 'a', 1.0, 10)
+
+        assert queue.dispatch('sync_products') == 1
+
+    def test_failed_publish_keeps_place(self):
+        """Test that an unpublished job goes back to the head of its sub-queue"""
+        def broken(message):
+            raise ConnectionError('broker down')
+
+        queue = FairSyncQueue(FakeRedis(), FakeRedis(), publish=broken)
+        enqueue(queue, 'a', 1.0, 2)
+
+        assert queue.dispatch('sync_products') == 0
+        assert [json.loads(m)['args'][0] for m in queue.redis.lists['sync:fair:sync_products:t:a']] == ['a-0', 'a-1']
+
+    def test_discard_cancelled_job(self):
+        """Test removing a job cancelled before its release"""
+        queue = fair_queue([])
+        enqueue(queue, 'a', 1.0, 2)
+        message = encode_message('app.services.sync_tasks.sync_products', 'a-1', 'task-a-1', 6)
+
+        assert queue.discard('sync_products', 'a', message)
+        assert len(queue.redis.lists['sync:fair:sync_products:t:a']) == 1
@@ -0,0 +1,177 @@
+"""Tests for the sync job progress channel"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+from app.infra.event_bus import SyncEventPublisher
+from app.services.sync_progress import ProgressChannel, read_progress, write_progress
+
+class FakeRedis:
+    """In-memory Redis with the subset used by the progress channel"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def execute(self):
+        return []
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+class BrokenRedis(FakeRedis):
+    """Unavailable Redis"""
+
+    def execute(self):
+        raise redis.ConnectionError("down")
+
+    def hgetall(self, key):
+        raise redis.ConnectionError("down")
+
+    def publish(self, channel, message):
+        raise redis.ConnectionError("down")
+
+def make_channel(client, on_flush, flush_interval):
+    """Create a progress channel with an event publisher on the same Redis"""
+    return ProgressChannel(
+        'job-1', on_flush, redis_client=client, flush_interval=flush_interval,
+        publisher=SyncEventPublisher(redis_client=client, flush_interval=60)
+    )
+
+class TestProgressChannel:
+    """Tests for the Redis progress buffer"""
+
+    def test_updates_are_coalesced(self):
+        """Test that frequent updates don't write to the database on every step"""
+        client = FakeRedis()
+        flushes = []
+        channel = make_channel(client, flushes.append, 60)
+
+        for processed in range(0, 500, 100):
+            channel.update(processed=processed, total=500, progress=processed // 5)
+
+        assert flushes == []
+        assert read_progress('job-1', client)['processed'] == 400
+
+    def test_flush_after_interval(self):
+        """Test the database write after the configured interval"""
+        flushes = []
+        channel = make_channel(FakeRedis(), flushes.append, 0)
+
+        channel.update(progress=50, processed=10)
+
+        assert flushes[0]['progress'] == 50
+
+    def test_transition_is_recorded_immediately(self):
+        """Test that state changes go straight to Redis"""
+        client = FakeRedis()
+        channel = make_channel(client, lambda snapshot: None, 60)
+
+        channel.transition('completed', progress=100, result={'success': True})
+
+        state = read_progress('job-1', client)
+        assert state['status'] == 'completed'
+        assert state['result'] == {'success': True}
+
+    def test_falls_back_to_database_without_redis(self):
+        """Test that without Redis progress is written to the database"""
+        flushes = []
+        channel = make_channel(BrokenRedis(), flushes.append, 60)
+
+        channel.update(progress=10)
+
+        assert len(flushes) == 1
+        assert read_progress('job-1', BrokenRedis()) is None
+
+    def test_write_progress_sets_ttl(self):
+        """Test expiry of the progress hash"""
+        client = FakeRedis()
+
+        assert write_progress('job-2', {'status': 'queued'}, client)
+        assert client.ttls['sync:progress:job-2'] > 0
+
+class TestSyncEventPublisher:
+    """Tests for the event bus between workers and the API"""
+
+    def test_progress_events_are_coalesced_per_job(self):
+        """Test that progress events of the same job are merged in a batch"""
+        client = FakeRedis()
+        publisher = SyncEventPublisher(redis_client=client, flush_interval=60)
+
+        publisher.publish({'job_id': 'a', 'status': 'running', 'message': 'Iniciando'})
+        for processed in (100, 200, 300):
+            publisher.publish({'job_id': 'a', 'processed': processed})
+        publisher.publish({'job_id': 'b', 'processed': 10})
+
+        assert len(client.published) == 1
+        publisher.flush()
+
+        channel, batch = client.published[1]
+        assert channel == 'sync:events'
+        assert client.published[0][1]['events'] == [{'job_id': 'a', 'status': 'running', 'message': 'Iniciando'}]
+        assert batch['events'] == [
+            {'job_id': 'a', 'processed': 300},
+            {'job_id': 'b', 'processed': 10},
+        ]
+
+    def test_terminal_event_flushes_immediately(self):
+        """Test immediate publishing of final events"""
+        client = FakeRedis()
+        publisher = SyncEventPublisher(redis_client=client, flush_interval=60)
+        publisher.last_flush = float('inf')
+
+        publisher.publish({'job_id': 'a', 'processed': 5})
+        assert client.published == []
+
+        publisher.publish({'job_id': 'a', 'status': 'completed', 'progress': 100})
+        assert client.published[0][1]['events'] == [
+            {'job_id': 'a', 'processed': 5, 'status': 'completed', 'progress': 100}
+        ]
+
+    def test_last_progress_flushed_after_quiet_period(self):
+        """Test that the last progress before a pause arrives without another publish"""
+        client = FakeRedis()
+        publisher = SyncEventPublisher(redis_client=client, flush_interval=0.1)
+
+        publisher.publish({'job_id': 'a', 'processed': 1})
+        publisher.publish({'job_id': 'a', 'processed': 2})
+        assert [batch['events'] for _, batch in client.published] == [[{'job_id': 'a', 'processed': 1}]]
+
+        time.sleep(0.3)
+        assert client.published[-1][1]['events'] == [{'job_id': 'a', 'processed': 2}]
+
+    def test_concurrent_publish_loses_no_events(self):
+        """Test that threads publishing at the same time lose no events (async worker)"""
+        client = FakeRedis()
+        publisher = SyncEventPublisher(redis_client=client, flush_interval=0, max_batch=7)
+
+        with ThreadPoolExecutor(max_workers=8) as threads:
+            list(threads.map(lambda i: publisher.publish({'job_id': f'job-{i}', 'processed': i}), range(500)))
+        publisher.flush()
+
+        published = [event['job_id'] for _, batch in client.published for event in batch['events']]
+        assert sorted(published) == sorted(f'job-{i}' for i in range(500))
+
+    def test_publish_without_redis_does_not_raise(self):
+        """Test that Redis failures don't interrupt the worker"""
+        publisher = SyncEventPublisher(redis_client=BrokenRedis(), flush_interval=0)
+
+        publisher.publish({'job_id': 'a', 'status': 'failed'})
+
+        assert publisher.pending == {}
@@ -0,0 +1,136 @@
+"""Tests for the adaptive sync scheduler"""
+
+import random
+
+from app.services.sync_scheduler import (
+    AdaptiveSyncScheduler, ScheduleState,
+    initial_offset, next_interval, record_outcome
+)
+
+class FakeRedis:
+    """In-memory Redis with the subset used by the scheduler"""
+
+    def __init__(self):
+        self.zset = {}
+        self.hash = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def zadd(self, key, mapping, nx=False, xx=False):
+        for member, score in mapping.items():
+            if (nx and member in self.zset) or (xx and member not in self.zset):
+                continue
+            self.zset[member] = score
+
+    def zrange(self, key, start, end):
+        return sorted(self.zset, key=self.zset.get)
+
+    def zrangebyscore(self, key, low, high, start=0, num=None):
+        due = [member for member in sorted(self.zset, key=self.zset.get) if self.zset[member] <= high]
+        return due[start:start + num]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zset.pop(member, None)
+
+    def hmget(self, key, fields):
+        return [self.hash.get(field) for field in fields]
+
+    def hset(self, key, field, value):
+        self.hash[field] = value
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hash.pop(field, None)
+
+class TestScheduleIntervals:
+    """Tests for computing the interval between runs"""
+
+    def test_unknown_rate_uses_base_interval(self):
+        """Test the default interval before the change rate is known"""
+        assert next_interval(ScheduleState()) == 1800
+
+    def test_busy_store_syncs_more_often(self):
+        """Test that stores with many changes sync more often"""
+        busy = next_interval(ScheduleState(change_rate=2000))
+        quiet = next_interval(ScheduleState(change_rate=100))
+        dormant = next_interval(ScheduleState(change_rate=0))
+
+        assert busy == 300
+        assert busy < quiet < dormant
+        assert dormant == 21600
+
+    def test_failures_back_off(self):
+        """Test exponential back-off after consecutive failures"""
+        healthy = next_interval(ScheduleState(change_rate=200))
+        failing = next_interval(ScheduleState(change_rate=200, failures=2))
+
+        assert failing == healthy * 4
+
+    def test_record_outcome_learns_change_rate(self):
+        """Test computing the change rate between successful runs"""
+        state = record_outcome(ScheduleState(), 500, True, now=0)
+        assert state.change_rate is None
+
+        state = record_outcome(state, 50, True, now=1800)
+        assert state.change_rate == 100
+
+        failed = record_outcome(state, 0, False, now=3600)
+        assert failed.failures == 1
+        assert failed.last_success_at == 1800
+
+class TestAdaptiveSyncScheduler:
+    """Tests for the Redis queue of upcoming runs"""
+
+    def test_new_integrations_are_spread(self):
+        """Test that new integrations get different phases within the interval"""
+        client = FakeRedis()
+        scheduler = AdaptiveSyncScheduler(client, random.Random(1))
+        ids = [f"int-{i}" for i in range(100)]
+
+        scheduler.register(ids, now=0)
+
+        offsets = sorted(client.zset.values())
+        assert all(0 <= offset <= 1800 for offset in offsets)
+        # No 5-minute window holds more than a third of the integrations
+        assert max(sum(1 for o in offsets if start <= o < start + 300) for start in range(0, 1800, 60)) < 34
+        assert client.zset['int-1'] == initial_offset('int-1')
+
+    def test_pop_due_reschedules(self):
+        """Test that dispatched integrations are not repeated on the next tick"""
+        client = FakeRedis()
+        scheduler = AdaptiveSyncScheduler(client, random.Random(1))
+        client.zset = {'a': 10, 'b': 20, 'c': 5000}
+
+        assert scheduler.pop_due(limit=1, now=100) == ['a']
+        assert scheduler.pop_due(limit=10, now=100) == ['b']
+        assert client.zset['a'] >= 100 + 1800 * 0.8
+
+    def test_register_drops_inactive(self):
+        """Test removing inactive integrations from the schedule"""
+        client = FakeRedis()
+        scheduler = AdaptiveSyncScheduler(client)
+        client.zset = {'a': 10, 'b': 20}
+        client.hash = {'b': ScheduleState().to_json()}
+
+        scheduler.register(['a'], now=0)
+
+        assert list(client.zset) == ['a']
+        assert client.hash == {}
+
+    def test_record_reschedules_from_completion(self):
+        """Test rescheduling from the run result"""
+        client = FakeRedis()
+        scheduler = AdaptiveSyncScheduler(client, random.Random(1))
+        client.zset = {'a': 0}
+
+        scheduler.record('a', 0, True, now=1000)
+        next_run = scheduler.record('a', 0, True, now=4600)
+
+        assert client.zset['a'] == next_run
+        assert next_run >= 4600 + 21600 * 0.8
+        assert ScheduleState.from_json(client.hash['a']).change_rate == 0
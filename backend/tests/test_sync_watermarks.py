@@ -0,0 +1,64 @@
+"""Tests for incremental sync watermarks"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.services.sync_watermarks import plan_sync_window, advance_watermark
+
+NOW = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+class TestPlanSyncWindow:
+    """Tests for choosing between incremental and full syncs"""
+
+    def test_first_run_is_full(self):
+        """Test that an integration without a watermark runs a full scan"""
+        window = plan_sync_window({}, 'inventory', now=NOW)
+
+        assert window.is_full
+        assert window.to_dict() == {'mode': 'full', 'updated_since': None}
+
+    def test_incremental_after_watermark(self):
+        """Test the incremental window with overlap for clock skew"""
+        cursors = {'inventory': {
+            'watermark': (NOW - timedelta(minutes=30)).isoformat(),
+            'last_full_sync': (NOW - timedelta(hours=1)).isoformat()
+        }}
+
+        window = plan_sync_window(cursors, 'inventory', now=NOW)
+
+        expected = NOW - timedelta(minutes=30) - timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP)
+        assert window.updated_since == expected
+
+    def test_reconciliation_when_due(self):
+        """Test periodic and forced full scans"""
+        cursors = {'orders': {
+            'watermark': (NOW - timedelta(minutes=30)).isoformat(),
+            'last_full_sync': (NOW - timedelta(seconds=settings.SYNC_RECONCILE_INTERVAL)).isoformat()
+        }}
+
+        assert plan_sync_window(cursors, 'orders', now=NOW).is_full
+        cursors['orders']['last_full_sync'] = NOW.isoformat()
+        assert plan_sync_window(cursors, 'orders', force_full=True, now=NOW).is_full
+
+class TestAdvanceWatermark:
+    """Tests for advancing the watermark"""
+
+    def test_full_run_records_reconciliation(self):
+        """Test that a full scan records the reconciliation time"""
+        cursors = advance_watermark(None, plan_sync_window(None, 'inventory', now=NOW))
+
+        assert cursors == {'inventory': {'watermark': NOW.isoformat(), 'last_full_sync': NOW.isoformat()}}
+
+    def test_incremental_run_keeps_other_types(self):
+        """Test that an incremental run keeps the other keys"""
+        original = {
+            'inventory': {'watermark': NOW.isoformat(), 'last_full_sync': NOW.isoformat()},
+            'orders': {'watermark': 'x'}
+        }
+        later = NOW + timedelta(minutes=30)
+
+        cursors = advance_watermark(original, plan_sync_window(original, 'inventory', now=later))
+
+        assert cursors['inventory'] == {'watermark': later.isoformat(), 'last_full_sync': NOW.isoformat()}
+        assert cursors['orders'] == {'watermark': 'x'}
+        assert cursors is not original
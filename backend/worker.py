@@ -2,6 +2,23 @@
 """Celery Worker
 
 Celery worker for processing background tasks.
+
+Run ``python worker.py`` for the general worker and ``python worker.py priority``
+for the worker reserved for URGENT/HIGH syncs, so user-triggered syncs always
+have free slots no matter how many scheduled jobs are waiting.
+
+``python worker.py async`` consumes the same queues as the general worker but
+runs up to ``SYNC_ASYNC_MAX_IN_FLIGHT`` syncs in one process: task threads hand
+their connector calls to a shared event loop and product writes go through the
+asyncpg engine, so waiting on supplier APIs doesn't tie up a process per sync.
+Limits of that mode:
+
+- Celery's threads pool enforces neither ``soft_time_limit`` nor ``time_limit``.
+  The soft limit is applied to each task's ``run_async`` calls instead, which
+  covers the connector and write work and keeps checkpoint continuations
+  working; the hard limit is not enforced, since a thread can't be killed.
+- Job bookkeeping (SyncJob/Integration rows) still uses a regular session per
+  task thread, so concurrency is capped at the sync database pool size.
 """
 
 import os
@@ -12,17 +29,70 @@ from pathlib import Path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+from celery.signals import task_postrun, task_prerun, worker_shutdown
+
 from app.core.celery_config import celery_app
+from app.core.config import settings
+from app.infra.database import init_async_database, init_database
+from app.infra.http_client import set_task_deadline, start_shared_loop, stop_shared_loop
+
+DEFAULT_QUEUES = 'urgent,high_priority,sync_products,sync_inventory,sync_orders,sync_bulk,default,maintenance'
+
+def async_concurrency() -> int:
+    """In-flight syncs of the async worker, capped by the sync database pool"""
+    return min(settings.SYNC_ASYNC_MAX_IN_FLIGHT, settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW)
+
+WORKER_POOLS = {
+    'default': {
+        'queues': DEFAULT_QUEUES,
+        'concurrency': settings.CELERY_WORKER_CONCURRENCY,
+        'pool': 'prefork',
+    },
+    'priority': {
+        'queues': 'urgent,high_priority',
+        'concurrency': settings.CELERY_PRIORITY_WORKER_CONCURRENCY,
+        'pool': 'prefork',
+    },
+    'async': {
+        'queues': DEFAULT_QUEUES,
+        'concurrency': async_concurrency(),
+        'pool': 'threads',
+    },
+}
+
+def start_task_deadline(task=None, **kwargs):
+    """Apply the task's soft time limit to its work on the shared loop"""
+    set_task_deadline(getattr(task, 'soft_time_limit', None) or celery_app.conf.task_soft_time_limit)
+
+def clear_task_deadline(**kwargs):
+    set_task_deadline(None)
+
+def start_async_mode():
+    """Share one event loop and the asyncpg engine among the worker's task threads"""
+    init_database()
+    init_async_database()
+    start_shared_loop()
+    # The threads pool ignores soft_time_limit; task_prerun runs in the task's own thread
+    task_prerun.connect(start_task_deadline, weak=False)
+    task_postrun.connect(clear_task_deadline, weak=False)
+    # Celery's threads pool doesn't fire worker_process_shutdown, so close the loop here
+    worker_shutdown.connect(lambda **kwargs: stop_shared_loop(), weak=False)
 
 if __name__ == '__main__':
+    pool = sys.argv[1] if len(sys.argv) > 1 else 'default'
+    if pool not in WORKER_POOLS:
+        sys.exit(f"Unknown worker pool '{pool}', expected one of: {', '.join(WORKER_POOLS)}")
+
+    if pool == 'async':
+        start_async_mode()
+
     # Start the Celery worker
     celery_app.start([
         'worker',
         '--loglevel=info',
-        '--concurrency=4',
-        '--queues=default,sync_products,sync_inventory,sync_orders,sync_bulk,maintenance,high_priority,urgent',
-        '--hostname=worker@%h',
-        '--max-tasks-per-child=1000',
-        '--time-limit=600',
-        '--soft-time-limit=300'
-    ])
\ No newline at end of file
+        f"--pool={WORKER_POOLS[pool]['pool']}",
+        f"--concurrency={WORKER_POOLS[pool]['concurrency']}",
+        f"--queues={WORKER_POOLS[pool]['queues']}",
+        f'--hostname={pool}@%h',
+        f'--max-tasks-per-child={settings.CELERY_WORKER_MAX_TASKS_PER_CHILD}',
+    ])
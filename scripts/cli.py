@@ -0,0 +1,101 @@
+"""
+CLI único dos scripts de manutenção (rodar da raiz do repositório):
+
+    python -m scripts.cli backfill-categories --concurrency 16 --rate 10
+    python -m scripts.cli create-categories --concurrency 8 --rate 10 --bling-rate 3
+    python -m scripts.cli refresh-tokens --provider ml
+    python -m scripts.cli prefetch-categories --site MLB
+
+Os jobs rodam em um pool asyncio (``--concurrency`` chamadas simultâneas, ``--rate``
+requisições/s), mostram vazão e ETA ao vivo, e o backfill guarda um checkpoint local
+para recomeçar de onde parou.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import Optional
+
+from .runner import Checkpoint, Progress, Runner
+
+async def refresh_tokens(runner: Runner, provider: Optional[str] = None):
+    """Renova os tokens ML/Bling que vencem em breve, um refresh por conta"""
+    from . import token_manager
+
+    q = token_manager.supabase.table("integrations").select("user_id, provider")
+    q = q.eq("provider", provider) if provider else q.in_("provider", list(token_manager.TOKEN_URLS))
+    integrations = (await runner.call(lambda: q.execute().data)) or []
+    progress = Progress("Tokens", len(integrations))
+    refreshed = 0
+
+    async def refresh(integration):
+        nonlocal refreshed
+        try:
+            if await runner.call(token_manager.refresh_if_expiring, integration["user_id"], integration["provider"]):
+                refreshed += 1
+            progress.advance()
+        except Exception as e:
+            print(f"❌ {integration['provider']} {integration['user_id']}: {e}")
+            progress.advance(0, 1)
+
+    await asyncio.gather(*[refresh(integration) for integration in integrations])
+    progress.finish()
+    print(f"\nResumo: {refreshed} renovados, {progress.failed} falhas, {len(integrations)} integrações.")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m scripts.cli", description="Scripts de manutenção ML/Bling")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def pool_options(command, concurrency: int, rate: Optional[float]):
+        command.add_argument("--concurrency", type=int, default=concurrency, help="chamadas simultâneas")
+        command.add_argument("--rate", type=float, default=rate, help="requisições por segundo à API do ML")
+
+    backfill = commands.add_parser("backfill-categories", help="grava a categoria ML dos produtos pendentes")
+    pool_options(backfill, int(os.getenv("ML_BACKFILL_WORKERS", "8")), float(os.getenv("ML_REQUESTS_PER_SECOND", "10")))
+    backfill.add_argument("--user-id", help="integração ML de um usuário específico")
+    backfill.add_argument("--restart", action="store_true", help="ignora o checkpoint e recomeça do início")
+
+    create = commands.add_parser("create-categories", help="cria no Bling as cadeias de categorias dos produtos")
+    pool_options(create, int(os.getenv("ML_BACKFILL_WORKERS", "8")), float(os.getenv("ML_REQUESTS_PER_SECOND", "10")))
+    create.add_argument("--bling-rate", type=float, default=float(os.getenv("BLING_REQUESTS_PER_SECOND", "3")),
+                        help="criações por segundo na API do Bling")
+
+    tokens = commands.add_parser("refresh-tokens", help="renova os tokens OAuth que vencem em breve")
+    pool_options(tokens, 4, None)
+    tokens.add_argument("--provider", choices=["ml", "bling"])
+
+    prefetch = commands.add_parser("prefetch-categories", help="carrega a árvore de categorias do ML no cache local")
+    prefetch.add_argument("--site", default="MLB")
+
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "prefetch-categories":
+        from .ml_categories import get_cache, prefetch_site
+        total = prefetch_site(args.site, os.getenv("ML_ACCESS_TOKEN"))
+        print(f"✅ {total} categorias do site {args.site} salvas em {get_cache().path}")
+        return 0
+
+    with Runner(args.concurrency, args.rate) as runner:
+        if args.command == "backfill-categories":
+            from .sync_products import backfill
+            checkpoint = Checkpoint(f"backfill-categories-{args.user_id or 'default'}")
+            if args.restart:
+                checkpoint.clear()
+            asyncio.run(backfill(runner, args.user_id, checkpoint))
+        elif args.command == "create-categories":
+            from .create_missing_categorias import create_missing
+            asyncio.run(create_missing(runner, args.bling_rate))
+        elif args.command == "refresh-tokens":
+            asyncio.run(refresh_tokens(runner, args.provider))
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrompido; rode o mesmo comando para continuar do checkpoint.")
+        sys.exit(130)
@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import sys
+import requests
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Mesmo cache SQLite do backend (backend/app/infra/ml_categories.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+from app.infra.ml_categories import CategoryCache, DEFAULT_TTL, FetchResult  # noqa: E402
+
+ML_API = "https://api.mercadolibre.com"
+
+_cache: Optional[CategoryCache] = None
+
+def get_cache() -> CategoryCache:
+    """Cache de categorias no caminho configurado (ML_CATEGORY_CACHE_PATH)"""
+    global _cache
+    if _cache is None:
+        _cache = CategoryCache(os.getenv("ML_CATEGORY_CACHE_PATH"),
+                               int(os.getenv("ML_CATEGORY_CACHE_TTL", DEFAULT_TTL)))
+    return _cache
+
+def get_category(cat_id: str, session: Optional[requests.Session] = None, limiter=None,
+                 token: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Categoria {id, name, path, path_str} do cache local; só vai à API se faltar ou vencer"""
+    def fetch(category_id: str, etag: Optional[str]) -> FetchResult:
+        if limiter:
+            limiter.acquire()
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        r = (session or requests).get(f"{ML_API}/categories/{category_id}", headers=headers, timeout=30)
+        if r.status_code in (304, 404):
+            return r.status_code, None, etag
+        if r.status_code >= 400:
+            raise RuntimeError(f"Erro categoria {category_id}: {r.status_code} {r.text}")
+        return r.status_code, r.json(), r.headers.get("ETag")
+
+    return get_cache().resolve(str(cat_id), fetch)
+
+def prefetch_site(site_id: str = "MLB", token: Optional[str] = None) -> int:
+    """Baixa a árvore inteira do site para o cache local"""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    r = requests.get(f"{ML_API}/sites/{site_id}/categories/all", headers=headers, timeout=300)
+    if r.status_code >= 400:
+        raise RuntimeError(f"Erro ao baixar categorias do site {site_id}: {r.status_code} {r.text[:200]}")
+    body = r.content
+    # O dump vem como arquivo gzip, não como Content-Encoding
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    return get_cache().prefetch(json.loads(body))
+
+if __name__ == "__main__":
+    site = sys.argv[1] if len(sys.argv) > 1 else "MLB"
+    total = prefetch_site(site, os.getenv("ML_ACCESS_TOKEN"))
+    print(f"✅ {total} categorias do site {site} salvas em {get_cache().path}")
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CHECKPOINT_DIR = Path(os.getenv("SCRIPTS_CHECKPOINT_DIR") or Path.home() / ".cache" / "ml-bling-sync" / "checkpoints")
+
+class RateLimiter:
+    """Token bucket compartilhado pelas threads (requisições por segundo)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """Sessão com conexões keep-alive e retry (respeita Retry-After nos 429)"""
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+class Runner:
+    """
+    Pool asyncio para os jobs dos scripts: no máximo ``concurrency`` chamadas ao mesmo tempo.
+    As chamadas HTTP continuam em ``requests`` (bloqueantes) e rodam em threads do pool;
+    ``limiter`` (``rate`` requisições/s) é passado às funções que vão à API.
+    """
+
+    def __init__(self, concurrency: int = 8, rate: Optional[float] = None):
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate) if rate else None
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="runner")
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Progress:
+    """Linha de progresso ao vivo: itens, vazão e ETA"""
+
+    def __init__(self, label: str, total: Optional[int] = None, interval: float = 0.5, stream=sys.stderr):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.rendered = 0.0
+
+    def advance(self, done: int = 1, failed: int = 0):
+        self.done += done
+        self.failed += failed
+        if time.monotonic() - self.rendered >= self.interval:
+            self.render()
+
+    def line(self) -> str:
+        processed = self.done + self.failed
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = processed / elapsed
+        parts = [f"{self.label}: {processed}" + (f"/{self.total}" if self.total else ""), f"{rate:.1f}/s"]
+        if self.total and rate > 0:
+            remaining = max(self.total - processed, 0) / rate
+            parts.append(f"ETA {int(remaining // 60)}m{int(remaining % 60):02d}s")
+        if self.failed:
+            parts.append(f"falhas {self.failed}")
+        return " · ".join(parts)
+
+    def render(self):
+        self.rendered = time.monotonic()
+        self.stream.write(f"\r{self.line()}\033[K")
+        self.stream.flush()
+
+    def finish(self):
+        self.render()
+        self.stream.write("\n")
+
+class Checkpoint:
+    """Estado de um job em arquivo local, gravado de forma atômica para retomar após queda"""
+
+    def __init__(self, name: str, directory: Optional[Path] = None):
+        directory = Path(directory or CHECKPOINT_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{name}.json"
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self, state: Dict[str, Any]):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
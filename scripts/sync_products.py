@@ -1,94 +1,168 @@
-import time
+import asyncio
+import os
 import requests
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
-from .utils import supabase, get_integration_tokens
+from typing import Dict, Any, List, Optional
+from .utils import get_integration_tokens, count_rows, iter_rows, WriteBehindBuffer
+from .runner import Checkpoint, Progress, RateLimiter, Runner, make_session
+from .ml_categories import get_category
 
 ML_API = "https://api.mercadolibre.com"
 
-def fetch_item_category(token: str, item_id: str) -> Optional[str]:
-    """Busca o item no ML e retorna a category_id."""
-    r = requests.get(
-        f"{ML_API}/items/{item_id}",
+# Limite do multiget do ML
+ITEMS_PER_REQUEST = 20
+MAX_WORKERS = int(os.getenv("ML_BACKFILL_WORKERS", "8"))
+ML_REQUESTS_PER_SECOND = float(os.getenv("ML_REQUESTS_PER_SECOND", "10"))
+WRITE_BATCH_SIZE = 500
+READ_PAGE_SIZE = 1000
+
+def fetch_item_categories(session: requests.Session, limiter: Optional[RateLimiter], token: str,
+                          item_ids: List[str]) -> Dict[str, Optional[str]]:
+    """Busca até 20 itens no multiget do ML e retorna item_id -> category_id."""
+    if limiter:
+        limiter.acquire()
+    r = session.get(
+        f"{ML_API}/items",
+        params={"ids": ",".join(item_ids), "attributes": "id,category_id"},
         headers={"Authorization": f"Bearer {token}"},
         timeout=30,
     )
-    if r.status_code == 404:
-        print(f"⚠️ Item {item_id} não encontrado no ML.")
-        return None
     if r.status_code >= 400:
-        raise RuntimeError(f"Erro item {item_id}: {r.status_code} {r.text}")
-    return r.json().get("category_id")
-
-def fetch_category_path(cat_id: str) -> Dict[str, Any]:
-    """Busca a categoria e monta path_from_root -> 'A > B > C'."""
-    r = requests.get(f"{ML_API}/categories/{cat_id}", timeout=30)
-    if r.status_code >= 400:
-        raise RuntimeError(f"Erro categoria {cat_id}: {r.status_code} {r.text}")
-    cat = r.json()
-    path = cat.get("path_from_root", []) or []
-    path_str = " > ".join([n.get("name", "") for n in path]) or cat.get("name", "")
-    return {
-        "id": cat.get("id"),
-        "name": cat.get("name"),
-        "path": path,          # lista de {id, name}
-        "path_str": path_str,  # string pronta
-    }
-
-def main(user_id: Optional[str] = None):
-    try:
-        # Token do ML
-        ml = get_integration_tokens("ml", user_id)
-        print(f"🔑 Token Mercado Livre: {ml['access_token'][:30]} ...")
-
-        # Busca produtos e filtra em Python (simplifica nulos)
-        res = supabase.table("products").select(
-            "id, sku, ml_item_id, ml_category_id, ml_category_path"
-        ).execute()
-        products = res.data or []
-
-        pendentes = [
-            p for p in products
-            if p.get("ml_item_id") and (not p.get("ml_category_id") or not p.get("ml_category_path"))
-        ]
-
-        if not pendentes:
-            print("✅ Nenhum produto pendente (verifique se 'ml_item_id' está preenchido).")
-            return
-
-        ok = 0
-        fail = 0
-
-        for p in pendentes:
-            item_id = str(p["ml_item_id"])
+        raise RuntimeError(f"Erro multiget {item_ids[0]}..: {r.status_code} {r.text}")
+
+    categories: Dict[str, Optional[str]] = dict.fromkeys(item_ids)
+    for entry in r.json():
+        body = entry.get("body") or {}
+        if entry.get("code") == 200 and body.get("id"):
+            categories[str(body["id"])] = body.get("category_id")
+    return categories
+
+def fetch_category_path(cat_id: str, session: Optional[requests.Session] = None,
+                        limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+    """Categoria com path_from_root -> 'A > B > C', do cache local de categorias."""
+    cat = get_category(cat_id, session, limiter)
+    if cat is None:
+        raise RuntimeError(f"Categoria {cat_id} não encontrada no ML")
+    return cat
+
+def pending_filter(q):
+    """ml_item_id preenchido e categoria ainda não gravada (filtro no Supabase)"""
+    return q.not_.is_("ml_item_id", "null").or_("ml_category_id.is.null,ml_category_path.is.null")
+
+async def backfill(runner: Runner, user_id: Optional[str] = None, checkpoint: Optional[Checkpoint] = None):
+    """Grava a categoria ML dos produtos pendentes, página a página
+
+    Depois de cada página gravada sem falhas o checkpoint guarda o último id lido;
+    uma execução interrompida recomeça dali em vez de reler itens já tentados.
+    Após uma página com falha (API ou gravação) o checkpoint para de avançar, e a
+    próxima execução relê a partir dela: o que já foi gravado sai do filtro de pendentes.
+    """
+    # Token do ML
+    ml = await runner.call(get_integration_tokens, "ml", user_id)
+    token = ml["access_token"]
+    print(f"🔑 Token Mercado Livre: {token[:30]} ...")
+
+    state = checkpoint.load() if checkpoint else {}
+    if state.get("last_id"):
+        print(f"↩️ Retomando após o produto {state['last_id']}.")
+
+    session = make_session(runner.concurrency)
+    total = await runner.call(count_rows, "products", pending_filter, start_after=state.get("last_id"))
+    progress = Progress("Categorias ML", total)
+    # Cada categoria é buscada uma vez, por mais produtos que a usem
+    categories: Dict[str, asyncio.Future] = {}
+
+    def category(cat_id: str) -> asyncio.Future:
+        if cat_id not in categories:
+            categories[cat_id] = asyncio.ensure_future(runner.call(fetch_category_path, cat_id, session, runner.limiter))
+        return categories[cat_id]
+
+    async def resolve(batch: List[str], by_item: Dict[str, List[Dict[str, Any]]], writer: WriteBehindBuffer,
+                      updated_at: str) -> bool:
+        """Enfileira a categoria dos produtos do lote; False se algo deve ser tentado de novo"""
+        try:
+            item_categories = await runner.call(fetch_item_categories, session, runner.limiter, token, batch)
+        except Exception as e:
+            print(f"❌ {e}")
+            progress.advance(0, sum(len(by_item[item_id]) for item_id in batch))
+            return False
+
+        ok = True
+        for item_id, cat_id in item_categories.items():
+            products = by_item[item_id]
+            if not cat_id:
+                # Anúncio removido: tentar de novo não muda nada
+                print(f"⚠️ Item {item_id} não encontrado no ML.")
+                progress.advance(0, len(products))
+                continue
             try:
-                cat_id = fetch_item_category(ml["access_token"], item_id)
-                if not cat_id:
-                    fail += 1
-                    continue
-
-                cat = fetch_category_path(cat_id)
+                cat = await category(cat_id)
+            except Exception as e:
+                print(f"❌ {item_id}: {e}")
+                progress.advance(0, len(products))
+                ok = False
+                continue
 
-                update_payload = {
+            for p in products:
+                writer.add({
+                    "id": p["id"],
                     "ml_category_id": cat["id"],
                     "ml_category_name": cat["name"],
                     "ml_category_path": cat["path_str"],
                     "ml_category_hierarchy": cat["path"],  # JSON
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                }
-                supabase.table("products").update(update_payload).eq("id", p["id"]).execute()
-
-                ok += 1
-                label = p.get("sku") or p["id"]
-                print(f"✅ {label}: {cat['path_str']}")
-            except Exception as e:
-                fail += 1
-                print(f"❌ {item_id}: {e}")
-
-            # Evita burst / respeita rate limit
-            time.sleep(0.2)
+                    "updated_at": updated_at,
+                })
+            progress.advance(len(products))
+        return ok
+
+    # Vira False na primeira página com falha: daí em diante o checkpoint não avança
+    clean = True
+    writer = WriteBehindBuffer("products", WRITE_BATCH_SIZE)
+    try:
+        # Uma página de produtos pendentes por vez: memória constante em tabelas grandes
+        pages = iter_rows("products", "id, sku, ml_item_id", pending_filter, READ_PAGE_SIZE,
+                          start_after=state.get("last_id"))
+        while page := await runner.call(next, pages, None):
+            # Vários produtos podem apontar para o mesmo anúncio
+            by_item: Dict[str, List[Dict[str, Any]]] = {}
+            for p in page:
+                by_item.setdefault(str(p["ml_item_id"]), []).append(p)
+            item_ids = list(by_item)
+            # Um updated_at por página: linhas da mesma categoria viram um único UPDATE
+            updated_at = datetime.now(timezone.utc).isoformat()
+            failed_before = writer.failed
+
+            results = await asyncio.gather(*[
+                resolve(item_ids[i:i + ITEMS_PER_REQUEST], by_item, writer, updated_at)
+                for i in range(0, len(item_ids), ITEMS_PER_REQUEST)
+            ])
+
+            if checkpoint:
+                await runner.call(writer.flush)
+                clean = clean and all(results) and writer.failed == failed_before
+                if clean:
+                    checkpoint.save({"last_id": page[-1]["id"]})
+    finally:
+        # close() grava o resto e espera o timer: fora do event loop
+        await runner.call(writer.close)
+
+    progress.finish()
+    if checkpoint:
+        if clean and not writer.failed:
+            checkpoint.clear()
+        else:
+            print("↩️ Houve falhas: rode de novo para tentar os produtos que faltaram.")
+
+    if not progress.done and not progress.failed:
+        print("✅ Nenhum produto pendente (verifique se 'ml_item_id' está preenchido).")
+        return
+    print(f"\nResumo: atualizados {writer.written}, falhas {progress.failed + writer.failed}, "
+          f"total {progress.done + progress.failed}, categorias {len(categories)}.")
 
-        print(f"\nResumo: atualizados {ok}, falhas {fail}, total {len(pendentes)}.")
+def main(user_id: Optional[str] = None):
+    try:
+        with Runner(MAX_WORKERS, ML_REQUESTS_PER_SECOND) as runner:
+            asyncio.run(backfill(runner, user_id))
     except Exception as e:
         print(f"❌ Erro geral: {e}")
 
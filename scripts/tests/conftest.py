@@ -0,0 +1,88 @@
+"""Fixtures dos testes dos scripts de manutenção (rodar da raiz: python -m pytest scripts/tests)."""
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# scripts.utils e scripts.token_manager criam o cliente Supabase no import
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test.service.role")
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+class FakeQuery:
+    """Query do PostgREST em memória: keyset (gt/order/limit), contagem e update ... in_."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.payload = None
+        self.keys = None
+        self.after = None
+        self.size = None
+
+    @property
+    def not_(self):
+        return self
+
+    def __getattr__(self, name):
+        # Filtros (is_, or_, eq...) não mudam as linhas do fake
+        return lambda *args, **kwargs: self
+
+    def select(self, columns, count=None):
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def in_(self, key, values):
+        self.keys = list(values)
+        return self
+
+    def gt(self, key, value):
+        self.after = value
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.payload is not None:
+            self.client.updates.append((self.table, self.payload, self.keys))
+            if self.client.fail_keys & set(self.keys):
+                raise RuntimeError("canceling statement due to statement timeout")
+            for row in rows:
+                if row["id"] in self.keys:
+                    row.update(self.payload)
+            return SimpleNamespace(data=[], count=None)
+
+        selected = [row for row in rows if self.after is None or row["id"] > self.after]
+        self.client.reads.append(self.after)
+        return SimpleNamespace(data=[dict(row) for row in selected[:self.size]], count=len(selected))
+
+class FakeSupabase:
+    """Cliente Supabase que guarda as tabelas em listas e registra leituras e updates."""
+
+    def __init__(self):
+        self.tables = {}
+        self.updates = []
+        self.reads = []
+        self.fail_keys = set()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Troca o cliente de scripts.utils por um FakeSupabase."""
+    from scripts import utils
+
+    client = FakeSupabase()
+    monkeypatch.setattr(utils, "supabase", client)
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    return client
@@ -0,0 +1,52 @@
+"""Testes para o índice de categorias do Bling."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from scripts.utils_bling_categories import BlingCategoryIndex
+
+class FakeBlingSession:
+    """Sessão que serve uma árvore vazia e registra as criações."""
+
+    def __init__(self):
+        self.created = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"data": []})
+
+    def post(self, url, json=None, **kwargs):
+        # Criação lenta: deixa as outras threads chegarem ao find
+        time.sleep(0.02)
+        with self.lock:
+            self.created.append(json["descricao"])
+            category_id = len(self.created)
+        return SimpleNamespace(status_code=201, headers={}, json=lambda: {"data": {"id": category_id}})
+
+class TestBlingCategoryIndex:
+    """Testes para a busca e criação de categorias no índice."""
+
+    def test_same_normalized_name_created_once(self):
+        """Testa que nomes que só diferem em caixa/espaços criam uma única categoria."""
+        session = FakeBlingSession()
+        index = BlingCategoryIndex("token", session=session)
+        names = ["Árvores de Natal", "árvores de natal", " Árvores  de Natal "] * 3
+
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            ids = list(pool.map(lambda name: index.ensure(None, name), names))
+
+        assert session.created == ["Árvores de Natal"]
+        assert set(ids) == {1}
+
+    def test_chain_under_parent(self):
+        """Testa que a cadeia cria cada nível como filho do anterior."""
+        session = FakeBlingSession()
+        index = BlingCategoryIndex("token", session=session)
+
+        leaf_id, breadcrumb = index.ensure_chain(["Casa", "Decoração"])
+
+        assert leaf_id == 2
+        assert breadcrumb == "Casa > Decoração"
+        assert index.find(1, "decoração") == 2
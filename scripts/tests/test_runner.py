@@ -0,0 +1,92 @@
+"""Testes para o pool, o progresso e o checkpoint dos scripts."""
+
+import asyncio
+import io
+import threading
+import time
+
+from scripts.runner import Checkpoint, Progress, Runner
+
+class TestRunner:
+    """Testes para o pool asyncio de chamadas bloqueantes."""
+
+    def test_call_respects_concurrency(self):
+        """Testa que no máximo ``concurrency`` chamadas rodam ao mesmo tempo."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def work(value):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return value * 2
+
+        async def run(runner):
+            return await asyncio.gather(*[runner.call(work, i) for i in range(8)])
+
+        with Runner(concurrency=2) as runner:
+            results = asyncio.run(run(runner))
+
+        assert results == [i * 2 for i in range(8)]
+        assert peak == 2
+
+    def test_limiter_only_with_rate(self):
+        """Testa que o limitador de requisições só existe quando ``rate`` é informado."""
+        with Runner(concurrency=1) as runner:
+            assert runner.limiter is None
+        with Runner(concurrency=1, rate=5) as runner:
+            assert runner.limiter.rate == 5
+
+class TestProgress:
+    """Testes para a linha de progresso."""
+
+    def test_line_with_total_and_failures(self):
+        """Testa contagem, ETA e falhas na linha renderizada."""
+        stream = io.StringIO()
+        progress = Progress("Categorias", total=10, interval=3600, stream=stream)
+
+        progress.advance(3)
+        progress.advance(0, 1)
+
+        line = progress.line()
+        assert line.startswith("Categorias: 4/10")
+        assert "ETA" in line
+        assert line.endswith("falhas 1")
+
+    def test_finish_renders_and_ends_line(self):
+        """Testa que ``finish`` escreve a última linha e quebra a linha."""
+        stream = io.StringIO()
+        progress = Progress("Tokens", stream=stream)
+
+        progress.advance(2)
+        progress.finish()
+
+        assert "Tokens: 2 ·" in stream.getvalue()
+        assert "ETA" not in stream.getvalue()
+        assert stream.getvalue().endswith("\n")
+
+class TestCheckpoint:
+    """Testes para o checkpoint local dos jobs."""
+
+    def test_save_load_clear(self, tmp_path):
+        """Testa o ciclo gravar, reler em outra instância e apagar."""
+        Checkpoint("backfill", tmp_path).save({"last_id": 42})
+
+        checkpoint = Checkpoint("backfill", tmp_path)
+        assert checkpoint.load() == {"last_id": 42}
+        assert not list(tmp_path.glob("*.tmp"))
+
+        checkpoint.clear()
+        assert checkpoint.load() == {}
+        checkpoint.clear()
+
+    def test_corrupt_file_starts_over(self, tmp_path):
+        """Testa que um arquivo truncado é tratado como checkpoint vazio."""
+        (tmp_path / "backfill.json").write_text('{"last_id": ')
+
+        assert Checkpoint("backfill", tmp_path).load() == {}
@@ -0,0 +1,86 @@
+"""Testes para o backfill de categorias ML dos produtos."""
+
+import asyncio
+
+import pytest
+
+from scripts import sync_products
+from scripts.runner import Checkpoint, Runner
+
+CATEGORY = {"id": "MLB1002", "name": "Televisores", "path_str": "Eletrônicos > Televisores",
+            "path": [{"id": "MLB1000", "name": "Eletrônicos"}, {"id": "MLB1002", "name": "Televisores"}]}
+
+@pytest.fixture
+def catalog(fake_supabase, monkeypatch):
+    """Dez produtos pendentes, páginas de três e o ML respondendo a mesma categoria."""
+    fake_supabase.tables["products"] = [{"id": i, "sku": f"SKU-{i}", "ml_item_id": f"MLB{i}"} for i in range(1, 11)]
+    monkeypatch.setattr(sync_products, "READ_PAGE_SIZE", 3)
+    monkeypatch.setattr(sync_products, "get_integration_tokens", lambda provider, user_id=None: {"access_token": "APP_USR-1"})
+    monkeypatch.setattr(sync_products, "fetch_item_categories",
+                        lambda session, limiter, token, item_ids: dict.fromkeys(item_ids, CATEGORY["id"]))
+    monkeypatch.setattr(sync_products, "fetch_category_path", lambda cat_id, session=None, limiter=None: CATEGORY)
+    return fake_supabase
+
+def run_backfill(checkpoint):
+    with Runner(concurrency=4) as runner:
+        asyncio.run(sync_products.backfill(runner, None, checkpoint))
+
+def written_ids(client):
+    return sorted(key for _, _, keys in client.updates for key in keys)
+
+class TestBackfill:
+    """Testes para a gravação e o checkpoint do backfill."""
+
+    def test_writes_categories_and_clears_checkpoint(self, catalog, tmp_path):
+        """Testa que todos os produtos são gravados com UPDATE e o checkpoint some no fim."""
+        checkpoint = Checkpoint("backfill", tmp_path)
+
+        run_backfill(checkpoint)
+
+        assert written_ids(catalog) == list(range(1, 11))
+        table, payload, _ = catalog.updates[0]
+        assert table == "products"
+        assert payload["ml_category_path"] == CATEGORY["path_str"]
+        assert "id" not in payload
+        assert checkpoint.load() == {}
+
+    def test_resumes_after_checkpoint(self, catalog, tmp_path):
+        """Testa que a leitura recomeça depois do ``last_id`` salvo."""
+        checkpoint = Checkpoint("backfill", tmp_path)
+        checkpoint.save({"last_id": 6})
+
+        run_backfill(checkpoint)
+
+        assert catalog.reads[0] == 6
+        assert written_ids(catalog) == [7, 8, 9, 10]
+
+    def test_failed_page_holds_checkpoint(self, catalog, tmp_path):
+        """Testa que o checkpoint não passa de uma página com falha de gravação."""
+        catalog.fail_keys = {5}
+        checkpoint = Checkpoint("backfill", tmp_path)
+
+        run_backfill(checkpoint)
+
+        assert checkpoint.load() == {"last_id": 3}
+
+        catalog.fail_keys = set()
+        catalog.updates.clear()
+        run_backfill(checkpoint)
+
+        assert 5 in written_ids(catalog)
+        assert checkpoint.load() == {}
+
+    def test_failed_lookup_holds_checkpoint(self, catalog, tmp_path, monkeypatch):
+        """Testa que um multiget com erro também segura o checkpoint."""
+        def fetch(session, limiter, token, item_ids):
+            if "MLB4" in item_ids:
+                raise RuntimeError("Erro multiget MLB4..: 503")
+            return dict.fromkeys(item_ids, CATEGORY["id"])
+
+        monkeypatch.setattr(sync_products, "fetch_item_categories", fetch)
+        checkpoint = Checkpoint("backfill", tmp_path)
+
+        run_backfill(checkpoint)
+
+        assert checkpoint.load() == {"last_id": 3}
+        assert 4 not in written_ids(catalog)
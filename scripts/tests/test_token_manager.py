@@ -0,0 +1,63 @@
+"""Testes para o vencimento e o lock de refresh dos tokens OAuth."""
+
+from datetime import datetime, timedelta, timezone
+
+from scripts import token_manager
+
+class FakeRedis:
+    """Redis com o SET NX PX do lock de refresh."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        self.ttls[key] = px
+        return True
+
+    def eval(self, script, numkeys, key, owner):
+        if self.values.get(key) == owner:
+            del self.values[key]
+            return 1
+        return 0
+
+class TestExpiresAt:
+    """Testes para o cálculo do vencimento absoluto."""
+
+    def test_uses_expires_at_column(self):
+        """Testa que a coluna expires_at vale mais que updated_at + expires_in."""
+        integration = {"expires_at": "2026-10-16T12:00:00Z", "updated_at": "2026-10-16T00:00:00",
+                       "expires_in": 60}
+
+        assert token_manager._expires_at(integration) == datetime(2026, 10, 16, 12, tzinfo=timezone.utc)
+
+    def test_legacy_rows_without_column(self):
+        """Testa linhas antigas: updated_at sem fuso mais expires_in."""
+        integration = {"updated_at": "2026-10-16T00:00:00", "expires_in": 21600}
+
+        expected = datetime(2026, 10, 16, tzinfo=timezone.utc) + timedelta(hours=6)
+        assert token_manager._expires_at(integration) == expected
+        assert token_manager._expires_at({}) is None
+
+class TestRefreshLock:
+    """Testes para o lock de refresh compartilhado."""
+
+    def test_lock_outlives_refresh_request(self):
+        """Testa que o TTL do lock cobre o timeout do POST de refresh com folga."""
+        assert token_manager.REFRESH_LOCK_TTL_MS > token_manager.REFRESH_TIMEOUT * 1000 * 2
+
+    def test_single_owner_until_release(self, monkeypatch):
+        """Testa que só um processo pega o lock e que o dono o libera."""
+        client = FakeRedis()
+        monkeypatch.setattr(token_manager, "_redis", lambda: client)
+
+        release = token_manager._acquire_refresh_lock("user-1", "ml")
+        assert release is not None
+        assert client.ttls["oauth:refresh:ml:user-1"] == token_manager.REFRESH_LOCK_TTL_MS
+        assert token_manager._acquire_refresh_lock("user-1", "ml") is None
+
+        release()
+        assert token_manager._acquire_refresh_lock("user-1", "ml") is not None
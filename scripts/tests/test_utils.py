@@ -0,0 +1,69 @@
+"""Testes para a leitura paginada e a gravação em lote no Supabase."""
+
+import time
+
+from scripts.utils import UPDATE_KEYS_PER_REQUEST, WriteBehindBuffer, count_rows, iter_rows
+
+class TestIterRows:
+    """Testes para a leitura keyset das tabelas."""
+
+    def test_pages_by_key(self, fake_supabase):
+        """Testa páginas seguidas pela última chave lida, retomando de ``start_after``."""
+        fake_supabase.tables["products"] = [{"id": i} for i in range(1, 8)]
+
+        pages = list(iter_rows("products", "id", page_size=3, start_after=1))
+
+        assert [[row["id"] for row in page] for page in pages] == [[2, 3, 4], [5, 6, 7]]
+        assert fake_supabase.reads == [1, 4, 7]
+        assert count_rows("products", start_after=1) == 6
+
+class TestWriteBehindBuffer:
+    """Testes para o buffer de updates em lote."""
+
+    def test_groups_rows_with_same_payload(self, fake_supabase):
+        """Testa um UPDATE ... IN por payload, sem inserir linhas parciais."""
+        with WriteBehindBuffer("products", batch_size=10, flush_interval=3600) as writer:
+            for i in range(1, 6):
+                writer.add({"id": i, "ml_category_id": "MLB1" if i % 2 else "MLB2"})
+
+        assert sorted(fake_supabase.updates, key=lambda update: update[2]) == [
+            ("products", {"ml_category_id": "MLB1"}, [1, 3, 5]),
+            ("products", {"ml_category_id": "MLB2"}, [2, 4]),
+        ]
+        assert writer.written == 5
+        assert writer.failed == 0
+
+    def test_large_group_is_chunked(self, fake_supabase):
+        """Testa que a lista de chaves de cada UPDATE respeita o limite por requisição."""
+        total = UPDATE_KEYS_PER_REQUEST + 1
+        with WriteBehindBuffer("products", batch_size=total, flush_interval=3600) as writer:
+            for i in range(total):
+                writer.add({"id": i, "ml_category_id": "MLB1"})
+
+        assert [len(keys) for _, _, keys in fake_supabase.updates] == [UPDATE_KEYS_PER_REQUEST, 1]
+
+    def test_failed_update_keeps_keys(self, fake_supabase):
+        """Testa que o grupo que falha em todas as tentativas vai para ``failed_keys``."""
+        fake_supabase.fail_keys = {2}
+        with WriteBehindBuffer("products", batch_size=10, flush_interval=3600, max_retries=2) as writer:
+            writer.add({"id": 1, "ml_category_id": "MLB1"})
+            writer.add({"id": 2, "ml_category_id": "MLB2"})
+
+        assert len(fake_supabase.updates) == 3
+        assert writer.written == 1
+        assert writer.failed_keys == [2]
+        assert "statement timeout" in writer.errors[0]
+
+    def test_add_does_not_write(self, fake_supabase):
+        """Testa que ``add`` só enfileira: o lote cheio é gravado pela thread do timer."""
+        writer = WriteBehindBuffer("products", batch_size=2, flush_interval=3600)
+        writer.add({"id": 1, "ml_category_id": "MLB1"})
+        assert fake_supabase.updates == []
+
+        writer.add({"id": 2, "ml_category_id": "MLB1"})
+        deadline = time.monotonic() + 2
+        while not fake_supabase.updates and time.monotonic() < deadline:
+            time.sleep(0.01)
+        writer.close()
+
+        assert fake_supabase.updates == [("products", {"ml_category_id": "MLB1"}, [1, 2])]
@@ -1,91 +1,257 @@
 import os
+import threading
+import time
+import uuid
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
 from supabase import create_client, Client
 
+try:
+    import redis
+except ImportError:  # sem redis o lock de refresh vale só para este processo
+    redis = None
+
 # Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Redis (lock de refresh compartilhado entre processos)
+REDIS_URL = os.getenv("REDIS_URL")
+
 # Config ML e Bling
 ML_CLIENT_ID = os.getenv("ML_CLIENT_ID")
 ML_CLIENT_SECRET = os.getenv("ML_CLIENT_SECRET")
 BLING_CLIENT_ID = os.getenv("BLING_CLIENT_ID")
 BLING_CLIENT_SECRET = os.getenv("BLING_CLIENT_SECRET")
 
+TOKEN_URLS = {
+    "ml": "https://api.mercadolibre.com/oauth/token",
+    "bling": "https://www.bling.com.br/Api/v3/oauth/token",
+}
+PROVIDER_NAMES = {"ml": "ML", "bling": "Bling"}
+
+# Nos últimos REFRESH_AHEAD segundos o token ainda é servido e renovado em segundo plano;
+# com menos de MIN_VALIDITY segundos o chamador espera o token novo
+REFRESH_AHEAD = int(os.getenv("TOKEN_REFRESH_AHEAD", "600"))
+MIN_VALIDITY = 60
+REFRESH_TIMEOUT = 30
+# O lock precisa durar mais que o POST de refresh e a gravação no Supabase; se expirasse
+# no meio, outro processo gastaria o mesmo refresh token (que só vale uma vez)
+REFRESH_LOCK_TTL_MS = REFRESH_TIMEOUT * 4 * 1000
+REFRESH_WAIT_SECONDS = 45
+
+# Libera o lock só se ele ainda for nosso
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# (user_id, provider) -> {"access_token", "expires_at"}
+_tokens: Dict[tuple, Dict[str, Any]] = {}
+_tokens_lock = threading.Lock()
+_local_locks: Dict[tuple, threading.Lock] = {}
+_background_refreshes = set()
+_redis_client = None
+
+def _redis():
+    global _redis_client
+    if _redis_client is None and redis is not None and REDIS_URL:
+        _redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis_client
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # Linhas antigas gravaram utcnow() sem fuso
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _expires_at(integration: Dict[str, Any]) -> Optional[datetime]:
+    """Vencimento absoluto do token; linhas sem expires_at usam updated_at + expires_in"""
+    expires_at = _parse_datetime(integration.get("expires_at"))
+    if expires_at:
+        return expires_at
+    updated_at = _parse_datetime(integration.get("updated_at"))
+    if updated_at and integration.get("expires_in"):
+        return updated_at + timedelta(seconds=int(integration["expires_in"]))
+    return None
+
+def _seconds_left(expires_at: Optional[datetime]) -> float:
+    if expires_at is None:
+        return 0
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+def _remember(user_id: str, provider: str, access_token: str, expires_at: Optional[datetime]):
+    with _tokens_lock:
+        _tokens[(user_id, provider)] = {"access_token": access_token, "expires_at": expires_at}
+
+def invalidate_token(user_id: str, provider: str):
+    """Descarta o token em cache (ex.: a API respondeu 401)"""
+    with _tokens_lock:
+        _tokens.pop((user_id, provider), None)
+
 def get_integration(user_id: str, provider: str):
     """Busca integração do usuário no Supabase"""
     response = supabase.table("integrations").select("*").eq("user_id", user_id).eq("provider", provider).single().execute()
     return response.data if response.data else None
 
-def update_integration(user_id: str, provider: str, access_token: str, refresh_token: str, expires_in: int):
-    """Atualiza token no Supabase"""
+def update_integration(user_id: str, provider: str, access_token: str, refresh_token: str, expires_in: int) -> datetime:
+    """Atualiza token no Supabase e retorna o vencimento absoluto"""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=int(expires_in))
     supabase.table("integrations").update({
         "access_token": access_token,
         "refresh_token": refresh_token,
         "expires_in": expires_in,
-        "updated_at": datetime.utcnow().isoformat()
+        "expires_at": expires_at.isoformat(),
+        "updated_at": now.isoformat()
     }).eq("user_id", user_id).eq("provider", provider).execute()
+    return expires_at
 
-def refresh_ml_token(user_id: str, refresh_token: str):
-    url = "https://api.mercadolibre.com/oauth/token"
+def _refresh_token(user_id: str, provider: str, refresh_token: str) -> str:
+    """Troca o refresh token e grava o novo par; chamar só com o lock da conta"""
+    client_id, client_secret = {
+        "ml": (ML_CLIENT_ID, ML_CLIENT_SECRET),
+        "bling": (BLING_CLIENT_ID, BLING_CLIENT_SECRET),
+    }[provider]
     payload = {
         "grant_type": "refresh_token",
-        "client_id": ML_CLIENT_ID,
-        "client_secret": ML_CLIENT_SECRET,
+        "client_id": client_id,
+        "client_secret": client_secret,
         "refresh_token": refresh_token,
     }
-    response = requests.post(url, data=payload, timeout=30)
-    
+    response = requests.post(TOKEN_URLS[provider], data=payload, timeout=REFRESH_TIMEOUT)
+
     if response.status_code >= 400:
-        raise Exception(f"Erro ao atualizar token ML: {response.status_code} {response.text}")
-        
+        raise Exception(f"Erro ao atualizar token {PROVIDER_NAMES[provider]}: {response.status_code} {response.text}")
+
     data = response.json()
     if "access_token" not in data or "refresh_token" not in data:
-        raise Exception(f"Resposta inválida do ML: {data}")
-        
-    update_integration(user_id, "ml", data["access_token"], data["refresh_token"], data["expires_in"])
+        raise Exception(f"Resposta inválida do {PROVIDER_NAMES[provider]}: {data}")
+
+    expires_at = update_integration(user_id, provider, data["access_token"], data["refresh_token"], data["expires_in"])
+    _remember(user_id, provider, data["access_token"], expires_at)
     return data["access_token"]
 
+def refresh_ml_token(user_id: str, refresh_token: str):
+    return _refresh_token(user_id, "ml", refresh_token)
+
 def refresh_bling_token(user_id: str, refresh_token: str):
-    url = "https://www.bling.com.br/Api/v3/oauth/token"
-    payload = {
-        "grant_type": "refresh_token",
-        "client_id": BLING_CLIENT_ID,
-        "client_secret": BLING_CLIENT_SECRET,
-        "refresh_token": refresh_token,
-    }
-    response = requests.post(url, data=payload, timeout=30)
-    
-    if response.status_code >= 400:
-        raise Exception(f"Erro ao atualizar token Bling: {response.status_code} {response.text}")
-        
-    data = response.json()
-    if "access_token" not in data or "refresh_token" not in data:
-        raise Exception(f"Resposta inválida do Bling: {data}")
-        
-    update_integration(user_id, "bling", data["access_token"], data["refresh_token"], data["expires_in"])
-    return data["access_token"]
+    return _refresh_token(user_id, "bling", refresh_token)
 
-def get_valid_token(user_id: str, provider: str):
-    """Retorna um token válido para o usuário"""
-    integration = get_integration(user_id, provider)
-    if not integration:
-        raise Exception(f"Nenhuma integração encontrada para {provider}")
+def _acquire_refresh_lock(user_id: str, provider: str) -> Optional[Callable[[], None]]:
+    """Tenta pegar o lock de refresh da conta; retorna a função que o libera"""
+    client = _redis()
+    if client is not None:
+        key = f"oauth:refresh:{provider}:{user_id}"
+        owner = str(uuid.uuid4())
+        try:
+            if not client.set(key, owner, nx=True, px=REFRESH_LOCK_TTL_MS):
+                return None
+
+            def release():
+                try:
+                    client.eval(RELEASE_LOCK_SCRIPT, 1, key, owner)
+                except redis.RedisError:
+                    pass  # expira sozinho pelo TTL
+            return release
+        except redis.RedisError as e:
+            print(f"⚠️ Redis indisponível, lock de refresh só neste processo: {e}")
+
+    with _tokens_lock:
+        lock = _local_locks.setdefault((user_id, provider), threading.Lock())
+    return lock.release if lock.acquire(blocking=False) else None
+
+def _refresh_once(user_id: str, provider: str) -> str:
+    """Renova o token da conta com um único refresh entre todos os processos
+
+    Quem não pega o lock espera o dono terminar e lê o token novo do Supabase,
+    em vez de gastar o refresh token (que é invalidado a cada troca).
+    """
+    deadline = time.monotonic() + REFRESH_WAIT_SECONDS
+    while True:
+        release = _acquire_refresh_lock(user_id, provider)
+        integration = get_integration(user_id, provider)
+        if not integration:
+            if release:
+                release()
+            raise Exception(f"Nenhuma integração encontrada para {provider}")
+
+        expires_at = _expires_at(integration)
+        if _seconds_left(expires_at) > REFRESH_AHEAD:
+            # Outro processo já renovou
+            if release:
+                release()
+            _remember(user_id, provider, integration["access_token"], expires_at)
+            return integration["access_token"]
+
+        if release:
+            try:
+                return _refresh_token(user_id, provider, integration["refresh_token"])
+            finally:
+                release()
 
-    # Verifica se o token está expirado ou perto do vencimento
-    # Se expires_in for None ou menor que 60 segundos, atualiza o token
-    expires_in = integration.get("expires_in", 0)
-    if expires_in is None or expires_in < 60:  # token expirado ou perto do vencimento
+        if time.monotonic() > deadline:
+            raise Exception(f"Tempo esgotado aguardando refresh do token {provider}")
+        time.sleep(0.5)
+
+def _refresh_in_background(user_id: str, provider: str):
+    key = (user_id, provider)
+    with _tokens_lock:
+        if key in _background_refreshes:
+            return
+        _background_refreshes.add(key)
+
+    def run():
         try:
-            if provider == "ml":
-                return refresh_ml_token(user_id, integration["refresh_token"])
-            elif provider == "bling":
-                return refresh_bling_token(user_id, integration["refresh_token"])
-            else:
-                raise Exception("Provider inválido")
+            _refresh_once(user_id, provider)
         except Exception as e:
-            raise Exception(f"Erro ao atualizar token {provider}: {str(e)}")
+            print(f"⚠️ Falha ao renovar token {provider} em segundo plano: {e}")
+        finally:
+            with _tokens_lock:
+                _background_refreshes.discard(key)
+
+    threading.Thread(target=run, name=f"token-refresh-{provider}", daemon=True).start()
+
+def get_valid_token(user_id: str, provider: str):
+    """Retorna um token válido para o usuário
+
+    Tokens válidos vêm do cache do processo; perto do vencimento o token atual
+    continua sendo servido enquanto um refresh roda em segundo plano.
+    """
+    if provider not in TOKEN_URLS:
+        raise Exception("Provider inválido")
 
-    return integration["access_token"]
+    with _tokens_lock:
+        cached = _tokens.get((user_id, provider))
+    if cached is None:
+        integration = get_integration(user_id, provider)
+        if not integration:
+            raise Exception(f"Nenhuma integração encontrada para {provider}")
+        cached = {"access_token": integration["access_token"], "expires_at": _expires_at(integration)}
+        _remember(user_id, provider, cached["access_token"], cached["expires_at"])
+
+    seconds_left = _seconds_left(cached["expires_at"])
+    if seconds_left > MIN_VALIDITY:
+        if seconds_left <= REFRESH_AHEAD:
+            _refresh_in_background(user_id, provider)
+        return cached["access_token"]
+
+    try:
+        return _refresh_once(user_id, provider)
+    except Exception as e:
+        raise Exception(f"Erro ao atualizar token {provider}: {str(e)}")
+
+def refresh_if_expiring(user_id: str, provider: str) -> bool:
+    """Renova agora (sem thread) o token que vence em menos de REFRESH_AHEAD segundos; usado pelo CLI"""
+    integration = get_integration(user_id, provider)
+    if not integration:
+        raise Exception(f"Nenhuma integração encontrada para {provider}")
+    if _seconds_left(_expires_at(integration)) > REFRESH_AHEAD:
+        return False
+    _refresh_once(user_id, provider)
+    return True
@@ -1,5 +1,8 @@
+import json
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
 from supabase import create_client
 
 def _load_env():
@@ -22,6 +25,9 @@ if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
 
 supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
+# Chaves por UPDATE ... IN (...): a lista vai na URL do PostgREST
+UPDATE_KEYS_PER_REQUEST = 200
+
 def get_integration_tokens(provider: str, user_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Pega o token MAIS RECENTE na tabela 'integrations' para o provider informado.
@@ -45,3 +51,144 @@ def get_integration_tokens(provider: str, user_id: Optional[str] = None) -> Dict
         }
     except Exception as e:
         raise RuntimeError(f"❌ Erro ao buscar integração '{provider}': {str(e)}")
+
+def iter_rows(table: str, columns: str, filters: Optional[Callable[[Any], Any]] = None,
+              page_size: int = 1000, key: str = "id", start_after: Any = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Lê a tabela em páginas ordenadas pela chave primária (keyset: key > última lida).
+    Os filtros são aplicados no servidor (``filters`` recebe e devolve a query);
+    cada página é entregue assim que chega, sem carregar a tabela inteira.
+    Linhas alteradas durante a leitura não deslocam as páginas seguintes, como no offset.
+    ``start_after`` retoma a leitura depois da chave de um checkpoint.
+    """
+    select = columns if key in [c.strip() for c in columns.split(",")] else f"{key}, {columns}"
+    last_key = start_after
+    while True:
+        q = supabase.table(table).select(select)
+        if filters:
+            q = filters(q)
+        if last_key is not None:
+            q = q.gt(key, last_key)
+        rows = q.order(key).limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_key = rows[-1][key]
+
+def count_rows(table: str, filters: Optional[Callable[[Any], Any]] = None,
+               key: str = "id", start_after: Any = None) -> Optional[int]:
+    """Total de linhas que ``iter_rows`` vai ler (contagem feita no servidor)"""
+    q = supabase.table(table).select(key, count="exact")
+    if filters:
+        q = filters(q)
+    if start_after is not None:
+        q = q.gt(key, start_after)
+    return q.limit(1).execute().count
+
+class WriteBehindBuffer:
+    """
+    Acumula updates de linhas e grava em lote a cada ``batch_size`` linhas ou ``flush_interval``
+    segundos, em vez de um round trip por linha. Linhas com os mesmos valores (tirando ``key``)
+    viram um único ``UPDATE ... WHERE key IN (...)``; com ``rpc`` o lote vai inteiro como array JSON.
+    A gravação roda na thread do timer (``add`` só enfileira) ou em quem chama ``flush``.
+    Cada update é tentado ``max_retries`` vezes; os que falham de vez ficam em ``failed_keys``/``errors``.
+    Use com ``with`` (ou chame ``close()``) para gravar o que sobrou.
+    """
+
+    def __init__(self, table: str, batch_size: int = 500, flush_interval: float = 5.0,
+                 key: str = "id", rpc: Optional[str] = None, max_retries: int = 3):
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.key = key
+        self.rpc = rpc
+        self.max_retries = max_retries
+        self.rows: List[Dict[str, Any]] = []
+        self.written = 0
+        self.failed_keys: List[Any] = []
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._timer.start()
+
+    @property
+    def failed(self) -> int:
+        return len(self.failed_keys)
+
+    def add(self, row: Dict[str, Any]):
+        """Enfileira a linha; com o lote cheio acorda a thread do timer (não grava aqui)"""
+        with self._lock:
+            self.rows.append(row)
+            full = len(self.rows) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Grava as linhas pendentes em lotes de ``batch_size`` (bloqueia: rode fora do event loop)"""
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch, self.rows = self.rows[:self.batch_size], self.rows[self.batch_size:]
+                if not batch:
+                    return
+                if self.rpc:
+                    self._attempt([row.get(self.key) for row in batch],
+                                  lambda: supabase.rpc(self.rpc, {"rows": batch}).execute())
+                    continue
+                for payload, keys in self._group(batch):
+                    for i in range(0, len(keys), UPDATE_KEYS_PER_REQUEST):
+                        chunk = keys[i:i + UPDATE_KEYS_PER_REQUEST]
+                        self._attempt(chunk, lambda: supabase.table(self.table).update(payload)
+                                      .in_(self.key, chunk).execute())
+
+    def _group(self, batch: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[Any]]]:
+        """Agrupa as chaves das linhas com o mesmo payload (a última linha de cada chave vale)"""
+        latest = {row[self.key]: row for row in batch}
+        groups: Dict[str, Tuple[Dict[str, Any], List[Any]]] = {}
+        for row_key, row in latest.items():
+            payload = {column: value for column, value in row.items() if column != self.key}
+            signature = json.dumps(payload, sort_keys=True, default=str)
+            groups.setdefault(signature, (payload, []))[1].append(row_key)
+        return list(groups.values())
+
+    def _attempt(self, keys: List[Any], write: Callable[[], Any]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                write()
+                self.written += len(keys)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed_keys.extend(keys)
+                    self.errors.append(str(e))
+                    print(f"❌ Lote de {len(keys)} linhas em '{self.table}' falhou após {attempt} tentativas: {e}")
+                    return
+                time.sleep(2 ** (attempt - 1))
+
+    def _flush_periodically(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def report(self) -> str:
+        summary = f"{self.written} gravadas, {self.failed} com falha"
+        if self.errors:
+            summary += f" ({len(self.errors)} lotes; último erro: {self.errors[-1]})"
+        return summary
@@ -1,41 +1,128 @@
 # utils_bling_categories.py
+import hashlib
+import threading
+import time
+import unicodedata
 import requests
+from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BLING_BASE = "https://www.bling.com.br/Api/v3"
+PAGE_SIZE = 100
+MAX_CREATE_ATTEMPTS = 3
 
-def ensure_bling_category_chain(bling_token: str, chain: list[str]) -> tuple[int, str]:
-    """
-    chain: ["Casa, Móveis e Decoração", "Enfeites e Decoração da Casa", ... , "Árvores de Natal"]
-    Retorna: (id_da_categoria_folha, breadcrumb_criado)
+def normalize_name(name: str) -> str:
+    """Nome comparável: sem espaços extras e sem diferença de caixa"""
+    return " ".join(unicodedata.normalize("NFC", name or "").split()).casefold()
+
+def _parent_of(item: dict) -> int:
+    parent = item.get("categoriaPai") or {}
+    return int(parent.get("id") or item.get("idCategoriaPai") or 0)
+
+class BlingCategoryIndex:
+    """Árvore de categorias de uma conta Bling indexada por (id do pai, nome normalizado)
+
+    A árvore é carregada uma vez (todas as páginas) e atualizada a cada
+    categoria criada; resolver uma cadeia custa uma consulta local por nível.
+    Consulta e criação de uma mesma chave rodam sob ``key_lock``, para que
+    threads com nomes que só diferem em caixa/espaços não criem duplicatas.
     """
-    headers = {"Authorization": f"Bearer {bling_token}", "Content-Type": "application/json"}
-    parent_id = None
-    built = []
-
-    for name in chain:
-        built.append(name)
-
-        # 1) tenta achar pelo nome + pai
-        params = {"pagina": 1, "limite": 100}
-        r = requests.get(f"{BLING_BASE}/categorias/produtos", headers=headers, params=params, timeout=30)
-        r.raise_for_status()
-        found_id = None
-        for item in r.json().get("data", []):
-            if item["descricao"].strip().lower() == name.strip().lower():
-                # se precisar validar por pai, use item.get("idCategoriaPai")
-                found_id = item["id"]
+
+    def __init__(self, bling_token: str, session: Optional[requests.Session] = None):
+        self.headers = {"Authorization": f"Bearer {bling_token}", "Content-Type": "application/json"}
+        self.session = session or _make_session()
+        self.nodes: Optional[Dict[Tuple[int, str], int]] = None
+        self.lock = threading.Lock()
+        self.key_locks: Dict[Tuple[int, str], threading.Lock] = {}
+
+    def load(self) -> Dict[Tuple[int, str], int]:
+        """Carrega todas as páginas de categorias (uma vez por conta)"""
+        with self.lock:
+            if self.nodes is not None:
+                return self.nodes
+
+            nodes: Dict[Tuple[int, str], int] = {}
+            page = 1
+            while True:
+                r = self.session.get(f"{BLING_BASE}/categorias/produtos", headers=self.headers,
+                                     params={"pagina": page, "limite": PAGE_SIZE}, timeout=30)
+                r.raise_for_status()
+                items = r.json().get("data", [])
+                for item in items:
+                    nodes.setdefault((_parent_of(item), normalize_name(item["descricao"])), int(item["id"]))
+                if len(items) < PAGE_SIZE:
+                    break
+                page += 1
+
+            self.nodes = nodes
+            return nodes
+
+    def invalidate(self):
+        """Descarta a árvore carregada; a próxima consulta recarrega do Bling"""
+        with self.lock:
+            self.nodes = None
+
+    def key_lock(self, parent_id: Optional[int], name: str) -> threading.Lock:
+        """Lock da chave (pai, nome normalizado): segure-o entre ``find`` e ``create``"""
+        with self.lock:
+            return self.key_locks.setdefault((parent_id or 0, normalize_name(name)), threading.Lock())
+
+    def find(self, parent_id: Optional[int], name: str) -> Optional[int]:
+        return self.load().get((parent_id or 0, normalize_name(name)))
+
+    def create(self, parent_id: Optional[int], name: str) -> int:
+        """Cria a categoria no Bling e a inclui no índice"""
+        payload = {"descricao": name}
+        if parent_id:
+            payload["categoriaPai"] = {"id": parent_id}
+
+        for attempt in range(MAX_CREATE_ATTEMPTS):
+            c = self.session.post(f"{BLING_BASE}/categorias/produtos", headers=self.headers, json=payload, timeout=30)
+            if c.status_code != 429:
                 break
+            time.sleep(float(c.headers.get("Retry-After") or 2 ** attempt))
+
+        if c.status_code >= 300:
+            # Pode ter sido criada por outro processo: a árvore local não é mais confiável
+            self.invalidate()
+            raise RuntimeError(f"Erro ao criar '{name}': {c.text}")
+
+        category_id = int(c.json()["data"]["id"])
+        self.load()[(parent_id or 0, normalize_name(name))] = category_id
+        return category_id
+
+    def ensure(self, parent_id: Optional[int], name: str) -> int:
+        """Id da categoria filha de ``parent_id``, criando-a se não existir"""
+        with self.key_lock(parent_id, name):
+            return self.find(parent_id, name) or self.create(parent_id, name)
+
+    def ensure_chain(self, chain: List[str]) -> Tuple[int, str]:
+        parent_id = None
+        for name in chain:
+            parent_id = self.ensure(parent_id, name)
+        return parent_id, " > ".join(chain)
 
-        # 2) cria se não existir
-        if not found_id:
-            payload = {"descricao": name}
-            if parent_id:
-                payload["idCategoriaPai"] = parent_id  # campo de pai
-            c = requests.post(f"{BLING_BASE}/categorias/produtos", headers=headers, json=payload, timeout=30)
-            if c.status_code >= 300:
-                raise RuntimeError(f"Erro ao criar '{name}': {c.text}")
-            found_id = c.json()["data"]["id"]
+def _make_session() -> requests.Session:
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
 
-        parent_id = found_id
+# Um índice por conta (hash do token), reaproveitado entre chamadas
+_indexes: Dict[str, BlingCategoryIndex] = {}
+_indexes_lock = threading.Lock()
 
-    return parent_id, " > ".join(chain)
+def get_category_index(bling_token: str) -> BlingCategoryIndex:
+    account = hashlib.sha256(bling_token.encode()).hexdigest()[:16]
+    with _indexes_lock:
+        if account not in _indexes:
+            _indexes[account] = BlingCategoryIndex(bling_token)
+        return _indexes[account]
+
+def ensure_bling_category_chain(bling_token: str, chain: list[str]) -> tuple[int, str]:
+    """
+    chain: ["Casa, Móveis e Decoração", "Enfeites e Decoração da Casa", ... , "Árvores de Natal"]
+    Retorna: (id_da_categoria_folha, breadcrumb_criado)
+    """
+    return get_category_index(bling_token).ensure_chain(chain)
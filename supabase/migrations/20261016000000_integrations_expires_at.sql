@@ -0,0 +1,9 @@
+-- Vencimento absoluto do access token, lido e gravado por scripts/token_manager.py
+alter table public.integrations add column if not exists expires_at timestamptz;
+
+-- Linhas existentes: updated_at + expires_in, o mesmo fallback usado pelo token_manager
+update public.integrations
+set expires_at = updated_at + make_interval(secs => expires_in)
+where expires_at is null
+  and updated_at is not null
+  and expires_in is not null;